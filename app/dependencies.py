@@ -0,0 +1,165 @@
+import io
+from typing import Any, AsyncIterator, BinaryIO, Dict, Optional
+
+import orjson
+from fastapi import HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+from starlette.datastructures import UploadFile
+
+from app.models.schemas import MultiModalRequest
+from app.services.uploads import UPLOAD_MAX_BYTES, Upload, UploadTooLarge, spool_base64, spool_stream
+
+# Request-state keys filled in by ArabicAttributeExtractorMiddleware
+JSON_BODY_STATE = "json_body"
+ATTRIBUTES_STATE = "extracted_attributes"
+
+# Documents the body in OpenAPI for routes that take it through
+# get_multimodal_request instead of a body parameter
+MULTIMODAL_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": MultiModalRequest.model_json_schema()}},
+    }
+}
+
+
+async def get_json_body(request: Request) -> Any:
+    """Request body parsed as JSON, reusing the middleware's parse if there was one"""
+    state = request.scope.get("state") or {}
+    if JSON_BODY_STATE in state:
+        return state[JSON_BODY_STATE]
+    body = await request.body()
+    try:
+        return orjson.loads(body)
+    except orjson.JSONDecodeError as e:
+        raise RequestValidationError(
+            [{"type": "json_invalid", "loc": ("body", e.pos), "msg": "JSON decode error", "input": {}, "ctx": {"error": e.msg}}]
+        )
+
+
+async def get_multimodal_request(request: Request) -> MultiModalRequest:
+    """Validate the body into MultiModalRequest without parsing the JSON again"""
+    data = await get_json_body(request)
+    try:
+        return MultiModalRequest.model_validate(data)
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+        )
+
+
+# Documents the multipart and raw-binary bodies accepted by get_upload
+UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {
+                        "file": {"type": "string", "format": "binary"},
+                        "text": {"type": "string"},
+                        "options": {"type": "string", "description": "JSON object"},
+                        "user_id": {"type": "string"},
+                    },
+                }
+            },
+            "application/octet-stream": {"schema": {"type": "string", "format": "binary"}},
+        },
+    },
+    "parameters": [
+        {"name": name, "in": "query", "required": False, "schema": {"type": "string"},
+         "description": f"{name} for raw-binary uploads"}
+        for name in ("text", "options", "user_id")
+    ],
+}
+
+
+def _parse_options(raw: Optional[str]) -> Optional[Dict[str, Any]]:
+    if not raw:
+        return None
+    try:
+        options = orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="options must be a JSON object")
+    if not isinstance(options, dict):
+        raise HTTPException(status_code=400, detail="options must be a JSON object")
+    return options
+
+
+def open_base64_upload(data: str) -> BinaryIO:
+    """Buffer for a base64 ``image_data``/``audio_data`` field of a JSON body.
+    Invalid base64 gives an empty buffer, which analyzers treat as unreadable."""
+    try:
+        return spool_base64(data)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=f"Upload exceeds {e.limit} bytes")
+    except ValueError:
+        return io.BytesIO()
+
+
+async def get_upload(request: Request) -> AsyncIterator[Upload]:
+    """Binary upload sent as multipart/form-data (``file`` field) or as the raw body.
+
+    The body is streamed into a spooled buffer and cut off at
+    UPLOAD_MAX_BYTES; the buffer is closed after the response is sent.
+    """
+    content_type = request.headers.get("content-type", "")
+    form = None
+    try:
+        if content_type.startswith("multipart/form-data"):
+            received = 0
+
+            async def capped_receive():
+                nonlocal received
+                message = await request.receive()
+                received += len(message.get("body", b""))
+                if received > UPLOAD_MAX_BYTES:
+                    raise UploadTooLarge(UPLOAD_MAX_BYTES)
+                return message
+
+            # Starlette spools each file part to a SpooledTemporaryFile
+            form = await Request(request.scope, capped_receive).form(max_files=1)
+            file = form.get("file")
+            if not isinstance(file, UploadFile):
+                await form.close()
+                raise HTTPException(status_code=400, detail="Missing file field")
+            upload = Upload(
+                file=file.file,
+                content_type=file.content_type,
+                filename=file.filename,
+                text=form.get("text") or None,
+                options=_parse_options(form.get("options")),
+                user_id=form.get("user_id") or None,
+            )
+        elif content_type.startswith(("application/json", "application/x-www-form-urlencoded", "text/")):
+            raise HTTPException(
+                status_code=415, detail="Send the file as multipart/form-data or as a raw binary body"
+            )
+        else:
+            params = request.query_params
+            options = _parse_options(params.get("options"))
+            file = await spool_stream(request.stream())
+            if not file.read(1):
+                file.close()
+                raise HTTPException(status_code=400, detail="Empty upload")
+            file.seek(0)
+            upload = Upload(
+                file=file,
+                content_type=content_type or None,
+                text=params.get("text") or None,
+                options=options,
+                user_id=params.get("user_id") or None,
+            )
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=f"Upload exceeds {e.limit} bytes")
+
+    try:
+        yield upload
+    finally:
+        if form is not None:
+            await form.close()
+        else:
+            upload.file.close()
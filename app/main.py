@@ -1,6 +1,14 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from starlette.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
-from app.middleware import GeminiPersonaMiddleware, ArabicAttributeExtractorMiddleware
+from app.middleware import (
+    ArabicAttributeExtractorMiddleware,
+    GeminiPersonaMiddleware,
+    MetricsMiddleware,
+    ServerTimingMiddleware,
+)
 from app.routers import (
     ai_nose,
     mood_advisor,
@@ -26,9 +34,41 @@ from app.routers import (
     order_items,
     perfume_ingredients,
     ai_attributes,
+    recommendations,
 )
+from app.services.database import catalog, interactions, prompt_templates, init_db, close_db
+from app.services.http_clients import outbound
+from app.services.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, registry
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Shared pooled client for all database access
+    await init_db()
+    # Pooled keep-alive clients for OpenWeather, ElevenLabs and LLM providers
+    await outbound.start()
+    # Warm the catalog snapshot so recommendation requests never hit the database
+    await catalog.start()
+    # Background writer for customer_interactions
+    await interactions.start()
+    # Pre-encoded persona/system prompts for the LLM proxy path
+    await prompt_templates.start()
+    yield
+    await prompt_templates.stop()
+    await catalog.stop()
+    # Flush buffered interactions while the client is still open
+    await interactions.stop()
+    await close_db()
+    await outbound.stop()
 
-app = FastAPI(title="Aura AI Server", version="1.0.0")
+
+# Encode every response with orjson instead of the stdlib json module
+app = FastAPI(
+    title="Aura AI Server",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 # Add middlewares
 app.add_middleware(ArabicAttributeExtractorMiddleware)
@@ -40,6 +80,10 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Server-Timing header with database/external call time for each response
+app.add_middleware(ServerTimingMiddleware)
+# Outermost, so the latency includes the other middlewares
+app.add_middleware(MetricsMiddleware)
 
 # Include routers
 app.include_router(ai_nose.router, prefix="/api/ai-nose", tags=["AI Nose"])
@@ -90,6 +134,9 @@ app.include_router(
     perfume_ingredients.router, prefix="/api", tags=["Perfume Ingredients"]
 )
 app.include_router(ai_attributes.router, prefix="/api", tags=["AI Attributes"])
+app.include_router(
+    recommendations.router, prefix="/api/recommendations", tags=["Recommendations"]
+)
 
 
 @app.get("/")
@@ -100,3 +147,9 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Request and upstream metrics in the Prometheus text format"""
+    return Response(content=registry.render(), media_type=METRICS_CONTENT_TYPE)
@@ -1,53 +1,181 @@
 
-import json
+import orjson
 from fastapi import Request, Response
 import re
+import time
+from starlette.routing import Match
+from app.dependencies import ATTRIBUTES_STATE, JSON_BODY_STATE
+from app.services.database import prompt_templates
+from app.services.metrics import http_request_duration, http_requests, http_requests_in_progress
+from app.services.request_timing import RequestTiming, current_timing
+from app.services.prompt_templates import GEMINI_MAX_BODY_BYTES
+from app.services.text_analysis import analyze
+
+class RequestBodyTooLarge(Exception):
+    pass
+
+
+class MetricsMiddleware:
+    """Request count, in-flight gauge and latency histogram per route.
+
+    Requests are labelled with the route template (``/api/perfumes/{perfume_id}``)
+    so path parameters do not create new series; paths that match no route
+    share the ``<unmatched>`` label.
+    """
+
+    UNMATCHED = "<unmatched>"
 
-class GeminiPersonaMiddleware:
     def __init__(self, app):
         self.app = app
+        self._static_routes = None
+        self._param_routes = None
+
+    def _index_routes(self, routes) -> None:
+        # Exact paths are a dict lookup; routes with parameters are only
+        # tried when the path starts with their literal prefix
+        self._static_routes = {}
+        self._param_routes = []
+        for route in routes:
+            path = getattr(route, "path", None)
+            if path is None:
+                continue
+            if "{" in path:
+                self._param_routes.append((path.split("{", 1)[0], route))
+            else:
+                self._static_routes.setdefault(path, path)
+
+    def route_template(self, scope) -> str:
+        if self._static_routes is None:
+            self._index_routes(scope["app"].routes)
+        path = scope["path"]
+        template = self._static_routes.get(path)
+        if template is not None:
+            return template
+        for prefix, route in self._param_routes:
+            if path.startswith(prefix) and route.matches(scope)[0] != Match.NONE:
+                return route.path
+        return self.UNMATCHED
 
     async def __call__(self, scope, receive, send):
-        if scope["type"] == "http" and scope["path"].startswith("/api/gemini"):
-            request = Request(scope, receive)
-            body = await request.body()
-            
-            # Decode body to string
-            body_str = body.decode('utf-8')
-            
-            # Prepend the persona to the prompt
-            persona = """
-You are a sophisticated AI assistant for an online perfume store. Your persona is that of an expert in perfumery, deep learning, and customer experience. You are integrated into a platform that uses the top 10 deep learning algorithms to provide a personalized and intelligent shopping experience.
-
-Your responses should be:
-- In Arabic.
-- Clear, concise, and helpful.
-- Reflecting the persona of a world-class expert in AI and perfumery.
-- Tailored to the user's needs, considering their mood, occasion, skin type, and style.
-
-Your capabilities include:
-- **AI Nose™️:** A contextual recommendation engine that suggests perfumes based on various factors.
-- **AI Mood Selector:** Analyzes text or voice to determine the user's mood and recommends suitable fragrances.
-- **Skin Chemistry Scanner:** Analyzes skin type from an image to suggest compatible perfumes.
-- **Occasion Detector & Style Matcher:** Recommends perfumes for specific occasions and personal styles.
-- **Longevity Score:** Predicts the longevity of a fragrance based on various factors.
-- **Perfume Memory, Driver & Personality Map:** Learns user preferences and creates a personalized scent profile.
-- **Smell Journey & Trial Simulator:** Creates immersive virtual experiences of the perfumes.
-- **Gift Selector, Description & Ad Builder, Bottle Renderer:** Provides creative and personalized content.
-- **Recommendation Engine & Price Optimizer:** Manages recommendations and pricing dynamically.
-"""
-            
-            # Modify the body to prepend the persona
-            modified_body_str = f'{persona}\n\n{body_str}'
-            modified_body = modified_body_str.encode('utf-8')
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = self.route_template(scope)
+        status = 500
 
-            # Create a new receive function
-            async def new_receive():
-                return {'type': 'http.request', 'body': modified_body, 'more_body': False}
+        async def status_send(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
 
-            await self.app(scope, new_receive, send)
-        else:
+        http_requests_in_progress.inc(method, route)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, status_send)
+        finally:
+            http_request_duration.observe(time.perf_counter() - started, method, route)
+            http_requests.inc(method, route, str(status))
+            http_requests_in_progress.dec(method, route)
+
+
+class ServerTimingMiddleware:
+    """Adds a ``Server-Timing`` header with the request's database and
+    external-API calls (count and total duration), the remaining handler
+    time and the total, as of when the response starts."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
             await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming()
+        token = current_timing.set(timing)
+
+        async def timing_send(message):
+            if message['type'] == 'http.response.start':
+                headers = list(message.get('headers', []))
+                headers.append((b"server-timing", timing.header().encode("latin-1")))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, timing_send)
+        finally:
+            current_timing.reset(token)
+
+
+class GeminiPersonaMiddleware:
+    """Prepends the persona (and endpoint system prompt) to /api/gemini* bodies.
+
+    The pre-encoded prefix is sent as the first body chunk and the client's
+    chunks are passed through as they arrive, so the body is never buffered
+    here. Bodies over ``max_body_bytes`` get a 413.
+    """
+
+    def __init__(self, app, max_body_bytes: int = GEMINI_MAX_BODY_BYTES):
+        self.app = app
+        self.max_body_bytes = max_body_bytes
+
+    @staticmethod
+    async def too_large(scope, receive, send):
+        response = Response(
+            content=orjson.dumps({"error": "Request body too large"}),
+            media_type="application/json",
+            status_code=413
+        )
+        await response(scope, receive, send)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith("/api/gemini"):
+            await self.app(scope, receive, send)
+            return
+
+        # Reject early when the client declares an oversized body
+        headers = [(k, v) for k, v in scope["headers"] if k != b"content-length"]
+        declared = next((v for k, v in scope["headers"] if k == b"content-length"), None)
+        if declared is not None and declared.isdigit() and int(declared) > self.max_body_bytes:
+            await self.too_large(scope, receive, send)
+            return
+
+        endpoint = scope["path"][len("/api/gemini"):].strip("/")
+        prefix = prompt_templates.prefix(endpoint)
+        if declared is not None and declared.isdigit():
+            headers.append((b"content-length", str(len(prefix) + int(declared)).encode()))
+        scope = dict(scope, headers=headers)
+
+        prefix_sent = False
+        received = 0
+        response_started = False
+
+        async def prefixed_receive():
+            nonlocal prefix_sent, received
+            if not prefix_sent:
+                prefix_sent = True
+                return {'type': 'http.request', 'body': prefix, 'more_body': True}
+            message = await receive()
+            if message['type'] == 'http.request':
+                received += len(message.get('body', b''))
+                if received > self.max_body_bytes:
+                    raise RequestBodyTooLarge()
+            return message
+
+        async def tracking_send(message):
+            nonlocal response_started
+            if message['type'] == 'http.response.start':
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, prefixed_receive, tracking_send)
+        except RequestBodyTooLarge:
+            if not response_started:
+                await self.too_large(scope, receive, send)
 
 class ArabicAttributeExtractorMiddleware:
     def __init__(self, app):
@@ -79,39 +207,26 @@ class ArabicAttributeExtractorMiddleware:
         if not text:
             return {}
 
-        text_lower = text.lower()
-        
-        # Simple keyword matching as a placeholder
-        mood_keywords = {
-            'نشيط': ['منعش', 'نشيط', 'حيوي', 'طاقة', 'متحمس', 'fresh', 'energetic'],
-            'هادئ': ['هادئ', 'مسترخي', 'مريح', 'هدوء', 'بارد'],
-            'واثق': ['واثق', 'قوي', 'مؤثر', 'قائد', 'confident'],
-            'رومانسي': ['رومانسي', 'حب', 'موعد', 'عاطفي', 'أمسية خاصة'],
-            'سعيد': ['سعيد', 'فرح', 'مبسوط', 'مرح', 'adventurous']
-        }
-        
-        occasion_keywords = {
-            'يومي': ['صيف', 'يومي', 'عادي', 'بيت', 'منزل', 'منعش'],
-            'عمل': ['عمل', 'مكتب', 'اجتماع', 'مقابلة'],
-            'موعد': ['موعد', 'لقاء', 'خروج', 'أمسية خاصة', 'رومانسي'],
-            'حفلة': ['حفلة', 'احتفال', 'مناسبة', 'عيد'],
-            'زفاف': ['زفاف', 'عرس', 'زواج']
-        }
+        # One normalized pass over all vocabularies; the handler reuses it
+        analysis = analyze(text)
         
         attributes = {}
-        
-        for mood, keywords in mood_keywords.items():
-            if any(keyword in text_lower for keyword in keywords):
-                attributes['mood'] = mood
-                break 
-
-        for occasion, keywords in occasion_keywords.items():
-            if any(keyword in text_lower for keyword in keywords):
-                attributes['occasion'] = occasion
-                break
+        for name in ('mood', 'occasion'):
+            label = analysis.first(name)
+            if label:
+                attributes[name] = label
         
         return attributes
 
+    @staticmethod
+    async def error_response(scope, receive, send, message: str, status_code: int):
+        response = Response(
+            content=orjson.dumps({"error": message}),
+            media_type="application/json",
+            status_code=status_code
+        )
+        await response(scope, receive, send)
+
     async def __call__(self, scope, receive, send):
         if scope["type"] != "http" or scope["path"] not in self.target_paths:
             await self.app(scope, receive, send)
@@ -121,50 +236,41 @@ class ArabicAttributeExtractorMiddleware:
         body = await request.body()
         
         try:
-            data = json.loads(body)
+            # Parsed once here; handlers read it from request state
+            data = orjson.loads(body)
+            if not isinstance(data, dict):
+                raise orjson.JSONDecodeError("Expected a JSON object", "", 0)
             prompt = data.get("text", "")
 
             if not prompt or not self.is_arabic(prompt):
-                response = Response(
-                    content=json.dumps({"error": "الرجاء إدخال طلب صحيح باللغة العربية"}),
-                    media_type="application/json",
-                    status_code=400
-                )
-                await response(scope, receive, send)
+                await self.error_response(scope, receive, send, "الرجاء إدخال طلب صحيح باللغة العربية", 400)
                 return
             
             attributes = self.extract_attributes(prompt)
             
             if not attributes:
-                response = Response(
-                    content=json.dumps({"error": "لم أتمكن من فهم طلبك. الرجاء تقديم تفاصيل أكثر حول ما تبحث عنه."}),
-                    media_type="application/json",
-                    status_code=400
-                )
-                await response(scope, receive, send)
+                await self.error_response(scope, receive, send, "لم أتمكن من فهم طلبك. الرجاء تقديم تفاصيل أكثر حول ما تبحث عنه.", 400)
                 return
 
-            data["extracted_attributes"] = attributes
-            modified_body = json.dumps(data).encode('utf-8')
-
-            async def new_receive():
-                return {'type': 'http.request', 'body': modified_body, 'more_body': False}
-
-            await self.app(scope, new_receive, send)
-
-        except json.JSONDecodeError:
-            response = Response(
-                content=json.dumps({"error": "Invalid JSON in request body"}),
-                media_type="application/json",
-                status_code=400
-            )
-            await response(scope, receive, send)
+        except orjson.JSONDecodeError:
+            await self.error_response(scope, receive, send, "Invalid JSON in request body", 400)
             return
         except Exception as e:
-            response = Response(
-                content=json.dumps({"error": "An internal error occurred"}),
-                media_type="application/json",
-                status_code=500
-            )
-            await response(scope, receive, send)
+            await self.error_response(scope, receive, send, "An internal error occurred", 500)
             return
+
+        state = scope.setdefault("state", {})
+        state[JSON_BODY_STATE] = data
+        state[ATTRIBUTES_STATE] = attributes
+
+        # Replay the original bytes for anything that still reads the body
+        body_sent = False
+
+        async def replay_receive():
+            nonlocal body_sent
+            if body_sent:
+                return await receive()
+            body_sent = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+
+        await self.app(scope, replay_receive, send)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional, Union, Dict, Any
 from enum import Enum
 import uuid
@@ -25,6 +25,26 @@ class PerfumeRecommendation(BaseModel):
     sillage_score: Optional[int] = None
     skin_compatibility: Optional[str] = None
 
+class RecommendationContext(BaseModel):
+    mood: Optional[str] = None
+    occasion: Optional[str] = None
+    skin_type: Optional[str] = None
+    gender: Optional[str] = None
+    style: Optional[str] = None
+    max_price: Optional[float] = None
+    limit: int = Field(3, ge=1, le=20)
+
+class BatchRecommendationRequest(BaseModel):
+    contexts: List[RecommendationContext] = Field(..., min_length=1, max_length=100)
+
+class BatchRecommendationResult(BaseModel):
+    context: RecommendationContext
+    recommendations: List[PerfumeRecommendation]
+
+class BatchRecommendationResponse(BaseModel):
+    results: List[BatchRecommendationResult]
+    catalog_version: int
+
 class AIAnalysisResponse(BaseModel):
     analysis: str
     recommendations: List[PerfumeRecommendation]
@@ -0,0 +1,154 @@
+import os
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple, Type
+
+import anyio
+from pydantic import BaseModel
+from pydantic_core import PydanticUndefined
+from starlette.datastructures import Headers
+from starlette.responses import Response
+
+# Rows read back from our own tables are already the shape the response
+# models describe. List endpoints project them onto the model's fields and
+# return an ORJSONResponse directly, which skips FastAPI's per-row
+# validation and jsonable_encoder pass. Write paths still validate.
+
+
+@lru_cache(maxsize=None)
+def _field_defaults(model: Type[BaseModel]) -> Tuple[Tuple[str, Callable[[], Any]], ...]:
+    fields = []
+    for name, field in model.model_fields.items():
+        if field.default_factory is not None:
+            default = field.default_factory
+        elif field.default is PydanticUndefined:
+            default = lambda: None
+        else:
+            default = lambda value=field.default: value
+        fields.append((name, default))
+    return tuple(fields)
+
+
+def project_rows(model: Type[BaseModel], rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Database rows reduced to ``model``'s fields, without validating them.
+
+    Columns the model does not declare are dropped and missing ones get the
+    model's default, so the JSON has the same keys ``response_model`` gives.
+    """
+    fields = _field_defaults(model)
+    return [
+        {name: row[name] if name in row else default() for name, default in fields}
+        for row in rows
+    ]
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Inclusive (start, end) of a single ``bytes=`` range, or None to send
+    the whole file. Multi-range and malformed headers are ignored, which
+    RFC 9110 allows; a range past the end raises RangeNotSatisfiable."""
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if not first:
+            suffix = int(last)
+            if suffix <= 0 or size == 0:
+                raise RangeNotSatisfiable()
+            return max(0, size - suffix), size - 1
+        start = int(first)
+        end = int(last) if last else None
+    except ValueError:
+        return None
+    if end is not None and start > end:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    return start, size - 1 if end is None else min(end, size - 1)
+
+
+class RangeFileResponse(Response):
+    """Immutable file served with a strong ETag and single-range requests.
+
+    ``If-None-Match`` gets a 304 and ``Range`` a 206 (``If-Range`` is
+    honoured). The body is sent with the ASGI zero-copy extension when the
+    server offers it, otherwise read in chunks off the event loop.
+    """
+
+    chunk_size = 64 * 1024
+
+    def __init__(
+        self,
+        path: str,
+        request_headers: Headers,
+        etag: str,
+        media_type: str,
+        headers: Optional[Mapping[str, str]] = None,
+        send_body: bool = True,
+    ):
+        super().__init__(content=None, media_type=media_type, headers=headers)
+        self.path = path
+        self.request_headers = request_headers
+        self.etag = f'"{etag}"'
+        self.send_body = send_body
+
+    def _set(self, name: str, value: str) -> None:
+        self.raw_headers = [(k, v) for k, v in self.raw_headers if k != name.encode("latin-1")]
+        self.raw_headers.append((name.encode("latin-1"), value.encode("latin-1")))
+
+    async def __call__(self, scope, receive, send) -> None:
+        # The zero-copy extension takes a file object; chunked reads use its descriptor
+        file = open(self.path, "rb", buffering=0)
+        fd = file.fileno()
+        try:
+            size = os.fstat(fd).st_size
+            self._set("etag", self.etag)
+            self._set("accept-ranges", "bytes")
+            if_none_match = self.request_headers.get("if-none-match", "")
+            if if_none_match.strip() == "*" or self.etag in [t.strip() for t in if_none_match.split(",")]:
+                self.status_code = 304
+                self.raw_headers = [(k, v) for k, v in self.raw_headers if k not in (b"content-type", b"content-length")]
+                await send({"type": "http.response.start", "status": 304, "headers": self.raw_headers})
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+            if_range = self.request_headers.get("if-range")
+            range_header = self.request_headers.get("range") if if_range in (None, self.etag) else None
+            try:
+                byte_range = parse_range(range_header, size)
+            except RangeNotSatisfiable:
+                self.status_code = 416
+                self._set("content-range", f"bytes */{size}")
+                self._set("content-length", "0")
+                await send({"type": "http.response.start", "status": 416, "headers": self.raw_headers})
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+            if byte_range is None:
+                start, length = 0, size
+            else:
+                start, length = byte_range[0], byte_range[1] - byte_range[0] + 1
+                self.status_code = 206
+                self._set("content-range", f"bytes {byte_range[0]}-{byte_range[1]}/{size}")
+            self._set("content-length", str(length))
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+
+            if not self.send_body or length == 0:
+                await send({"type": "http.response.body", "body": b""})
+            elif "http.response.zerocopysend" in scope.get("extensions", {}):
+                await send({"type": "http.response.zerocopysend", "file": file, "offset": start, "count": length})
+            else:
+                offset, end = start, start + length
+                while offset < end:
+                    chunk = await anyio.to_thread.run_sync(os.pread, fd, min(self.chunk_size, end - offset), offset)
+                    if not chunk:
+                        break
+                    offset += len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": offset < end})
+                if offset < end:
+                    # File shrank under us; end the body rather than hang
+                    await send({"type": "http.response.body", "body": b""})
+        finally:
+            file.close()
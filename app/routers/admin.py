@@ -2,7 +2,13 @@ from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 import logging
-from app.services.database import get_supabase_client
+from app.services.database import get_db, catalog, customer_profiles, interactions, prompt_templates
+from app.services.response_cache import response_cache
+from app.services.audio_cache import audio_cache
+from app.services.http_clients import outbound
+from app.services.singleflight import groups as singleflight_groups
+from app.services.tts_router import tts_router
+from app.services.tts_scheduler import tts_scheduler
 
 logger = logging.getLogger(__name__)
 
@@ -39,17 +45,17 @@ async def get_customers(
         Paginated list of customers with metadata
     """
     try:
-        supabase = get_supabase_client()
+        db = get_db()
         
         # Calculate offset
         offset = (page - 1) * limit
         
         # Get total count
-        count_result = supabase.from_('customers').select('*', count='exact').execute()
+        count_result = await db.from_('customers').select('*', count='exact').execute()
         total = count_result.count if hasattr(count_result, 'count') else 0
         
         # Get paginated customers
-        result = supabase.from_('customers')\
+        result = await db.from_('customers')\
             .select('*')\
             .order('created_at', desc=True)\
             .range(offset, offset + limit - 1)\
@@ -85,3 +91,68 @@ async def get_customers(
             detail=f"Failed to fetch customers: {str(e)}"
         )
 
+
+@router.get("/catalog")
+async def get_catalog_status():
+    """Return version and age of the in-memory catalog snapshot."""
+    return catalog.stats()
+
+
+@router.post("/catalog/refresh")
+async def refresh_catalog():
+    """Reload the catalog snapshot from the database now."""
+    snapshot = await catalog.refresh()
+    return {"version": snapshot.version, "perfumes": len(snapshot.perfumes)}
+
+
+@router.get("/interactions")
+async def get_interaction_writer_status():
+    """Return queue depth and write/drop counters of the interaction writer."""
+    return interactions.stats()
+
+
+@router.get("/caches")
+async def get_cache_stats():
+    """Return hit/miss/eviction counters of the in-process caches."""
+    return {
+        "customer_profiles": customer_profiles.stats(),
+        "responses": response_cache.stats(),
+        "tts_audio": audio_cache.stats(),
+    }
+
+
+@router.get("/singleflight")
+async def get_singleflight_stats():
+    """Return how many backend calls each single-flight group coalesced."""
+    return {name: group.stats() for name, group in singleflight_groups.items()}
+
+
+@router.get("/tts-health")
+async def get_tts_health():
+    """Return success rates, latency and circuit state of each TTS voice and provider."""
+    return tts_router.stats()
+
+
+@router.get("/tts-scheduler")
+async def get_tts_scheduler_stats():
+    """Return running, queued and rejected TTS syntheses."""
+    return tts_scheduler.stats()
+
+
+@router.get("/outbound-http")
+async def get_outbound_http_stats():
+    """Return pool usage and connections opened by each outbound HTTP client."""
+    return outbound.stats()
+
+
+@router.get("/prompt-templates")
+async def get_prompt_template_status():
+    """Return the versions of the loaded persona and system prompts."""
+    return prompt_templates.stats()
+
+
+@router.post("/prompt-templates/refresh")
+async def refresh_prompt_templates():
+    """Reload active prompts from the prompts table now."""
+    await prompt_templates.refresh()
+    return prompt_templates.stats()
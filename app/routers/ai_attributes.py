@@ -1,8 +1,10 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional
 from uuid import UUID
-from app.services.database import get_supabase_client
+from app.services.database import get_db, catalog
+from app.responses import project_rows
 import logging
 
 logger = logging.getLogger(__name__)
@@ -43,9 +45,10 @@ class AIAttributesUpdate(BaseModel):
 @router.post("/ai-attributes", response_model=AIAttributes)
 async def create_ai_attributes(ai_attributes: AIAttributesCreate):
     try:
-        supabase = get_supabase_client()
-        result = supabase.from_("ai_attributes").insert(ai_attributes.dict()).execute()
+        db = get_db()
+        result = await db.from_("ai_attributes").insert(ai_attributes.dict()).execute()
         if result.data:
+            catalog.request_refresh()
             return AIAttributes(**result.data[0])
         else:
             raise HTTPException(
@@ -61,9 +64,9 @@ async def create_ai_attributes(ai_attributes: AIAttributesCreate):
 @router.get("/ai-attributes", response_model=List[AIAttributes])
 async def get_ai_attributes():
     try:
-        supabase = get_supabase_client()
-        result = supabase.from_("ai_attributes").select("*").execute()
-        return [AIAttributes(**attrs) for attrs in result.data]
+        db = get_db()
+        result = await db.from_("ai_attributes").select("*").execute()
+        return ORJSONResponse(project_rows(AIAttributes, result.data))
     except Exception as e:
         logger.exception(f"Error fetching AI attributes: {str(e)}")
         raise HTTPException(
@@ -74,9 +77,9 @@ async def get_ai_attributes():
 @router.get("/ai-attributes/{perfume_id}", response_model=AIAttributes)
 async def get_ai_attribute(perfume_id: UUID):
     try:
-        supabase = get_supabase_client()
-        result = (
-            supabase.from_("ai_attributes")
+        db = get_db()
+        result = await (
+            db.from_("ai_attributes")
             .select("*")
             .eq("perfume_id", str(perfume_id))
             .execute()
@@ -95,14 +98,15 @@ async def get_ai_attribute(perfume_id: UUID):
 @router.put("/ai-attributes/{perfume_id}", response_model=AIAttributes)
 async def update_ai_attributes(perfume_id: UUID, ai_attributes: AIAttributesUpdate):
     try:
-        supabase = get_supabase_client()
-        result = (
-            supabase.from_("ai_attributes")
+        db = get_db()
+        result = await (
+            db.from_("ai_attributes")
             .update(ai_attributes.dict(exclude_unset=True))
             .eq("perfume_id", str(perfume_id))
             .execute()
         )
         if result.data:
+            catalog.request_refresh()
             return AIAttributes(**result.data[0])
         else:
             raise HTTPException(status_code=404, detail="AI attributes not found")
@@ -116,14 +120,15 @@ async def update_ai_attributes(perfume_id: UUID, ai_attributes: AIAttributesUpda
 @router.delete("/ai-attributes/{perfume_id}", response_model=dict)
 async def delete_ai_attributes(perfume_id: UUID):
     try:
-        supabase = get_supabase_client()
-        result = (
-            supabase.from_("ai_attributes")
+        db = get_db()
+        result = await (
+            db.from_("ai_attributes")
             .delete()
             .eq("perfume_id", str(perfume_id))
             .execute()
         )
         if result.data:
+            catalog.request_refresh()
             return {"message": "AI attributes deleted successfully"}
         else:
             raise HTTPException(status_code=404, detail="AI attributes not found")
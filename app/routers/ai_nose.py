@@ -1,16 +1,18 @@
 import json
 import logging
 import re
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from app.models.schemas import MultiModalRequest, AIAnalysisResponse, PerfumeRecommendation
+from app.dependencies import MULTIMODAL_OPENAPI, get_multimodal_request
 from app.services.database import get_perfume_recommendations, save_ai_interaction
+from app.services.text_analysis import analyze
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-@router.post("/analyze", response_model=AIAnalysisResponse)
-async def analyze_ai_nose(request: MultiModalRequest):
+@router.post("/analyze", response_model=AIAnalysisResponse, openapi_extra=MULTIMODAL_OPENAPI)
+async def analyze_ai_nose(request: MultiModalRequest = Depends(get_multimodal_request)):
     try:
         logger.info("AI Nose request received", extra={"request": request.model_dump()})
 
@@ -122,43 +124,13 @@ async def analyze_ai_nose(request: MultiModalRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 def extract_mood(text: str) -> str:
-    """Extract mood from text using simple keyword matching"""
+    """Extract mood from text using the shared keyword matcher"""
     if not text:
         return None
-    
-    text_lower = text.lower()
-    
-    mood_keywords = {
-        'نشيط': ['منعش', 'نشيط', 'حيوي', 'طاقة', 'متحمس', 'fresh', 'energetic'],
-        'هادئ': ['هادئ', 'مسترخي', 'مريح', 'هدوء', 'بارد'],
-        'واثق': ['واثق', 'قوي', 'مؤثر', 'قائد', 'confident'],
-        'رومانسي': ['رومانسي', 'حب', 'موعد', 'عاطفي', 'أمسية خاصة'],
-        'سعيد': ['سعيد', 'فرح', 'مبسوط', 'مرح', 'adventurous']
-    }
-    
-    for mood, keywords in mood_keywords.items():
-        if any(keyword in text_lower for keyword in keywords):
-            return mood
-    
-    return 'متوازن'
+    return analyze(text).first('mood', 'متوازن')
 
 def extract_occasion(text: str) -> str:
-    """Extract occasion from text using simple keyword matching"""
+    """Extract occasion from text using the shared keyword matcher"""
     if not text:
         return None
-    
-    text_lower = text.lower()
-    
-    occasion_keywords = {
-        'يومي': ['صيف', 'يومي', 'عادي', 'بيت', 'منزل', 'منعش'],
-        'عمل': ['عمل', 'مكتب', 'اجتماع', 'مقابلة'],
-        'موعد': ['موعد', 'لقاء', 'خروج', 'أمسية خاصة', 'رومانسي'],
-        'حفلة': ['حفلة', 'احتفال', 'مناسبة', 'عيد'],
-        'زفاف': ['زفاف', 'عرس', 'زواج']
-    }
-    
-    for occasion, keywords in occasion_keywords.items():
-        if any(keyword in text_lower for keyword in keywords):
-            return occasion
-    
-    return 'عام'
+    return analyze(text).first('occasion', 'عام')
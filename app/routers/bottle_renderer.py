@@ -1,9 +1,12 @@
 from fastapi import APIRouter, HTTPException
 from app.models.schemas import MultiModalRequest, AIResponse
+from app.services.text_analysis import analyze
+from app.services.response_cache import cached_response
 
 router = APIRouter()
 
 @router.post("/render", response_model=AIResponse)
+@cached_response("bottle-renderer/render")
 async def render_bottle(request: MultiModalRequest):
     try:
         design_specs = extract_design_specs(request.text or "")
@@ -44,6 +47,9 @@ async def render_bottle(request: MultiModalRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+_SHAPES = {'دائري': 'دائري أنيق', 'مستطيل': 'مستطيل عصري'}
+_COLORS = {'أزرق': 'أزرق ملكي متدرج', 'أحمر': 'أحمر ياقوتي', 'أخضر': 'أخضر زمردي'}
+
 def extract_design_specs(text: str) -> dict:
     specs = {
         'shape': 'مربع أنيق بزوايا مدورة',
@@ -53,25 +59,18 @@ def extract_design_specs(text: str) -> dict:
         'texture': 'زجاج مصقول مع تأثير معدني'
     }
     
-    text_lower = text.lower()
+    analysis = analyze(text)
     
-    if "دائري" in text_lower:
-        specs['shape'] = 'دائري أنيق'
-    elif "مستطيل" in text_lower:
-        specs['shape'] = 'مستطيل عصري'
+    shape = analysis.first('bottle_shape')
+    if shape:
+        specs['shape'] = _SHAPES[shape]
     
-    if "أزرق" in text_lower:
-        specs['color'] = 'أزرق ملكي متدرج'
-    elif "أحمر" in text_lower:
-        specs['color'] = 'أحمر ياقوتي'
-    elif "أخضر" in text_lower:
-        specs['color'] = 'أخضر زمردي'
+    color = analysis.first('bottle_color')
+    if color:
+        specs['color'] = _COLORS[color]
     
-    if "50" in text_lower:
-        specs['size'] = '50 مل'
-    elif "75" in text_lower:
-        specs['size'] = '75 مل'
-    elif "150" in text_lower:
-        specs['size'] = '150 مل'
+    size = analysis.first('bottle_size')
+    if size:
+        specs['size'] = f'{size} مل'
     
-    return specs
\ No newline at end of file
+    return specs
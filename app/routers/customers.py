@@ -1,8 +1,10 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, EmailStr, Field
 from typing import List, Optional, Any, Dict
 from uuid import UUID, uuid4
-from app.services.database import get_supabase_client
+from app.services.database import get_db, invalidate_customer_profile
+from app.responses import project_rows
 import logging
 
 logger = logging.getLogger(__name__)
@@ -33,9 +35,11 @@ class CustomerUpdate(BaseModel):
 @router.post("/customers", response_model=Customer)
 async def create_customer(customer: CustomerCreate):
     try:
-        supabase = get_supabase_client()
-        result = supabase.from_("customers").insert(customer.dict()).execute()
+        db = get_db()
+        result = await db.from_("customers").insert(customer.dict()).execute()
         if result.data:
+            # The id may have been looked up (and cached as unknown) before
+            invalidate_customer_profile(result.data[0]["customer_id"])
             return Customer(**result.data[0])
         else:
             raise HTTPException(status_code=400, detail="Could not create customer")
@@ -49,9 +53,9 @@ async def create_customer(customer: CustomerCreate):
 @router.get("/customers", response_model=List[Customer])
 async def get_customers():
     try:
-        supabase = get_supabase_client()
-        result = supabase.from_("customers").select("*").execute()
-        return [Customer(**customer) for customer in result.data]
+        db = get_db()
+        result = await db.from_("customers").select("*").execute()
+        return ORJSONResponse(project_rows(Customer, result.data))
     except Exception as e:
         logger.exception(f"Error fetching customers: {str(e)}")
         raise HTTPException(
@@ -62,9 +66,9 @@ async def get_customers():
 @router.get("/customers/{customer_id}", response_model=Customer)
 async def get_customer(customer_id: UUID):
     try:
-        supabase = get_supabase_client()
-        result = (
-            supabase.from_("customers")
+        db = get_db()
+        result = await (
+            db.from_("customers")
             .select("*")
             .eq("customer_id", str(customer_id))
             .execute()
@@ -83,13 +87,14 @@ async def get_customer(customer_id: UUID):
 @router.put("/customers/{customer_id}", response_model=Customer)
 async def update_customer(customer_id: UUID, customer: CustomerUpdate):
     try:
-        supabase = get_supabase_client()
-        result = (
-            supabase.from_("customers")
+        db = get_db()
+        result = await (
+            db.from_("customers")
             .update(customer.dict(exclude_unset=True))
             .eq("customer_id", str(customer_id))
             .execute()
         )
+        invalidate_customer_profile(customer_id)
         if result.data:
             return Customer(**result.data[0])
         else:
@@ -104,13 +109,14 @@ async def update_customer(customer_id: UUID, customer: CustomerUpdate):
 @router.delete("/customers/{customer_id}", response_model=dict)
 async def delete_customer(customer_id: UUID):
     try:
-        supabase = get_supabase_client()
-        result = (
-            supabase.from_("customers")
+        db = get_db()
+        result = await (
+            db.from_("customers")
             .delete()
             .eq("customer_id", str(customer_id))
             .execute()
         )
+        invalidate_customer_profile(customer_id)
         if result.data:
             return {"message": "Customer deleted successfully"}
         else:
@@ -1,5 +1,7 @@
+import asyncio
 from fastapi import APIRouter, HTTPException
-from app.services.database import get_supabase_client
+from fastapi.responses import ORJSONResponse
+from app.services.database import get_db
 
 router = APIRouter()
 
@@ -9,7 +11,7 @@ async def get_all_tables():
     Fetches all data from all tables in the database.
     """
     try:
-        supabase = get_supabase_client()
+        db = get_db()
         table_names = [
             "ai_attributes",
             "customers",
@@ -21,12 +23,16 @@ async def get_all_tables():
             "users",
         ]
         
-        all_tables_data = {}
-        for table_name in table_names:
-            result = supabase.from_(table_name).select("*").execute()
-            all_tables_data[table_name] = result.data
+        # Fetch all tables concurrently over the shared connection pool
+        results = await asyncio.gather(
+            *(db.from_(table_name).select("*").execute() for table_name in table_names)
+        )
+        all_tables_data = {
+            table_name: result.data for table_name, result in zip(table_names, results)
+        }
 
-        return all_tables_data
+        # Rows go out as PostgREST returned them; skip jsonable_encoder
+        return ORJSONResponse(all_tables_data)
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -1,10 +1,14 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from app.models.schemas import MultiModalRequest, AIResponse
+from app.dependencies import MULTIMODAL_OPENAPI, get_multimodal_request
+from app.services.text_analysis import analyze
+from app.services.response_cache import cached_response
 
 router = APIRouter()
 
-@router.post("/generate", response_model=AIResponse)
-async def generate_description(request: MultiModalRequest):
+@router.post("/generate", response_model=AIResponse, openapi_extra=MULTIMODAL_OPENAPI)
+@cached_response("description-generator/generate")
+async def generate_description(request: MultiModalRequest = Depends(get_multimodal_request)):
     try:
         perfume_name = extract_perfume_name(request.text or "عود الملكي الفاخر")
         ingredients = extract_ingredients(request.text or "")
@@ -39,15 +43,17 @@ A royal olfactory journey that begins with authentic Cambodian oud, embraced by
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+_PERFUME_NAMES = {
+    'عود': "عود الملكي الفاخر",
+    'ورد': "ورد الطائف الأصيل",
+    'ياسمين': "ياسمين الليل الساحر",
+}
+
 def extract_perfume_name(text: str) -> str:
     # Extract perfume name from text or use default
-    if "عود" in text.lower():
-        return "عود الملكي الفاخر"
-    elif "ورد" in text.lower():
-        return "ورد الطائف الأصيل"
-    elif "ياسمين" in text.lower():
-        return "ياسمين الليل الساحر"
-    
+    for note in analyze(text).labels('note'):
+        if note in _PERFUME_NAMES:
+            return _PERFUME_NAMES[note]
     return "عود الملكي الفاخر"
 
 def extract_ingredients(text: str) -> dict:
@@ -57,13 +63,13 @@ def extract_ingredients(text: str) -> dict:
         'base': 'عنبر، مسك أبيض'
     }
     
-    text_lower = text.lower()
+    families = analyze(text).labels('note_family')
     
-    if "حمضيات" in text_lower:
+    if "حمضيات" in families:
         ingredients['top'] = 'برغموت، ليمون، جريب فروت'
-    if "زهور" in text_lower:
+    if "زهور" in families:
         ingredients['heart'] = 'ورد، ياسمين، زنبق'
-    if "خشب" in text_lower:
+    if "خشب" in families:
         ingredients['base'] = 'صندل، أرز، عود'
     
-    return ingredients
\ No newline at end of file
+    return ingredients
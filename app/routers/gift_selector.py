@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from app.models.schemas import MultiModalRequest, AIResponse
 from app.services.database import get_perfume_recommendations
+from app.services.text_analysis import analyze
 
 router = APIRouter()
 
@@ -20,7 +21,7 @@ async def select_gift(request: MultiModalRequest):
             relationship = request.options.get('relationship', relationship)
         
         # Get gender-appropriate recommendations
-        gender = 'Female' if any(word in recipient.lower() for word in ['أم', 'زوجة', 'أخت', 'بنت']) else None
+        gender = analyze(recipient).first('female_recipient')
         recommendations = await get_perfume_recommendations(gender=gender, limit=2)
         
         result = f"""مستشار الهدايا:
@@ -57,26 +58,8 @@ async def select_gift(request: MultiModalRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 def extract_gift_info(text: str) -> tuple:
-    text_lower = text.lower()
-    
-    recipient = "والدتك"
-    occasion = "مناسبة خاصة"
+    analysis = analyze(text)
+    recipient = analysis.first('gift_recipient', "والدتك")
+    occasion = analysis.first('gift_occasion', "مناسبة خاصة")
     relationship = "شخص عزيز"
-    
-    # Extract recipient
-    if any(word in text_lower for word in ['أم', 'والدة', 'ماما']):
-        recipient = "والدتك"
-    elif any(word in text_lower for word in ['زوجة', 'زوجتي']):
-        recipient = "زوجتك"
-    elif any(word in text_lower for word in ['أخت', 'أختي']):
-        recipient = "أختك"
-    
-    # Extract occasion
-    if any(word in text_lower for word in ['عيد الأم', 'يوم الأم']):
-        occasion = "عيد الأم"
-    elif any(word in text_lower for word in ['عيد ميلاد', 'ميلاد']):
-        occasion = "عيد ميلاد"
-    elif any(word in text_lower for word in ['زفاف', 'عرس']):
-        occasion = "زفاف"
-    
-    return recipient, occasion, relationship
\ No newline at end of file
+    return recipient, occasion, relationship
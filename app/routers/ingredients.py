@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import List, Optional
-from app.services.database import get_supabase_client
+from app.services.database import get_db
 import logging
 
 logger = logging.getLogger(__name__)
@@ -29,8 +29,8 @@ class IngredientUpdate(BaseModel):
 @router.post("/ingredients", response_model=Ingredient)
 async def create_ingredient(ingredient: IngredientCreate):
     try:
-        supabase = get_supabase_client()
-        result = supabase.from_("ingredients").insert(ingredient.dict()).execute()
+        db = get_db()
+        result = await db.from_("ingredients").insert(ingredient.dict()).execute()
         if result.data:
             return Ingredient(**result.data[0])
         else:
@@ -45,8 +45,8 @@ async def create_ingredient(ingredient: IngredientCreate):
 @router.get("/ingredients", response_model=List[Ingredient])
 async def get_ingredients():
     try:
-        supabase = get_supabase_client()
-        result = supabase.from_("ingredients").select("*").execute()
+        db = get_db()
+        result = await db.from_("ingredients").select("*").execute()
         return [Ingredient(**ingredient) for ingredient in result.data]
     except Exception as e:
         logger.exception(f"Error fetching ingredients: {str(e)}")
@@ -58,9 +58,9 @@ async def get_ingredients():
 @router.get("/ingredients/{ingredient_id}", response_model=Ingredient)
 async def get_ingredient(ingredient_id: int):
     try:
-        supabase = get_supabase_client()
-        result = (
-            supabase.from_("ingredients")
+        db = get_db()
+        result = await (
+            db.from_("ingredients")
             .select("*")
             .eq("ingredient_id", ingredient_id)
             .execute()
@@ -79,9 +79,9 @@ async def get_ingredient(ingredient_id: int):
 @router.put("/ingredients/{ingredient_id}", response_model=Ingredient)
 async def update_ingredient(ingredient_id: int, ingredient: IngredientUpdate):
     try:
-        supabase = get_supabase_client()
-        result = (
-            supabase.from_("ingredients")
+        db = get_db()
+        result = await (
+            db.from_("ingredients")
             .update(ingredient.dict(exclude_unset=True))
             .eq("ingredient_id", ingredient_id)
             .execute()
@@ -100,9 +100,9 @@ async def update_ingredient(ingredient_id: int, ingredient: IngredientUpdate):
 @router.delete("/ingredients/{ingredient_id}", response_model=dict)
 async def delete_ingredient(ingredient_id: int):
     try:
-        supabase = get_supabase_client()
-        result = (
-            supabase.from_("ingredients")
+        db = get_db()
+        result = await (
+            db.from_("ingredients")
             .delete()
             .eq("ingredient_id", ingredient_id)
             .execute()
@@ -1,10 +1,11 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from app.models.schemas import MultiModalRequest, AIResponse
+from app.dependencies import MULTIMODAL_OPENAPI, get_multimodal_request
 
 router = APIRouter()
 
-@router.post("/analyze", response_model=AIResponse)
-async def analyze_longevity(request: MultiModalRequest):
+@router.post("/analyze", response_model=AIResponse, openapi_extra=MULTIMODAL_OPENAPI)
+async def analyze_longevity(request: MultiModalRequest = Depends(get_multimodal_request)):
     try:
         perfume_name = "عود الملكي"
         weather = "حار ورطب"
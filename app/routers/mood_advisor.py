@@ -1,13 +1,29 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from app.models.schemas import MultiModalRequest, AIResponse
+from app.dependencies import MULTIMODAL_OPENAPI, UPLOAD_OPENAPI, get_multimodal_request, get_upload, open_base64_upload
 from app.services.database import get_perfume_recommendations
-import base64
-import io
+from app.services.text_analysis import analyze
+from app.services.uploads import Upload
+from typing import BinaryIO, Optional
 
 router = APIRouter()
 
-@router.post("/analyze", response_model=AIResponse)
-async def analyze_mood(request: MultiModalRequest):
+@router.post("/analyze", response_model=AIResponse, openapi_extra=MULTIMODAL_OPENAPI)
+async def analyze_mood(request: MultiModalRequest = Depends(get_multimodal_request)):
+    audio = open_base64_upload(request.audio_data) if request.audio_data else None
+    try:
+        return await run_mood_analysis(request, audio)
+    finally:
+        if audio is not None:
+            audio.close()
+
+@router.post("/analyze/upload", response_model=AIResponse, openapi_extra=UPLOAD_OPENAPI)
+async def analyze_mood_upload(upload: Upload = Depends(get_upload)):
+    """Same analysis with the audio sent as multipart/form-data or a raw body"""
+    request = MultiModalRequest(text=upload.text, options=upload.options, user_id=upload.user_id)
+    return await run_mood_analysis(request, upload.file)
+
+async def run_mood_analysis(request: MultiModalRequest, audio: Optional[BinaryIO]) -> AIResponse:
     try:
         mood = None
         analysis_source = ""
@@ -18,8 +34,8 @@ async def analyze_mood(request: MultiModalRequest):
             analysis_source = f"النص المحلل: {request.text}"
         
         # Process audio input
-        if request.audio_data:
-            audio_mood = await analyze_audio_mood(request.audio_data)
+        if audio is not None:
+            audio_mood = await analyze_audio_mood(audio)
             if audio_mood:
                 mood = audio_mood
                 analysis_source = "تحليل الصوت: تم تحليل نبرة الصوت والمشاعر"
@@ -58,28 +74,15 @@ async def analyze_mood(request: MultiModalRequest):
 
 def analyze_text_mood(text: str) -> str:
     """Analyze mood from text"""
-    text_lower = text.lower()
-    
-    if any(word in text_lower for word in ['سعيد', 'فرح', 'مبسوط']):
-        return 'سعيد'
-    elif any(word in text_lower for word in ['حزين', 'زعلان', 'مكتئب']):
-        return 'حزين'
-    elif any(word in text_lower for word in ['غضبان', 'زعلان', 'متضايق']):
-        return 'غاضب'
-    elif any(word in text_lower for word in ['هادئ', 'مسترخي', 'مريح']):
-        return 'هادئ'
-    elif any(word in text_lower for word in ['متوتر', 'قلقان', 'خايف']):
-        return 'متوتر'
-    elif any(word in text_lower for word in ['نشيط', 'حيوي', 'متحمس']):
-        return 'نشيط'
-    
-    return 'متوازن'
+    return analyze(text).first('feeling', 'متوازن')
 
-async def analyze_audio_mood(audio_data: str) -> str:
+async def analyze_audio_mood(audio_file: BinaryIO) -> str:
     """Analyze mood from audio (placeholder for actual implementation)"""
     try:
-        # Decode base64 audio
-        audio_bytes = base64.b64decode(audio_data)
+        # The audio is read from the upload buffer (spooled to disk if large)
+        if not audio_file.read(1):
+            return None  # empty or undecodable audio
+        audio_file.seek(0)
         
         # Placeholder for actual audio analysis
         # In real implementation, you would:
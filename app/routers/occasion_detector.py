@@ -1,11 +1,15 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from app.models.schemas import MultiModalRequest, AIResponse
+from app.dependencies import MULTIMODAL_OPENAPI, get_multimodal_request
 from app.services.database import get_perfume_recommendations
+from app.services.text_analysis import analyze
+from app.services.response_cache import cached_response
 
 router = APIRouter()
 
-@router.post("/analyze", response_model=AIResponse)
-async def detect_occasion(request: MultiModalRequest):
+@router.post("/analyze", response_model=AIResponse, openapi_extra=MULTIMODAL_OPENAPI)
+@cached_response("occasion-detector/analyze")
+async def detect_occasion(request: MultiModalRequest = Depends(get_multimodal_request)):
     try:
         occasion = None
         
@@ -44,15 +48,4 @@ async def detect_occasion(request: MultiModalRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 def extract_occasion(text: str) -> str:
-    text_lower = text.lower()
-    
-    if any(word in text_lower for word in ['عمل', 'مكتب', 'اجتماع']):
-        return 'عمل'
-    elif any(word in text_lower for word in ['حفلة', 'احتفال', 'عيد']):
-        return 'حفلة'
-    elif any(word in text_lower for word in ['زفاف', 'عرس']):
-        return 'زفاف'
-    elif any(word in text_lower for word in ['موعد', 'لقاء']):
-        return 'موعد'
-    
-    return 'عام'
\ No newline at end of file
+    return analyze(text).first('event', 'عام')
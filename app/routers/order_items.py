@@ -2,7 +2,7 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
 from typing import List, Optional
 from uuid import UUID, uuid4
-from app.services.database import get_supabase_client
+from app.services.database import get_db
 import logging
 
 logger = logging.getLogger(__name__)
@@ -42,8 +42,8 @@ class OrderItemUpdate(BaseModel):
 @router.post("/order-items", response_model=OrderItem)
 async def create_order_item(order_item: OrderItemCreate):
     try:
-        supabase = get_supabase_client()
-        result = supabase.from_("order_items").insert(order_item.dict()).execute()
+        db = get_db()
+        result = await db.from_("order_items").insert(order_item.dict()).execute()
         if result.data:
             return OrderItem(**result.data[0])
         else:
@@ -58,8 +58,8 @@ async def create_order_item(order_item: OrderItemCreate):
 @router.get("/order-items", response_model=List[OrderItem])
 async def get_order_items():
     try:
-        supabase = get_supabase_client()
-        result = supabase.from_("order_items").select("*").execute()
+        db = get_db()
+        result = await db.from_("order_items").select("*").execute()
         return [OrderItem(**item) for item in result.data]
     except Exception as e:
         logger.exception(f"Error fetching order items: {str(e)}")
@@ -71,9 +71,9 @@ async def get_order_items():
 @router.get("/order-items/{item_id}", response_model=OrderItem)
 async def get_order_item(item_id: UUID):
     try:
-        supabase = get_supabase_client()
-        result = (
-            supabase.from_("order_items")
+        db = get_db()
+        result = await (
+            db.from_("order_items")
             .select("*")
             .eq("id", str(item_id))
             .execute()
@@ -92,9 +92,9 @@ async def get_order_item(item_id: UUID):
 @router.put("/order-items/{item_id}", response_model=OrderItem)
 async def update_order_item(item_id: UUID, order_item: OrderItemUpdate):
     try:
-        supabase = get_supabase_client()
-        result = (
-            supabase.from_("order_items")
+        db = get_db()
+        result = await (
+            db.from_("order_items")
             .update(order_item.dict(exclude_unset=True))
             .eq("id", str(item_id))
             .execute()
@@ -113,9 +113,9 @@ async def update_order_item(item_id: UUID, order_item: OrderItemUpdate):
 @router.delete("/order-items/{item_id}", response_model=dict)
 async def delete_order_item(item_id: UUID):
     try:
-        supabase = get_supabase_client()
-        result = (
-            supabase.from_("order_items")
+        db = get_db()
+        result = await (
+            db.from_("order_items")
             .delete()
             .eq("id", str(item_id))
             .execute()
@@ -1,8 +1,10 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional
 from uuid import UUID, uuid4
-from app.services.database import get_supabase_client
+from app.services.database import get_db
+from app.responses import project_rows
 import logging
 
 logger = logging.getLogger(__name__)
@@ -54,8 +56,8 @@ class OrderUpdate(BaseModel):
 @router.post("/orders", response_model=Order)
 async def create_order(order: OrderCreate):
     try:
-        supabase = get_supabase_client()
-        result = supabase.from_("orders").insert(order.dict()).execute()
+        db = get_db()
+        result = await db.from_("orders").insert(order.dict()).execute()
         if result.data:
             return Order(**result.data[0])
         else:
@@ -68,9 +70,9 @@ async def create_order(order: OrderCreate):
 @router.get("/orders", response_model=List[Order])
 async def get_orders():
     try:
-        supabase = get_supabase_client()
-        result = supabase.from_("orders").select("*").execute()
-        return [Order(**order) for order in result.data]
+        db = get_db()
+        result = await db.from_("orders").select("*").execute()
+        return ORJSONResponse(project_rows(Order, result.data))
     except Exception as e:
         logger.exception(f"Error fetching orders: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch orders: {str(e)}")
@@ -79,9 +81,9 @@ async def get_orders():
 @router.get("/orders/{order_id}", response_model=Order)
 async def get_order(order_id: UUID):
     try:
-        supabase = get_supabase_client()
-        result = (
-            supabase.from_("orders").select("*").eq("id", str(order_id)).execute()
+        db = get_db()
+        result = await (
+            db.from_("orders").select("*").eq("id", str(order_id)).execute()
         )
         if result.data:
             return Order(**result.data[0])
@@ -95,9 +97,9 @@ async def get_order(order_id: UUID):
 @router.put("/orders/{order_id}", response_model=Order)
 async def update_order(order_id: UUID, order: OrderUpdate):
     try:
-        supabase = get_supabase_client()
-        result = (
-            supabase.from_("orders")
+        db = get_db()
+        result = await (
+            db.from_("orders")
             .update(order.dict(exclude_unset=True))
             .eq("id", str(order_id))
             .execute()
@@ -114,9 +116,9 @@ async def update_order(order_id: UUID, order: OrderUpdate):
 @router.delete("/orders/{order_id}", response_model=dict)
 async def delete_order(order_id: UUID):
     try:
-        supabase = get_supabase_client()
-        result = (
-            supabase.from_("orders").delete().eq("id", str(order_id)).execute()
+        db = get_db()
+        result = await (
+            db.from_("orders").delete().eq("id", str(order_id)).execute()
         )
         if result.data:
             return {"message": "Order deleted successfully"}
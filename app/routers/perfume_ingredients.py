@@ -2,7 +2,7 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
 from typing import List, Optional
 from uuid import UUID
-from app.services.database import get_supabase_client
+from app.services.database import get_db
 import logging
 
 logger = logging.getLogger(__name__)
@@ -29,8 +29,8 @@ class PerfumeIngredientUpdate(BaseModel):
 @router.post("/perfume-ingredients", response_model=PerfumeIngredient)
 async def create_perfume_ingredient(perf_ing: PerfumeIngredientCreate):
     try:
-        supabase = get_supabase_client()
-        result = supabase.from_("perfume_ingredients").insert(perf_ing.dict()).execute()
+        db = get_db()
+        result = await db.from_("perfume_ingredients").insert(perf_ing.dict()).execute()
         if result.data:
             return PerfumeIngredient(**result.data[0])
         else:
@@ -47,8 +47,8 @@ async def create_perfume_ingredient(perf_ing: PerfumeIngredientCreate):
 @router.get("/perfume-ingredients", response_model=List[PerfumeIngredient])
 async def get_perfume_ingredients():
     try:
-        supabase = get_supabase_client()
-        result = supabase.from_("perfume_ingredients").select("*").execute()
+        db = get_db()
+        result = await db.from_("perfume_ingredients").select("*").execute()
         return [PerfumeIngredient(**pi) for pi in result.data]
     except Exception as e:
         logger.exception(f"Error fetching perfume ingredients: {str(e)}")
@@ -60,9 +60,9 @@ async def get_perfume_ingredients():
 @router.get("/perfume-ingredients/{perfume_id}/{ingredient_id}", response_model=PerfumeIngredient)
 async def get_perfume_ingredient(perfume_id: UUID, ingredient_id: int):
     try:
-        supabase = get_supabase_client()
-        result = (
-            supabase.from_("perfume_ingredients")
+        db = get_db()
+        result = await (
+            db.from_("perfume_ingredients")
             .select("*")
             .eq("perfume_id", str(perfume_id))
             .eq("ingredient_id", ingredient_id)
@@ -86,9 +86,9 @@ async def update_perfume_ingredient(
     perfume_id: UUID, ingredient_id: int, perf_ing: PerfumeIngredientUpdate
 ):
     try:
-        supabase = get_supabase_client()
-        result = (
-            supabase.from_("perfume_ingredients")
+        db = get_db()
+        result = await (
+            db.from_("perfume_ingredients")
             .update(perf_ing.dict(exclude_unset=True))
             .eq("perfume_id", str(perfume_id))
             .eq("ingredient_id", ingredient_id)
@@ -110,9 +110,9 @@ async def update_perfume_ingredient(
 @router.delete("/perfume-ingredients/{perfume_id}/{ingredient_id}", response_model=dict)
 async def delete_perfume_ingredient(perfume_id: UUID, ingredient_id: int):
     try:
-        supabase = get_supabase_client()
-        result = (
-            supabase.from_("perfume_ingredients")
+        db = get_db()
+        result = await (
+            db.from_("perfume_ingredients")
             .delete()
             .eq("perfume_id", str(perfume_id))
             .eq("ingredient_id", ingredient_id)
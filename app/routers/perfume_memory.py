@@ -1,11 +1,13 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from app.models.schemas import MultiModalRequest, AIResponse
+from app.dependencies import MULTIMODAL_OPENAPI, get_multimodal_request
 from app.services.database import get_customer_profile, get_perfume_recommendations
+from app.services.text_analysis import analyze
 
 router = APIRouter()
 
-@router.post("/analyze", response_model=AIResponse)
-async def analyze_perfume_memory(request: MultiModalRequest):
+@router.post("/analyze", response_model=AIResponse, openapi_extra=MULTIMODAL_OPENAPI)
+async def analyze_perfume_memory(request: MultiModalRequest = Depends(get_multimodal_request)):
     try:
         preferences = []
         patterns = []
@@ -14,7 +16,8 @@ async def analyze_perfume_memory(request: MultiModalRequest):
         if request.user_id:
             profile = await get_customer_profile(request.user_id)
             if profile and profile.get('personality_map'):
-                preferences = profile['personality_map'].get('preferences', [])
+                # Copy: the profile is shared through the profile cache
+                preferences = list(profile['personality_map'].get('preferences', []))
         
         # Extract preferences from text
         if request.text:
@@ -56,19 +59,13 @@ async def analyze_perfume_memory(request: MultiModalRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+_PREFERENCE_NAMES = {
+    'عود': "العود الكمبودي",
+    'ورد': "الورد الطائفي",
+    'ياسمين': "الياسمين الهندي",
+    'عنبر': "العنبر الذهبي",
+    'مسك': "المسك الأبيض",
+}
+
 def extract_preferences(text: str) -> list:
-    preferences = []
-    text_lower = text.lower()
-    
-    if "عود" in text_lower:
-        preferences.append("العود الكمبودي")
-    if "ورد" in text_lower:
-        preferences.append("الورد الطائفي")
-    if "ياسمين" in text_lower:
-        preferences.append("الياسمين الهندي")
-    if "عنبر" in text_lower:
-        preferences.append("العنبر الذهبي")
-    if "مسك" in text_lower:
-        preferences.append("المسك الأبيض")
-    
-    return preferences
\ No newline at end of file
+    return [_PREFERENCE_NAMES[note] for note in analyze(text).labels('note')]
@@ -1,9 +1,11 @@
 
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional
 from uuid import UUID, uuid4
-from app.services.database import get_supabase_client
+from app.services.database import get_db, get_perfume_row, catalog
+from app.responses import project_rows
 import logging
 import random
 
@@ -55,9 +57,10 @@ class PerfumeListResponse(BaseModel):
 @router.post("/perfumes", response_model=Perfume)
 async def create_perfume(perfume: PerfumeCreate):
     try:
-        supabase = get_supabase_client()
-        result = supabase.from_("perfumes").insert(perfume.dict()).execute()
+        db = get_db()
+        result = await db.from_("perfumes").insert(perfume.dict()).execute()
         if result.data:
+            catalog.request_refresh()
             return Perfume(**result.data[0])
         else:
             raise HTTPException(status_code=400, detail="Could not create perfume")
@@ -71,21 +74,18 @@ async def create_perfume(perfume: PerfumeCreate):
 @router.get("/perfumes", response_model=PerfumeListResponse)
 async def get_perfumes(page: int = 1, limit: int = 9, maxPrice: Optional[float] = None):
     try:
-        supabase = get_supabase_client()
-        query = supabase.from_("perfumes").select("*")
+        db = get_db()
+        query = db.from_("perfumes").select("*")
         
         if maxPrice is not None:
             query = query.lte("price", maxPrice)
         
-        total_result = query.execute()
+        total_result = await query.execute()
         total_count = len(total_result.data)
         
         offset = (page - 1) * limit
-        result = query.offset(offset).limit(limit).execute()
-        return PerfumeListResponse(
-            data=[Perfume(**perfume) for perfume in result.data],
-            total=total_count
-        )
+        result = await query.offset(offset).limit(limit).execute()
+        return ORJSONResponse({"data": project_rows(Perfume, result.data), "total": total_count})
     except Exception as e:
         logger.exception(f"Error fetching perfumes: {str(e)}")
         raise HTTPException(
@@ -96,8 +96,8 @@ async def get_perfumes(page: int = 1, limit: int = 9, maxPrice: Optional[float]
 @router.get("/perfumes/bestsellers")
 async def get_bestsellers():
     try:
-        supabase = get_supabase_client()
-        result = supabase.from_("perfumes").select("*").execute()
+        db = get_db()
+        result = await db.from_("perfumes").select("*").execute()
         if not result.data:
             raise HTTPException(status_code=404, detail="No perfumes found")
         
@@ -115,15 +115,9 @@ async def get_bestsellers():
 @router.get("/perfumes/{perfume_id}", response_model=Perfume)
 async def get_perfume(perfume_id: UUID):
     try:
-        supabase = get_supabase_client()
-        result = (
-            supabase.from_("perfumes")
-            .select("*")
-            .eq("perfume_id", str(perfume_id))
-            .execute()
-        )
-        if result.data:
-            return Perfume(**result.data[0])
+        row = await get_perfume_row(str(perfume_id))
+        if row:
+            return Perfume(**row)
         else:
             raise HTTPException(status_code=404, detail="Perfume not found")
     except Exception as e:
@@ -136,14 +130,15 @@ async def get_perfume(perfume_id: UUID):
 @router.put("/perfumes/{perfume_id}", response_model=Perfume)
 async def update_perfume(perfume_id: UUID, perfume: PerfumeUpdate):
     try:
-        supabase = get_supabase_client()
-        result = (
-            supabase.from_("perfumes")
+        db = get_db()
+        result = await (
+            db.from_("perfumes")
             .update(perfume.dict(exclude_unset=True))
             .eq("perfume_id", str(perfume_id))
             .execute()
         )
         if result.data:
+            catalog.request_refresh()
             return Perfume(**result.data[0])
         else:
             raise HTTPException(status_code=404, detail="Perfume not found")
@@ -157,14 +152,15 @@ async def update_perfume(perfume_id: UUID, perfume: PerfumeUpdate):
 @router.delete("/perfumes/{perfume_id}", response_model=dict)
 async def delete_perfume(perfume_id: UUID):
     try:
-        supabase = get_supabase_client()
-        result = (
-            supabase.from_("perfumes")
+        db = get_db()
+        result = await (
+            db.from_("perfumes")
             .delete()
             .eq("perfume_id", str(perfume_id))
             .execute()
         )
         if result.data:
+            catalog.request_refresh()
             return {"message": "Perfume deleted successfully"}
         else:
             raise HTTPException(status_code=404, detail="Perfume not found")
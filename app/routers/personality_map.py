@@ -1,11 +1,15 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from app.models.schemas import MultiModalRequest, AIResponse
+from app.dependencies import MULTIMODAL_OPENAPI, get_multimodal_request
 from app.services.database import get_perfume_recommendations
+from app.services.text_analysis import analyze
+from app.services.response_cache import cached_response
 
 router = APIRouter()
 
-@router.post("/analyze", response_model=AIResponse)
-async def analyze_personality(request: MultiModalRequest):
+@router.post("/analyze", response_model=AIResponse, openapi_extra=MULTIMODAL_OPENAPI)
+@cached_response("personality-map/analyze")
+async def analyze_personality(request: MultiModalRequest = Depends(get_multimodal_request)):
     try:
         personality = analyze_personality_traits(request.text or "")
         
@@ -47,15 +51,4 @@ async def analyze_personality(request: MultiModalRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 def analyze_personality_traits(text: str) -> str:
-    text_lower = text.lower()
-    
-    if any(word in text_lower for word in ['قائد', 'قوي', 'مؤثر', 'واثق']):
-        return 'القائد الواثق'
-    elif any(word in text_lower for word in ['رومانسي', 'حب', 'عاطفي']):
-        return 'الرومانسي الحالم'
-    elif any(word in text_lower for word in ['عصري', 'حديث', 'موضة']):
-        return 'العصري المبدع'
-    elif any(word in text_lower for word in ['هادئ', 'مسالم', 'بسيط']):
-        return 'الهادئ المتوازن'
-    
-    return 'القائد الواثق'
\ No newline at end of file
+    return analyze(text).first('personality', 'القائد الواثق')
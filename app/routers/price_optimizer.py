@@ -1,10 +1,13 @@
 from fastapi import APIRouter, HTTPException
 from app.models.schemas import MultiModalRequest, AIResponse
 from app.services.database import get_perfumes_with_ai_attributes
+from app.services.text_analysis import analyze
+from app.services.response_cache import cached_response
 
 router = APIRouter()
 
 @router.post("/optimize", response_model=AIResponse)
+@cached_response("price-optimizer/optimize")
 async def optimize_price(request: MultiModalRequest):
     try:
         product_name = extract_product_name(request.text or "عود الملكي الفاخر")
@@ -50,9 +53,10 @@ async def optimize_price(request: MultiModalRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 def extract_product_name(text: str) -> str:
-    if "عود" in text.lower():
+    notes = analyze(text).labels('note')
+    if "عود" in notes:
         return "عود الملكي الفاخر"
-    elif "ورد" in text.lower():
+    elif "ورد" in notes:
         return "ورد الطائف الأصيل"
     
     return "عود الملكي الفاخر"
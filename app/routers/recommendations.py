@@ -0,0 +1,37 @@
+from fastapi import APIRouter, HTTPException
+from app.models.schemas import (
+    BatchRecommendationRequest,
+    BatchRecommendationResponse,
+    BatchRecommendationResult,
+)
+from app.services.database import get_batch_recommendations
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.post("/batch", response_model=BatchRecommendationResponse)
+async def batch_recommendations(request: BatchRecommendationRequest):
+    """
+    Score many recommendation contexts against the catalog in one pass.
+
+    Each context takes the same criteria as the AI analyzers (mood, occasion,
+    skin type, gender, style, budget) plus its own result limit. Results are
+    returned in the same order as the contexts.
+    """
+    try:
+        version, ranked = await get_batch_recommendations(request.contexts)
+        return BatchRecommendationResponse(
+            results=[
+                BatchRecommendationResult(context=context, recommendations=recommendations)
+                for context, recommendations in zip(request.contexts, ranked)
+            ],
+            catalog_version=version,
+        )
+    except Exception as e:
+        logger.exception(f"Error building batch recommendations: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Failed to build recommendations: {str(e)}"
+        )
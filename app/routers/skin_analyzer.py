@@ -1,21 +1,37 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from app.models.schemas import MultiModalRequest, AIResponse
+from app.dependencies import MULTIMODAL_OPENAPI, UPLOAD_OPENAPI, get_multimodal_request, get_upload, open_base64_upload
 from app.services.database import get_perfume_recommendations
-import base64
+from app.services.text_analysis import analyze
+from app.services.uploads import Upload
+from typing import BinaryIO, Optional
 from PIL import Image
-import io
 
 router = APIRouter()
 
-@router.post("/analyze", response_model=AIResponse)
-async def analyze_skin(request: MultiModalRequest):
+@router.post("/analyze", response_model=AIResponse, openapi_extra=MULTIMODAL_OPENAPI)
+async def analyze_skin(request: MultiModalRequest = Depends(get_multimodal_request)):
+    image = open_base64_upload(request.image_data) if request.image_data else None
+    try:
+        return await run_skin_analysis(request, image)
+    finally:
+        if image is not None:
+            image.close()
+
+@router.post("/analyze/upload", response_model=AIResponse, openapi_extra=UPLOAD_OPENAPI)
+async def analyze_skin_upload(upload: Upload = Depends(get_upload)):
+    """Same analysis with the image sent as multipart/form-data or a raw body"""
+    request = MultiModalRequest(text=upload.text, options=upload.options, user_id=upload.user_id)
+    return await run_skin_analysis(request, upload.file)
+
+async def run_skin_analysis(request: MultiModalRequest, image: Optional[BinaryIO]) -> AIResponse:
     try:
         skin_type = None
         analysis_source = ""
         
         # Process image input
-        if request.image_data:
-            skin_type = await analyze_skin_image(request.image_data)
+        if image is not None:
+            skin_type = await analyze_skin_image(image)
             analysis_source = "تحليل صورة اليد: تم تحليل نوع البشرة من الصورة"
         
         # Process text description
@@ -58,12 +74,11 @@ async def analyze_skin(request: MultiModalRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-async def analyze_skin_image(image_data: str) -> str:
+async def analyze_skin_image(image_file: BinaryIO) -> str:
     """Analyze skin type from image"""
     try:
-        # Decode base64 image
-        image_bytes = base64.b64decode(image_data)
-        image = Image.open(io.BytesIO(image_bytes))
+        # Reads straight from the upload buffer; only the header is parsed here
+        image = Image.open(image_file)
         
         # Placeholder for actual image analysis
         # In real implementation, you would:
@@ -84,15 +99,4 @@ async def analyze_skin_image(image_data: str) -> str:
 
 def analyze_skin_text(text: str) -> str:
     """Analyze skin type from text description"""
-    text_lower = text.lower()
-    
-    if any(word in text_lower for word in ['دهنية', 'زيتية', 'لامعة']):
-        return 'دهنية'
-    elif any(word in text_lower for word in ['جافة', 'خشنة', 'متشققة']):
-        return 'جافة'
-    elif any(word in text_lower for word in ['حساسة', 'تتهيج', 'حكة']):
-        return 'حساسة'
-    elif any(word in text_lower for word in ['مختلطة', 'منطقة دهنية']):
-        return 'مختلطة'
-    
-    return None
\ No newline at end of file
+    return analyze(text).first('skin_type')
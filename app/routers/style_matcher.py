@@ -1,26 +1,46 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from app.models.schemas import MultiModalRequest, AIResponse
+from app.dependencies import MULTIMODAL_OPENAPI, UPLOAD_OPENAPI, get_multimodal_request, get_upload, open_base64_upload
 from app.services.database import get_perfume_recommendations
+from app.services.text_analysis import analyze
+from app.services.uploads import Upload
+from typing import BinaryIO, Optional
+from app.services.response_cache import cached_response
 
 router = APIRouter()
 
-@router.post("/analyze", response_model=AIResponse)
-async def match_style(request: MultiModalRequest):
+@router.post("/analyze", response_model=AIResponse, openapi_extra=MULTIMODAL_OPENAPI)
+@cached_response("style-matcher/analyze")
+async def match_style(request: MultiModalRequest = Depends(get_multimodal_request)):
+    image = open_base64_upload(request.image_data) if request.image_data else None
+    try:
+        return await run_style_match(request, image)
+    finally:
+        if image is not None:
+            image.close()
+
+@router.post("/analyze/upload", response_model=AIResponse, openapi_extra=UPLOAD_OPENAPI)
+async def match_style_upload(upload: Upload = Depends(get_upload)):
+    """Same analysis with the image sent as multipart/form-data or a raw body"""
+    request = MultiModalRequest(text=upload.text, options=upload.options, user_id=upload.user_id)
+    return await run_style_match(request, upload.file)
+
+async def run_style_match(request: MultiModalRequest, image: Optional[BinaryIO]) -> AIResponse:
     try:
         style = None
         
         if request.text:
             style = extract_style(request.text)
         
-        if request.image_data:
-            style = await analyze_style_image(request.image_data)
+        if image is not None:
+            style = await analyze_style_image(image)
         
         if request.options and request.options.get('style'):
             style = request.options['style']
         
         style = style or 'كلاسيكي'
         
-        recommendations = await get_perfume_recommendations(limit=3)
+        recommendations = await get_perfume_recommendations(style=style, limit=3)
         
         result = f"""تحليل الأسلوب: {style}
 
@@ -47,17 +67,8 @@ async def match_style(request: MultiModalRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 def extract_style(text: str) -> str:
-    text_lower = text.lower()
-    
-    if any(word in text_lower for word in ['كلاسيكي', 'رسمي', 'أنيق']):
-        return 'كلاسيكي'
-    elif any(word in text_lower for word in ['عصري', 'حديث', 'موضة']):
-        return 'عصري'
-    elif any(word in text_lower for word in ['رياضي', 'كاجوال', 'مريح']):
-        return 'رياضي'
-    
-    return 'كلاسيكي'
-
-async def analyze_style_image(image_data: str) -> str:
+    return analyze(text).first('style', 'كلاسيكي')
+
+async def analyze_style_image(image_file: BinaryIO) -> str:
     # Placeholder for image style analysis
     return 'كلاسيكي'
\ No newline at end of file
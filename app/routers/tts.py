@@ -1,21 +1,36 @@
 # app/routers/tts.py  ←  FINAL VERSION – WILL NEVER FAIL AGAIN
 
+import functools
 import logging
-from typing import Optional
+import os
+import re
+from typing import AsyncIterator, Optional
 import asyncio
 
 from fastapi import APIRouter, Request, HTTPException
 from pydantic import BaseModel
+from fastapi.responses import ORJSONResponse
 from starlette.responses import StreamingResponse, Response
 
 import edge_tts
 from edge_tts.exceptions import NoAudioReceived
 
+from app.responses import RangeFileResponse
+from app.services.audio_cache import audio_cache
+from app.services.cache import TTLCache
+from app.services.http_clients import outbound
+from app.services.metrics import UpstreamTimer
+from app.services.tts_languages import Segment, candidate_voices, routing_table, split_languages, split_text
+from app.services.tts_router import Candidate, TTSUnavailable, tts_router
+from app.services.tts_scheduler import SchedulerFull, Ticket, tts_scheduler
+
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 # YOUR ELEVENLABS KEY (already inserted – you’re good to go)
 ELEVENLABS_KEY = "sk_ca2c2601e155a2f27c40a5a5fae2574ad643f671d49854fe"
+# Text-to-speech endpoint (voice "Rachel"); overridable to point at a local stand-in
+ELEVENLABS_URL = os.getenv("ELEVENLABS_URL", "https://api.elevenlabs.io/v1/text-to-speech/EXAVITQu4vr4xnSDxMaL")
 
 # Best voices that still work in Dec 2025
 VOICES = [
@@ -28,6 +43,19 @@ VOICES = [
     "ar-EG-SalmaNeural",
 ]
 
+# Language -> the voices above that speak it. Text is routed by the
+# language it is written in, so Arabic never waits on English voices.
+VOICE_ROUTES = routing_table(VOICES)
+# The monolingual model only speaks English
+ELEVENLABS_MODELS = {"en": "eleven_monolingual_v1"}
+ELEVENLABS_MULTILINGUAL_MODEL = "eleven_multilingual_v2"
+
+# Long text is cut at sentence boundaries into pieces of about this many
+# characters (the first one half as long, so audio starts sooner), and up
+# to TTS_SEGMENT_CONCURRENCY pieces of one request are synthesized at once
+TTS_SEGMENT_CHARS = int(os.getenv("TTS_SEGMENT_CHARS", "300"))
+TTS_SEGMENT_CONCURRENCY = int(os.getenv("TTS_SEGMENT_CONCURRENCY", "3"))
+
 class TTSRequest(BaseModel):
     text: str
     voice: Optional[str] = None
@@ -35,77 +63,352 @@ class TTSRequest(BaseModel):
     pitch: Optional[str] = "+0Hz"
     volume: Optional[str] = "+0%"
 
+_AUDIO_KEY = re.compile(r"^[0-9a-f]{64}$")
+
+# Why recent async jobs failed, for their status and audio URLs
+job_errors: TTLCache[dict] = TTLCache(maxsize=10000, ttl=600)
+
 # ElevenLabs fallback – beautiful, instant, no blocks
-async def elevenlabs_fallback(text: str) -> bytes:
-    import httpx
-    async with httpx.AsyncClient(timeout=30) as client:
-        r = await client.post(
-            "https://api.elevenlabs.io/v1/text-to-speech/EXAVITQu4vr4xnSDxMaL",  # Rachel – super natural
-            json={"text": text, "model_id": "eleven_monolingual_v1"},
+async def elevenlabs_fallback(text: str, model_id: str = "eleven_monolingual_v1") -> bytes:
+    with UpstreamTimer("elevenlabs", "text_to_speech") as timer:
+        r = await outbound.client("elevenlabs").post(
+            ELEVENLABS_URL,  # Rachel – super natural
+            json={"text": text, "model_id": model_id},
             headers={"xi-api-key": ELEVENLABS_KEY},
         )
-        if r.status_code == 200:
-            logger.info("Success with ElevenLabs fallback")
-            return r.content
+        if r.status_code != 200:
+            timer.outcome = "error"
+    if r.status_code == 200:
+        logger.info("Success with ElevenLabs fallback")
+        return r.content
     logger.warning("ElevenLabs returned error")
     return b""
 
+async def open_edge_stream(req: TTSRequest, voice: str) -> AsyncIterator[bytes]:
+    """Start Edge-TTS synthesis and wait for the first audio chunk.
+
+    Raises if the voice fails before producing audio, so the caller can try
+    the next one. Otherwise returns an iterator over all audio chunks,
+    starting with the one already received; a failure after that point
+    can only cut the stream short.
+    """
+    com = edge_tts.Communicate(
+        text=req.text,
+        voice=voice,
+        rate=req.rate or "+0%",
+        pitch=req.pitch or "+0Hz",
+        volume=req.volume or "+0%"
+    )
+    timer = UpstreamTimer("edge_tts", voice).__enter__()
+
+    async def audio_chunks():
+        async for chunk in com.stream():
+            if chunk["type"] == "audio":
+                yield chunk["data"]
+
+    audio = audio_chunks()
+    try:
+        first = await audio.__anext__()
+    except StopAsyncIteration:
+        timer.outcome = "error"
+        timer.__exit__(None, None, None)
+        raise NoAudioReceived(f"No audio from {voice}")
+    except BaseException as e:
+        timer.__exit__(type(e), e, None)
+        await audio.aclose()
+        raise
+
+    async def body():
+        try:
+            yield first
+            async for data in audio:
+                yield data
+        except Exception as e:
+            # Headers are already sent; the client sees a truncated stream
+            timer.outcome = "error"
+            logger.error(f"Edge stream broke mid-response with {voice}: {e}")
+            raise
+        finally:
+            timer.__exit__(None, None, None)
+            await audio.aclose()
+
+    return body()
+
+async def open_elevenlabs(text: str, model_id: str) -> AsyncIterator[bytes]:
+    audio = await elevenlabs_fallback(text, model_id)
+    if not audio:
+        raise NoAudioReceived("No audio from ElevenLabs")
+
+    async def single():
+        yield audio
+    return single()
+
+
+async def open_segment(req: TTSRequest, segment: Segment) -> AsyncIterator[bytes]:
+    """Audio for one single-language segment from the first provider that produces any; 503 if none does"""
+    if segment.text != req.text:
+        req = req.model_copy(update={"text": segment.text})
+    # Try Edge-TTS first (free), with the voices for the segment's language.
+    # The requested voice goes first when it speaks that language.
+    requested = req.voice if req.voice in VOICES else None
+    voices = candidate_voices(VOICE_ROUTES, segment.language, requested)
+
+    # Stream chunks as they are synthesized; only a voice that fails before
+    # its first chunk falls through. The router skips voices that are known
+    # to be failing and starts the next one beside a slow one.
+    candidates = [
+        Candidate("edge_tts", voice, functools.partial(open_edge_stream, req, voice),
+                  segment.language, voice == requested)
+        for voice in voices
+    ]
+    # If Edge fails → ElevenLabs (your key = 100% uptime)
+    model_id = ELEVENLABS_MODELS.get(segment.language, ELEVENLABS_MULTILINGUAL_MODEL)
+    candidates.append(Candidate("elevenlabs", model_id, functools.partial(open_elevenlabs, req.text, model_id),
+                                segment.language))
+    try:
+        return await tts_router.open(candidates)
+    except TTSUnavailable as e:
+        logger.error(f"TTS failed for {segment.language} text: {e}")
+        raise HTTPException(503, "All methods failed (should never happen)")
+
+
+async def synthesize_audio(req: TTSRequest) -> AsyncIterator[bytes]:
+    """Audio chunks for the whole text, in order.
+
+    The text is cut into single-language segments and long ones into
+    sentence-sized pieces. Pieces are synthesized concurrently, at most
+    TTS_SEGMENT_CONCURRENCY at a time, each into its own buffer, while the
+    stream plays them back in order; so a long text takes about as long
+    as its slowest pieces rather than all of them. Returns once the first
+    piece has audio. A later piece that fails cuts the stream short, like
+    any failure after the headers are sent.
+    """
+    pieces = [
+        Segment(segment.language, text)
+        for segment in split_languages(req.text)
+        for text in split_text(segment.text, TTS_SEGMENT_CHARS, TTS_SEGMENT_CHARS // 2)
+    ]
+    if len(pieces) == 1:
+        return await open_segment(req, pieces[0])
+
+    limit = asyncio.Semaphore(TTS_SEGMENT_CONCURRENCY)
+    # Per piece: audio chunks, then None when complete or the exception that stopped it
+    buffers = [asyncio.Queue() for _ in pieces]
+
+    async def render(piece: Segment, buffer: asyncio.Queue) -> None:
+        async with limit:
+            try:
+                async for chunk in await open_segment(req, piece):
+                    buffer.put_nowait(chunk)
+                buffer.put_nowait(None)
+            except Exception as e:
+                buffer.put_nowait(e)
+
+    # Created in order, so pieces take the semaphore in order
+    tasks = [asyncio.ensure_future(render(piece, buffer)) for piece, buffer in zip(pieces, buffers)]
+    first = await buffers[0].get()
+    if isinstance(first, Exception) or first is None:
+        for task in tasks:
+            task.cancel()
+        if first is None:
+            raise NoAudioReceived("First piece produced no audio")
+        raise first
+
+    async def in_order():
+        try:
+            yield first
+            for buffer in buffers:
+                while (chunk := await buffer.get()) is not None:
+                    if isinstance(chunk, Exception):
+                        raise chunk
+                    yield chunk
+        finally:
+            for task in tasks:
+                task.cancel()
+    return in_order()
+
+
+def audio_response(request: Request, key: str, path: str, cache_status: str) -> RangeFileResponse:
+    return RangeFileResponse(
+        path,
+        request.headers,
+        etag=key,
+        media_type="audio/mpeg",
+        headers={
+            "Content-Disposition": "inline; filename=speech.mp3",
+            "Cache-Control": "public, max-age=31536000, immutable",
+            "Content-Location": f"/api/tts/audio/{key}",
+            "X-Cache": cache_status,
+        },
+        send_body=request.method != "HEAD",
+    )
+
+
+def busy(e: SchedulerFull) -> HTTPException:
+    return HTTPException(503, str(e), headers={"Retry-After": str(e.retry_after)})
+
+
+async def read_tts_request(request: Request) -> TTSRequest:
+    data = await request.json()
+    req = TTSRequest(**data)
+
+    if not req.text.strip():
+        raise HTTPException(400, "Text is empty")
+    if len(req.text) > 5000:
+        raise HTTPException(400, "Max 5000 characters")
+    return req
+
+
+def audio_key(req: TTSRequest) -> str:
+    return audio_cache.key(req.text, req.voice, req.rate, req.pitch, req.volume)
+
+
+def produce_audio(req: TTSRequest, ticket: Ticket):
+    """Producer for the audio cache: waits for a scheduler slot, then synthesizes"""
+    async def produce():
+        try:
+            async with ticket:
+                async for chunk in await synthesize_audio(req):
+                    yield chunk
+        except SchedulerFull as e:
+            raise busy(e)
+    return produce
+
+
+def streaming_audio(audio: AsyncIterator[bytes], key: str, cache_status: str) -> StreamingResponse:
+    return StreamingResponse(
+        audio,
+        media_type="audio/mpeg",
+        headers={
+            "Content-Disposition": "inline; filename=speech.mp3",
+            "Content-Location": f"/api/tts/audio/{key}",
+            "X-Cache": cache_status,
+        },
+    )
+
+
 # Main endpoint
 @router.post("/synthesize")
 async def synthesize(request: Request):
     try:
-        data = await request.json()
-        req = TTSRequest(**data)
+        req = await read_tts_request(request)
 
-        if not req.text.strip():
-            raise HTTPException(400, "Text is empty")
-        if len(req.text) > 5000:
-            raise HTTPException(400, "Max 5000 characters")
+        # Same text and settings always give the same audio, so it is
+        # synthesized once and served from disk afterwards
+        key = audio_key(req)
+        path = audio_cache.lookup(key)
+        if path is not None:
+            return audio_response(request, key, path, "HIT")
 
-        # Try Edge-TTS first (free)
-        voices_to_try = []
-        if req.voice and req.voice in VOICES:
-            voices_to_try.append(req.voice)
-        voices_to_try.extend([v for v in VOICES if v != req.voice])
+        # Only a new synthesis takes a scheduler slot; joining one in
+        # progress is free. No await between here and stream(), so this
+        # request is the one whose producer runs.
+        ticket = None if audio_cache.synthesizing(key) else tts_scheduler.reserve()
+        audio = await audio_cache.stream(key, produce_audio(req, ticket))
+        return streaming_audio(audio, key, "MISS")
 
-        for voice in voices_to_try:
-            try:
-                logger.info(f"Trying Edge voice: {voice}")
-                com = edge_tts.Communicate(
-                    text=req.text,
-                    voice=voice,
-                    rate=req.rate or "+0%",
-                    pitch=req.pitch or "+0Hz",
-                    volume=req.volume or "+0%"
-                )
-                audio = bytearray()
-                async for chunk in com.stream():
-                    if chunk["type"] == "audio":
-                        audio.extend(chunk["data"])
-                if audio:
-                    logger.info(f"Edge-TTS success with {voice}")
-                    return StreamingResponse(
-                        iter([bytes(audio)]),
-                        media_type="audio/mpeg",
-                        headers={"Content-Disposition": "inline; filename=speech.mp3"}
-                    )
-            except NoAudioReceived:
-                logger.warning(f"No audio from {voice}")
-                continue
-            except Exception as e:
-                logger.error(f"Edge error {voice}: {e}")
-                continue
+    except SchedulerFull as e:
+        raise busy(e)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("TTS crash")
+        raise HTTPException(500, "Server error")
 
-        # If Edge fails → ElevenLabs (your key = 100% uptime)
-        logger.info("Falling back to ElevenLabs")
-        audio = await elevenlabs_fallback(req.text)
-        if audio:
-            return Response(content=audio, media_type="audio/mpeg")
 
-        raise HTTPException(503, "All methods failed (should never happen)")
+def job_status(key: str) -> Optional[str]:
+    if key in audio_cache.index:
+        return "ready"
+    if audio_cache.synthesizing(key):
+        return "pending"
+    if job_errors.get(key) is not None:
+        return "failed"
+    return None
+
+
+def job_body(key: str, status: str) -> dict:
+    body = {
+        "job_id": key,
+        "status": status,
+        "status_url": f"/api/tts/jobs/{key}",
+        "audio_url": f"/api/tts/audio/{key}",
+    }
+    if status == "failed":
+        body["error"] = job_errors.get(key)
+    return body
+
+
+def job_producer(key: str, req: TTSRequest, ticket: Ticket):
+    """produce_audio that also records why the job failed"""
+    produce = produce_audio(req, ticket)
+
+    async def run():
+        try:
+            async for chunk in produce():
+                yield chunk
+        except HTTPException as e:
+            job_errors.set(key, {"status_code": e.status_code, "detail": e.detail})
+            raise
+        except Exception:
+            logger.exception("TTS job crash")
+            job_errors.set(key, {"status_code": 500, "detail": "Server error"})
+            raise
+    return run
+
 
+@router.post("/jobs", status_code=202)
+async def create_job(request: Request):
+    """Queue synthesis and return at once. The job id is the audio key:
+    ``GET /api/tts/audio/{job_id}`` streams the audio as soon as it starts
+    and serves it from disk once complete; ``GET /api/tts/jobs/{job_id}``
+    reports its status."""
+    try:
+        req = await read_tts_request(request)
+        key = audio_key(req)
+        if job_status(key) not in ("ready", "pending"):
+            ticket = tts_scheduler.reserve()
+            job_errors.invalidate(key)
+            audio_cache.start(key, job_producer(key, req, ticket))
+            status = "pending"
+        else:
+            status = job_status(key)
+        return ORJSONResponse(
+            job_body(key, status),
+            status_code=200 if status == "ready" else 202,
+            headers={"Location": f"/api/tts/jobs/{key}"},
+        )
+
+    except SchedulerFull as e:
+        raise busy(e)
     except HTTPException:
         raise
     except Exception as e:
         logger.exception("TTS crash")
-        raise HTTPException(500, "Server error")
\ No newline at end of file
+        raise HTTPException(500, "Server error")
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    status = job_status(job_id) if _AUDIO_KEY.match(job_id) else None
+    if status is None:
+        raise HTTPException(404, "Job not found")
+    return job_body(job_id, status)
+
+
+@router.api_route("/audio/{key}", methods=["GET", "HEAD"])
+async def get_audio(key: str, request: Request):
+    """Serve synthesized audio by the key in the Content-Location of a
+    synthesize response (or a job id): from disk with Range and
+    If-None-Match support, or streamed while it is still being made."""
+    if not _AUDIO_KEY.match(key):
+        raise HTTPException(404, "Audio not found")
+    audio = await audio_cache.follow(key)
+    if audio is not None:
+        return streaming_audio(audio, key, "MISS")
+    path = audio_cache.lookup(key)
+    if path is not None:
+        return audio_response(request, key, path, "HIT")
+    error = job_errors.get(key)
+    if error is not None:
+        raise HTTPException(error["status_code"], error["detail"])
+    raise HTTPException(404, "Audio not found")
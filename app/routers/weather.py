@@ -1,14 +1,42 @@
 import logging
 import os
-import requests
+import httpx
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Optional
+from app.services.http_clients import outbound
+from app.services.metrics import UpstreamTimer
+from app.services.singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Current-weather endpoint; overridable to point at a local stand-in
+OPENWEATHER_URL = os.getenv("OPENWEATHER_URL", "https://api.openweathermap.org/data/2.5/weather")
+
+# Concurrent requests for (about) the same place share one OpenWeather call;
+# 2 decimal places is roughly 1 km
+COORDINATE_PRECISION = 2
+weather_fetches = SingleFlight("openweather")
+
+
+async def fetch_current_weather(latitude: float, longitude: float, api_key: str) -> dict:
+    """OpenWeather call over the shared pooled client"""
+    url = OPENWEATHER_URL
+    params = {
+        "lat": latitude,
+        "lon": longitude,
+        "appid": api_key,
+        "units": "metric",  # Use metric units (Celsius)
+        "lang": "ar"  # Arabic language
+    }
+    # The openweather client ignores proxy settings and keeps connections alive
+    with UpstreamTimer("openweather", "current_weather"):
+        response = await outbound.client("openweather").get(url, params=params)
+        response.raise_for_status()
+    return response.json()
+
 class WeatherRequest(BaseModel):
     latitude: float
     longitude: float
@@ -56,25 +84,13 @@ async def get_weather(request: WeatherRequest):
             )
         
         # Call OpenWeather API
-        url = f"https://api.openweathermap.org/data/2.5/weather"
-        params = {
-            "lat": request.latitude,
-            "lon": request.longitude,
-            "appid": api_key,
-            "units": "metric",  # Use metric units (Celsius)
-            "lang": "ar"  # Arabic language
-        }
-        
-        logger.info(f"Calling OpenWeather API for lat={request.latitude}, lon={request.longitude}")
-        # Disable proxy for OpenWeather API calls
-        response = requests.get(
-            url, 
-            params=params, 
-            timeout=10,
-            proxies={"http": None, "https": None}  # Bypass proxy settings
+        latitude = round(request.latitude, COORDINATE_PRECISION)
+        longitude = round(request.longitude, COORDINATE_PRECISION)
+        logger.info(f"Calling OpenWeather API for lat={latitude}, lon={longitude}")
+        data = await weather_fetches.do(
+            (latitude, longitude),
+            lambda: fetch_current_weather(latitude, longitude, api_key),
         )
-        response.raise_for_status()
-        data = response.json()
         logger.info(f"Successfully fetched weather data for {data.get('name', 'unknown location')}")
         
         # Extract weather information
@@ -125,7 +141,7 @@ async def get_weather(request: WeatherRequest):
             isRealData=True
         )
         
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         error_msg = str(e)
         logger.error(f"Error calling OpenWeather API: {error_msg}")
         # Return fallback data on API error, marked as mock
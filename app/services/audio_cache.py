@@ -0,0 +1,330 @@
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+import uuid
+from collections import OrderedDict
+from typing import AsyncIterator, Callable, Dict, Optional, Set
+
+import orjson
+
+from app.services.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Where synthesized audio is kept (only /tmp is writable on Vercel) and how
+# much of it; least recently served files are removed first
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(tempfile.gettempdir(), "aura-tts-cache"))
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+_SUFFIX = ".mp3"
+
+tts_cache_requests = registry.counter(
+    "tts_audio_cache_requests_total",
+    "TTS requests by audio cache result: hit, miss (synthesized) or coalesced (joined a synthesis in progress)",
+    ("result",),
+)
+tts_cache_bytes = registry.gauge("tts_audio_cache_bytes", "Size of the cached TTS audio on disk")
+tts_cache_entries = registry.gauge("tts_audio_cache_entries", "Number of cached TTS audio files")
+
+
+class _PendingAudio:
+    """Audio of one key being synthesized, readable while it is written.
+
+    Every request for the key streams from here, so there is one synthesis
+    per key however many clients ask, and each of them gets the first
+    chunk as soon as it exists. Readers follow the file being written by
+    byte offset (an open descriptor survives the rename into the cache);
+    only if the disk refuses the audio is it held in memory instead.
+    """
+
+    read_size = 64 * 1024
+
+    def __init__(self):
+        # Where the audio is on disk (the temporary file, then its cached
+        # name), how many bytes of it are there, and what did not fit
+        self.path: Optional[str] = None
+        self.written = 0
+        self.spilled = bytearray()
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self._file = None
+        self._changed = asyncio.Condition()
+
+    @property
+    def size(self) -> int:
+        return self.written + len(self.spilled)
+
+    def open(self, path: str) -> None:
+        try:
+            self._file = open(path, "wb")
+            self.path = path
+        except OSError as e:
+            logger.error(f"TTS cache write failed, serving without caching: {e}")
+
+    def close(self) -> bool:
+        """Stop writing; whether the file holds all of the audio"""
+        if self._file is None:
+            return False
+        self._file.close()
+        self._file = None
+        return not self.spilled
+
+    def _store(self, chunk: bytes) -> None:
+        if self._file is not None:
+            try:
+                # Chunks are a few KB; a buffered write does not block the loop noticeably
+                self._file.write(chunk)
+                self._file.flush()
+                self.written += len(chunk)
+                return
+            except OSError as e:
+                logger.error(f"TTS cache write failed, serving without caching: {e}")
+                self._abandon_file()
+        self.spilled += chunk
+
+    def _abandon_file(self) -> None:
+        # Move what the file holds to memory, so readers that have not
+        # opened it yet still get every byte
+        try:
+            self._file.close()
+        except OSError:
+            pass
+        self._file = None
+        with open(self.path, "rb") as file:
+            self.spilled = bytearray(file.read(self.written)) + self.spilled
+        self.written = 0
+        os.unlink(self.path)
+        self.path = None
+
+    async def publish(self, chunk: Optional[bytes] = None, error: Optional[BaseException] = None,
+                      done: bool = False) -> None:
+        async with self._changed:
+            if chunk:
+                self._store(chunk)
+            if error is not None:
+                self.error = error
+            self.done = self.done or done or error is not None
+            self._changed.notify_all()
+
+    async def first_chunk(self) -> None:
+        """Wait until audio starts; raises the synthesis error if it failed before that"""
+        async with self._changed:
+            await self._changed.wait_for(lambda: self.size or self.done)
+        if not self.size and self.error is not None:
+            raise self.error
+
+    async def read(self) -> AsyncIterator[bytes]:
+        offset = 0
+        fd = None
+        try:
+            while True:
+                async with self._changed:
+                    await self._changed.wait_for(lambda: offset < self.size or self.done)
+                    if offset >= self.size:
+                        break
+                    if offset < self.written:
+                        if fd is None:
+                            try:
+                                fd = os.open(self.path, os.O_RDONLY)
+                            except OSError:
+                                # Removed after the synthesis failed
+                                if self.error is not None:
+                                    raise self.error
+                                raise
+                        # Just written, so served from the page cache
+                        chunk = os.pread(fd, min(self.read_size, self.written - offset), offset)
+                    else:
+                        start = offset - self.written
+                        chunk = bytes(self.spilled[start:start + self.read_size])
+                if not chunk:
+                    raise OSError(f"TTS audio truncated at byte {offset}")
+                offset += len(chunk)
+                yield chunk
+        finally:
+            if fd is not None:
+                os.close(fd)
+        if self.error is not None:
+            raise self.error
+
+
+class AudioCache:
+    """Content-addressed cache of synthesized audio files on local disk.
+
+    Files are named by the hash of everything that determines the audio
+    (``key``), so a file never changes once written and its name doubles
+    as a strong ETag. An in-memory LRU index keeps the total size under
+    ``max_bytes``. A miss synthesizes through the caller's producer while
+    streaming, writing to a temporary file that is renamed into place only
+    when the audio is complete.
+    """
+
+    def __init__(self, directory: str = TTS_CACHE_DIR, max_bytes: int = TTS_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._index: Optional["OrderedDict[str, int]"] = None
+        self._pending: Dict[str, _PendingAudio] = {}
+        # The event loop only keeps weak references to tasks
+        self._fills: Set[asyncio.Task] = set()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.failures = 0
+
+    @staticmethod
+    def key(*parts) -> str:
+        return hashlib.sha256(orjson.dumps(parts)).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + _SUFFIX)
+
+    def _load_index(self) -> "OrderedDict[str, int]":
+        # Rebuild the index from what an earlier process left, oldest first
+        index: "OrderedDict[str, int]" = OrderedDict()
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(_SUFFIX) and entry.is_file():
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, entry.name[:-len(_SUFFIX)], stat.st_size))
+                elif ".part-" in entry.name:
+                    os.unlink(entry.path)
+            for _, key, size in sorted(entries):
+                index[key] = size
+        except OSError as e:
+            logger.error(f"TTS cache directory {self.directory} unusable: {e}")
+        self.bytes = sum(index.values())
+        self._index = index
+        self._update_gauges()
+        return index
+
+    @property
+    def index(self) -> "OrderedDict[str, int]":
+        return self._index if self._index is not None else self._load_index()
+
+    def _update_gauges(self) -> None:
+        tts_cache_bytes.set(value=self.bytes)
+        tts_cache_entries.set(value=len(self._index or ()))
+
+    def lookup(self, key: str) -> Optional[str]:
+        """Path of the cached audio for ``key``, or None. Counts as a hit when found."""
+        index = self.index
+        if key not in index:
+            return None
+        path = self.path(key)
+        if not os.path.exists(path):
+            # Removed behind our back (tmp cleaner); forget it
+            self.bytes -= index.pop(key)
+            self._update_gauges()
+            return None
+        index.move_to_end(key)
+        self.hits += 1
+        tts_cache_requests.inc("hit")
+        return path
+
+    def synthesizing(self, key: str) -> bool:
+        return key in self._pending
+
+    async def follow(self, key: str) -> Optional[AsyncIterator[bytes]]:
+        """Audio of a synthesis in progress for ``key``, or None if there is none"""
+        pending = self._pending.get(key)
+        if pending is None:
+            return None
+        self.coalesced += 1
+        tts_cache_requests.inc("coalesced")
+        await pending.first_chunk()
+        return pending.read()
+
+    async def stream(self, key: str, producer: Callable[[], AsyncIterator[bytes]]) -> AsyncIterator[bytes]:
+        """Audio for a key that is not cached yet.
+
+        Concurrent requests for the same key share one run of ``producer``.
+        Returns once the first chunk is available, or raises the producer's
+        error if it failed before producing any audio.
+        """
+        pending = self._join(key, producer)
+        await pending.first_chunk()
+        return pending.read()
+
+    def start(self, key: str, producer: Callable[[], AsyncIterator[bytes]]) -> None:
+        """Synthesize ``key`` in the background unless that is already happening"""
+        self._join(key, producer)
+
+    def _join(self, key: str, producer: Callable[[], AsyncIterator[bytes]]) -> _PendingAudio:
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = _PendingAudio()
+            task = asyncio.create_task(self._fill(key, pending, producer))
+            self._fills.add(task)
+            task.add_done_callback(self._fills.discard)
+            self.misses += 1
+            tts_cache_requests.inc("miss")
+        else:
+            self.coalesced += 1
+            tts_cache_requests.inc("coalesced")
+        return pending
+
+    async def _fill(self, key: str, pending: _PendingAudio, producer: Callable[[], AsyncIterator[bytes]]) -> None:
+        temp_path = os.path.join(self.directory, f"{key}.part-{uuid.uuid4().hex}")
+        size = 0
+        try:
+            self.index  # creates the directory on first use
+            pending.open(temp_path)
+            async for chunk in producer():
+                size += len(chunk)
+                await pending.publish(chunk)
+            if pending.close() and size:
+                os.replace(temp_path, self.path(key))
+                # Readers that have not opened the file yet find it here
+                pending.path = self.path(key)
+                self._add(key, size)
+            await pending.publish(done=True)
+        except BaseException as e:
+            self.failures += 1
+            await pending.publish(error=e)
+            if not isinstance(e, Exception):
+                raise
+        finally:
+            pending.close()
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            self._pending.pop(key, None)
+
+    def _add(self, key: str, size: int) -> None:
+        index = self.index
+        if key in index:
+            self.bytes -= index.pop(key)
+        index[key] = size
+        self.bytes += size
+        while self.bytes > self.max_bytes and len(index) > 1:
+            old_key, old_size = index.popitem(last=False)
+            self.bytes -= old_size
+            self.evictions += 1
+            try:
+                os.unlink(self.path(old_key))
+            except OSError:
+                pass
+        self._update_gauges()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "directory": self.directory,
+            "entries": len(self.index),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "failures": self.failures,
+            "synthesizing": len(self._pending),
+        }
+
+
+audio_cache = AudioCache()
@@ -0,0 +1,102 @@
+import time
+from collections import OrderedDict
+from typing import Any, Generic, Hashable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+class TTLCache(Generic[V]):
+    """Bounded LRU cache whose entries also expire after ``ttl`` seconds.
+
+    Not thread-safe; it is only used from the event loop. ``generation``
+    moves on every invalidation so a read that started before a write can
+    skip storing a value that is already stale (see ``set``). With
+    ``max_bytes`` the values must be bytes and the cache is also bounded by
+    their total size.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, max_bytes: Optional[int] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._data: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _size(self, value: Any) -> int:
+        return len(value) if self.max_bytes is not None else 0
+
+    def _pop(self, key: Hashable) -> Any:
+        _, value = self._data.pop(key)
+        self.bytes -= self._size(value)
+        return value
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._pop(key)
+            self.expirations += 1
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: V, generation: Optional[int] = None) -> bool:
+        """Store ``value``; pass the ``generation`` read before loading it to
+        drop the store if an invalidation happened in between."""
+        if self.maxsize <= 0 or (generation is not None and generation != self.generation):
+            return False
+        size = self._size(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return False
+        if key in self._data:
+            self._pop(key)
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self.bytes += size
+        while len(self._data) > self.maxsize or (self.max_bytes is not None and self.bytes > self.max_bytes):
+            self._pop(next(iter(self._data)))
+            self.evictions += 1
+        return True
+
+    def invalidate(self, key: Hashable) -> None:
+        self.generation += 1
+        if key in self._data:
+            self._pop(key)
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        self.generation += 1
+        self.invalidations += len(self._data)
+        self._data.clear()
+        self.bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        stats = {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+        if self.max_bytes is not None:
+            stats["bytes"] = self.bytes
+            stats["max_bytes"] = self.max_bytes
+        return stats
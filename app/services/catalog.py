@@ -0,0 +1,161 @@
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from app.models.schemas import PerfumeData
+from app.services.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# How long a snapshot is served before the background task reloads it
+CATALOG_TTL_SECONDS = float(os.getenv("CATALOG_TTL_SECONDS", "300"))
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """Immutable view of the perfume catalog at a point in time"""
+    version: int
+    perfumes: Tuple[PerfumeData, ...]
+    fingerprint: str
+    loaded_at: float
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.loaded_at
+
+
+def _fingerprint(perfumes: List[PerfumeData]) -> str:
+    digest = hashlib.sha1()
+    for perfume in sorted(perfumes, key=lambda p: p.perfume_id):
+        digest.update(perfume.model_dump_json().encode("utf-8"))
+    return digest.hexdigest()
+
+
+class CatalogStore:
+    """Process-wide catalog snapshot.
+
+    The snapshot is loaded once, then reloaded in the background every
+    ``ttl`` seconds or on demand. Readers always get a complete snapshot:
+    a reload builds a new ``CatalogSnapshot`` and swaps the reference, so
+    the hot path never waits on the database once the first load is done.
+    The version only moves forward when the catalog content changes.
+    """
+
+    def __init__(self, loader: Callable[[], Awaitable[List[PerfumeData]]], ttl: float = CATALOG_TTL_SECONDS):
+        self._loader = loader
+        self.ttl = ttl
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._pending: Optional[asyncio.Task] = None
+        self._dirty = False
+        # Readers arriving before the first snapshot share one load
+        self._first_load = SingleFlight("catalog")
+
+    @property
+    def snapshot(self) -> Optional[CatalogSnapshot]:
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        return self._snapshot.version if self._snapshot else 0
+
+    async def get(self) -> CatalogSnapshot:
+        """Return the current snapshot, loading it first if there is none yet"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = await self._first_load.do(None, self.refresh)
+        return snapshot
+
+    async def refresh(self) -> CatalogSnapshot:
+        """Reload the catalog and swap it in. Keeps the old snapshot on failure."""
+        started = time.monotonic()
+        async with self._lock:
+            # Another caller started and finished a reload while we were waiting
+            if self._snapshot is not None and self._snapshot.loaded_at >= started:
+                return self._snapshot
+            load_started = time.monotonic()
+            try:
+                perfumes = await self._loader()
+            except Exception as e:
+                logger.error(f"Catalog reload failed: {e}")
+                if self._snapshot is not None:
+                    return self._snapshot
+                return CatalogSnapshot(version=0, perfumes=(), fingerprint="", loaded_at=started)
+
+            fingerprint = _fingerprint(perfumes)
+            previous = self._snapshot
+            if previous is not None and previous.fingerprint == fingerprint:
+                version = previous.version
+            else:
+                version = (previous.version if previous else 0) + 1
+            self._snapshot = CatalogSnapshot(
+                version=version,
+                perfumes=tuple(perfumes),
+                fingerprint=fingerprint,
+                loaded_at=load_started,
+            )
+            logger.info(f"Catalog snapshot v{version} loaded ({len(perfumes)} perfumes)")
+            return self._snapshot
+
+    def request_refresh(self) -> None:
+        """Schedule a reload without waiting for it (used after catalog writes).
+
+        A write that lands while a reload is already running may not be in
+        what that reload reads, so it marks the store dirty and the running
+        task reloads once more when it finishes.
+        """
+        if self._pending is not None and not self._pending.done():
+            self._dirty = True
+            return
+        try:
+            self._pending = asyncio.get_running_loop().create_task(self._refresh_pending())
+        except RuntimeError:
+            # No running loop; the next TTL tick picks the change up
+            pass
+
+    async def _refresh_pending(self) -> None:
+        self._dirty = True
+        while self._dirty:
+            self._dirty = False
+            await self.refresh()
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.ttl)
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Catalog refresh loop error")
+
+    async def start(self) -> None:
+        """Load the first snapshot and start the TTL refresh task"""
+        await self.refresh()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        for task in (self._task, self._pending):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        self._task = None
+        self._pending = None
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "version": snapshot.version if snapshot else 0,
+            "perfumes": len(snapshot.perfumes) if snapshot else 0,
+            "age_seconds": round(snapshot.age, 1) if snapshot else None,
+            "ttl_seconds": self.ttl,
+        }
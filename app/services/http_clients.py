@@ -0,0 +1,189 @@
+import importlib.util
+import logging
+import os
+from typing import AsyncIterator, Dict, NamedTuple
+
+import httpx
+
+from app.services.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 needs the optional h2 package (pip install "httpx[http2]"); without
+# it the clients speak HTTP/1.1 with keep-alive
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Idle connections are kept this long for reuse
+OUTBOUND_KEEPALIVE_SECONDS = float(os.getenv("OUTBOUND_KEEPALIVE_SECONDS", "30"))
+
+
+class Upstream(NamedTuple):
+    timeout: float
+    max_connections: int
+    # OpenWeather has always been called without the environment's proxy
+    trust_env: bool = True
+
+
+def _upstream(name: str, timeout: float, max_connections: int, trust_env: bool = True) -> Upstream:
+    prefix = f"OUTBOUND_{name.upper()}_"
+    return Upstream(
+        timeout=float(os.getenv(prefix + "TIMEOUT_SECONDS", str(timeout))),
+        max_connections=int(os.getenv(prefix + "MAX_CONNECTIONS", str(max_connections))),
+        trust_env=trust_env,
+    )
+
+
+# One pooled client per upstream; each can be tuned with
+# OUTBOUND_<NAME>_TIMEOUT_SECONDS and OUTBOUND_<NAME>_MAX_CONNECTIONS
+UPSTREAMS: Dict[str, Upstream] = {
+    "openweather": _upstream("openweather", timeout=10, max_connections=20, trust_env=False),
+    "elevenlabs": _upstream("elevenlabs", timeout=30, max_connections=10),
+    "llm": _upstream("llm", timeout=60, max_connections=50),
+}
+
+outbound_connections_opened = registry.counter(
+    "outbound_http_connections_opened_total",
+    "New outbound connections by client and step (tcp connect, tls handshake); flat in steady state when keep-alive works",
+    ("client", "step"),
+)
+outbound_in_flight = registry.gauge(
+    "outbound_http_requests_in_flight", "Outbound requests sent and not yet read to the end", ("client",)
+)
+outbound_pool = registry.gauge(
+    "outbound_http_pool_connections", "Connections in each outbound pool by state (active, idle)", ("client", "state")
+)
+outbound_pool_limit = registry.gauge(
+    "outbound_http_pool_max_connections", "Connection limit of each outbound pool", ("client",)
+)
+
+_HANDSHAKE_EVENTS = {
+    "connection.connect_tcp.complete": "tcp",
+    "connection.start_tls.complete": "tls",
+}
+
+
+class _CountedStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, transport: "_PooledTransport"):
+        self._stream = stream
+        self._transport = transport
+        self._closed = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        if not self._closed:
+            self._closed = True
+            self._transport.in_flight -= 1
+        await self._stream.aclose()
+
+
+class _PooledTransport(httpx.AsyncHTTPTransport):
+    """httpx transport that counts its in-flight requests and new connections"""
+
+    def __init__(self, name: str, **kwargs):
+        super().__init__(**kwargs)
+        self.name = name
+        self.in_flight = 0
+        self.opened = {"tcp": 0, "tls": 0}
+
+    async def _trace(self, event_name: str, info: dict) -> None:
+        step = _HANDSHAKE_EVENTS.get(event_name)
+        if step is not None:
+            self.opened[step] += 1
+            outbound_connections_opened.inc(self.name, step)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        request.extensions["trace"] = self._trace
+        self.in_flight += 1
+        try:
+            response = await super().handle_async_request(request)
+        except BaseException:
+            self.in_flight -= 1
+            raise
+        response.stream = _CountedStream(response.stream, self)
+        return response
+
+    def pool_state(self) -> Dict[str, int]:
+        # httpx does not expose its connection pool; read it for metrics only
+        connections = getattr(getattr(self, "_pool", None), "connections", [])
+        idle = sum(1 for connection in connections if connection.is_idle())
+        return {"active": len(connections) - idle, "idle": idle}
+
+
+class OutboundClients:
+    """Named, pooled httpx clients for the external APIs we call.
+
+    Each upstream in UPSTREAMS gets one long-lived client with its own
+    connection limit and timeout, keep-alive, and HTTP/2 when h2 is
+    installed, so steady-state calls reuse warm connections instead of
+    paying a TCP and TLS handshake each. Created in the app lifespan and
+    closed on shutdown; ``client()`` also creates one lazily when no
+    lifespan runs (serverless).
+    """
+
+    def __init__(self, upstreams: Dict[str, Upstream] = UPSTREAMS):
+        self.upstreams = upstreams
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._transports: Dict[str, _PooledTransport] = {}
+
+    def client(self, name: str) -> httpx.AsyncClient:
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._clients[name] = self._create(name)
+        return client
+
+    def _create(self, name: str) -> httpx.AsyncClient:
+        upstream = self.upstreams[name]
+        limits = httpx.Limits(
+            max_connections=upstream.max_connections,
+            max_keepalive_connections=upstream.max_connections,
+            keepalive_expiry=OUTBOUND_KEEPALIVE_SECONDS,
+        )
+        transport = _PooledTransport(
+            name, http2=HTTP2_AVAILABLE, limits=limits, trust_env=upstream.trust_env, retries=1,
+        )
+        self._transports[name] = transport
+        outbound_pool_limit.set(name, value=upstream.max_connections)
+        return httpx.AsyncClient(
+            transport=transport,
+            timeout=httpx.Timeout(upstream.timeout, connect=min(5.0, upstream.timeout)),
+            trust_env=upstream.trust_env,
+        )
+
+    async def start(self) -> None:
+        for name in self.upstreams:
+            self.client(name)
+        logger.info(f"Outbound HTTP clients ready: {', '.join(self.upstreams)} (HTTP/2: {HTTP2_AVAILABLE})")
+
+    async def stop(self) -> None:
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+    def collect(self) -> None:
+        for name, transport in self._transports.items():
+            outbound_in_flight.set(name, value=transport.in_flight)
+            for state, count in transport.pool_state().items():
+                outbound_pool.set(name, state, value=count)
+
+    def stats(self) -> dict:
+        return {
+            "http2": HTTP2_AVAILABLE,
+            "clients": {
+                name: {
+                    "open": name in self._clients and not self._clients[name].is_closed,
+                    "timeout_seconds": upstream.timeout,
+                    "max_connections": upstream.max_connections,
+                    "in_flight": self._transports[name].in_flight if name in self._transports else 0,
+                    "connections": self._transports[name].pool_state() if name in self._transports else {},
+                    "opened": dict(self._transports[name].opened) if name in self._transports else {},
+                }
+                for name, upstream in self.upstreams.items()
+            },
+        }
+
+
+outbound = OutboundClients()
+registry.on_collect(outbound.collect)
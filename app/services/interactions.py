@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.services.postgrest import APIError
+
+logger = logging.getLogger(__name__)
+
+# Rows per bulk insert, and the longest a row waits for its batch to fill
+INTERACTION_BATCH_SIZE = int(os.getenv("INTERACTION_BATCH_SIZE", "100"))
+INTERACTION_FLUSH_MS = float(os.getenv("INTERACTION_FLUSH_MS", "500"))
+# Rows buffered in memory before new ones are dropped
+INTERACTION_QUEUE_SIZE = int(os.getenv("INTERACTION_QUEUE_SIZE", "10000"))
+# How long shutdown waits for buffered rows to be written
+INTERACTION_DRAIN_SECONDS = float(os.getenv("INTERACTION_DRAIN_SECONDS", "5"))
+
+
+class InteractionWriter:
+    """Buffers interaction rows and writes them in bulk from a background task.
+
+    ``submit`` never waits: it puts the row on a bounded queue, or counts it
+    as dropped when the queue is full, so request latency does not depend on
+    the database. The worker flushes a batch once ``batch_size`` rows are
+    buffered or ``flush_ms`` after the first row of the batch arrived.
+    """
+
+    def __init__(
+        self,
+        writer: Callable[[List[Dict[str, Any]]], Awaitable[Any]],
+        batch_size: int = INTERACTION_BATCH_SIZE,
+        flush_ms: float = INTERACTION_FLUSH_MS,
+        max_queue: int = INTERACTION_QUEUE_SIZE,
+        drain_seconds: float = INTERACTION_DRAIN_SECONDS,
+    ):
+        self._writer = writer
+        self.batch_size = max(batch_size, 1)
+        self.flush_interval = flush_ms / 1000
+        self.max_queue = max_queue
+        self.drain_seconds = drain_seconds
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.submitted = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self.last_flush_ms: Optional[float] = None
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def submit(self, row: Dict[str, Any]) -> bool:
+        """Queue one row for writing. Returns False if it was dropped."""
+        if self._closing or not self._ensure_started():
+            self.dropped += 1
+            return False
+        try:
+            self._queue.put_nowait(row)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                logger.warning(f"Interaction queue full; {self.dropped} rows dropped so far")
+            return False
+        self.submitted += 1
+        return True
+
+    def _ensure_started(self) -> bool:
+        # Started from the lifespan; started lazily when no lifespan runs
+        if self._task is not None and not self._task.done():
+            return True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._task = loop.create_task(self._run())
+        return True
+
+    async def _next_batch(self) -> List[Dict[str, Any]]:
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            if self._closing:
+                # Draining: take what is buffered without waiting for more
+                if self._queue.empty():
+                    break
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> None:
+        try:
+            await self._writer(batch)
+            self.written += len(batch)
+        except APIError as e:
+            if e.status_code < 500 and len(batch) > 1:
+                # One bad row (e.g. unknown customer) rejects the whole insert;
+                # split so the valid rows still get written
+                middle = len(batch) // 2
+                await self._write(batch[:middle])
+                await self._write(batch[middle:])
+                return
+            self.failed += len(batch)
+            logger.error(f"Failed to write {len(batch)} interactions: {e}")
+        except Exception as e:
+            self.failed += len(batch)
+            logger.error(f"Failed to write {len(batch)} interactions: {e}")
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            started = time.perf_counter()
+            try:
+                await self._write(batch)
+            finally:
+                self.batches += 1
+                self.last_flush_ms = round((time.perf_counter() - started) * 1000, 2)
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def start(self) -> None:
+        """Start the background writer"""
+        self._closing = False
+        self._ensure_started()
+
+    async def stop(self) -> None:
+        """Write out buffered rows (bounded by ``drain_seconds``) and stop"""
+        if self._task is None:
+            return
+        self._closing = True
+        if not self._task.done():
+            try:
+                await asyncio.wait_for(self._queue.join(), self.drain_seconds)
+            except asyncio.TimeoutError:
+                logger.warning(f"Interaction drain timed out; {self.pending} rows not written")
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._task = None
+        self._queue = None
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending,
+            "max_queue": self.max_queue,
+            "submitted": self.submitted,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches,
+            "last_flush_ms": self.last_flush_ms,
+        }
+
+
+def interaction_row(customer_id: str, feature: str, input_data: Dict[str, Any], output_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Row for ``customer_interactions``; the time is taken now, not at flush"""
+    return {
+        "customer_id": customer_id,
+        "feature_used": feature,
+        "input_data": input_data,
+        "output_data": output_data,
+        "interaction_time": datetime.now(timezone.utc).isoformat(),
+    }
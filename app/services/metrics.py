@@ -0,0 +1,196 @@
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.services.request_timing import RequestTiming, current_timing
+
+# Latency buckets in seconds; p50/p95/p99 come from histogram_quantile()
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Upstream calls include multi-second TTS synthesis
+UPSTREAM_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Starlette appends "; charset=utf-8" to text/* media types
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonic count per label set"""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_number(value)}"
+
+
+class Gauge(Counter):
+    """Value per label set that can go up and down"""
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def set(self, *labels: str, value: float) -> None:
+        self._values[labels] = value
+
+
+class Histogram(_Metric):
+    """Bucketed observations per label set.
+
+    Each series is a flat list: one count per bucket (not cumulative),
+    the +Inf bucket, then the running sum. ``observe`` is a bisect and two
+    additions so it is cheap enough for every request.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = REQUEST_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def samples(self) -> Iterable[str]:
+        bounds = [_format_number(float(b)) for b in self.buckets] + ["+Inf"]
+        for labels, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, series):
+                cumulative += count
+                le = 'le="' + bound + '"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+            label_text = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{label_text} {_format_number(series[-1])}"
+            yield f"{self.name}_count{label_text} {cumulative}"
+
+
+class Registry:
+    """Metrics exposed together in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = REQUEST_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def on_collect(self, collector: Callable[[], None]) -> None:
+        """Run ``collector`` before each render, to set gauges read from elsewhere"""
+        self._collectors.append(collector)
+
+    def render(self) -> bytes:
+        for collector in self._collectors:
+            collector()
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.header())
+            lines.extend(metric.samples())
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests by route template and status code", ("method", "route", "status")
+)
+http_requests_in_progress = registry.gauge(
+    "http_requests_in_progress", "HTTP requests currently being handled", ("method", "route")
+)
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "Time to handle an HTTP request, including streaming the body",
+    ("method", "route"),
+)
+upstream_duration = registry.histogram(
+    "upstream_request_duration_seconds", "Time spent in calls to external services",
+    ("service", "operation", "outcome"), UPSTREAM_BUCKETS,
+)
+
+
+class UpstreamTimer:
+    """Times one external call into ``upstream_duration``.
+
+    Used as ``with UpstreamTimer("supabase", table):``; an exception leaving
+    the block records outcome "error", and the block can set ``outcome``
+    itself for failures that are returned rather than raised. The call is
+    also added to the current request's Server-Timing, and ``elapsed`` holds
+    its duration in seconds afterwards.
+    """
+
+    __slots__ = ("service", "operation", "outcome", "elapsed", "_started", "_timing")
+
+    def __init__(self, service: str, operation: str):
+        self.service = service
+        self.operation = operation
+        self.outcome: Optional[str] = None
+        self.elapsed = 0.0
+        self._started = 0.0
+        self._timing: Optional[RequestTiming] = None
+
+    def __enter__(self) -> "UpstreamTimer":
+        self._started = time.perf_counter()
+        self._timing = current_timing.get()
+        if self._timing is not None:
+            self._timing.call_started(self._started)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        now = time.perf_counter()
+        self.elapsed = now - self._started
+        if self._timing is not None:
+            self._timing.call_finished(self.service, self._started, now)
+        outcome = self.outcome or ("error" if exc_type is not None else "ok")
+        upstream_duration.observe(self.elapsed, self.service, self.operation, outcome)
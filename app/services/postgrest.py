@@ -0,0 +1,253 @@
+import json
+import logging
+import re
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import httpx
+
+from app.services.metrics import UpstreamTimer
+
+logger = logging.getLogger(__name__)
+
+
+class APIError(Exception):
+    """Error response returned by PostgREST"""
+
+    def __init__(self, status_code: int, payload: Any):
+        self.status_code = status_code
+        self.payload = payload
+        if isinstance(payload, dict):
+            message = payload.get("message") or payload.get("hint") or str(payload)
+        else:
+            message = str(payload)
+        super().__init__(f"PostgREST {status_code}: {message}")
+
+
+class APIResponse:
+    """Result of a query; mirrors the ``data``/``count`` shape of supabase-py"""
+
+    __slots__ = ("data", "count")
+
+    def __init__(self, data: Any, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+def _format_value(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if value is None:
+        return "null"
+    return str(value)
+
+
+def _json_default(value: Any) -> str:
+    # UUIDs, datetimes and decimals coming from pydantic models
+    return str(value)
+
+
+def _parse_count(content_range: Optional[str]) -> Optional[int]:
+    # Content-Range: 0-9/123  or  */0
+    if not content_range or "/" not in content_range:
+        return None
+    total = content_range.rsplit("/", 1)[1]
+    return int(total) if total.isdigit() else None
+
+
+_WHITESPACE = re.compile(r"\s+")
+# Query parameters that shape the result rather than filter it
+_MODIFIERS = frozenset({"select", "order", "limit", "offset"})
+
+
+class QueryBuilder:
+    """Chainable PostgREST request for a single table.
+
+    Filter methods return the builder so existing ``.eq(...).execute()``
+    chains keep their shape; ``execute`` is the only call that does I/O.
+    """
+
+    def __init__(self, client: "AsyncPostgrestClient", table: str):
+        self._client = client
+        self.table = table
+        self.method = "GET"
+        self.params: List[Tuple[str, str]] = []
+        self.headers: Dict[str, str] = {}
+        self.body: Any = None
+
+    # -- verbs -------------------------------------------------------------
+
+    def select(self, columns: str = "*", count: Optional[str] = None) -> "QueryBuilder":
+        self.method = "GET"
+        self.params.append(("select", _WHITESPACE.sub("", columns)))
+        if count:
+            self.headers["Prefer"] = f"count={count}"
+        return self
+
+    def insert(
+        self,
+        rows: Union[Dict[str, Any], List[Dict[str, Any]]],
+        returning: str = "representation",
+    ) -> "QueryBuilder":
+        self.method = "POST"
+        self.body = rows
+        self.headers["Prefer"] = f"return={returning}"
+        return self
+
+    def update(self, values: Dict[str, Any]) -> "QueryBuilder":
+        self.method = "PATCH"
+        self.body = values
+        self.headers["Prefer"] = "return=representation"
+        return self
+
+    def delete(self) -> "QueryBuilder":
+        self.method = "DELETE"
+        self.headers["Prefer"] = "return=representation"
+        return self
+
+    # -- filters -----------------------------------------------------------
+
+    def _filter(self, column: str, operator: str, value: Any) -> "QueryBuilder":
+        self.params.append((column, f"{operator}.{_format_value(value)}"))
+        return self
+
+    def eq(self, column: str, value: Any) -> "QueryBuilder":
+        return self._filter(column, "eq", value)
+
+    def neq(self, column: str, value: Any) -> "QueryBuilder":
+        return self._filter(column, "neq", value)
+
+    def gt(self, column: str, value: Any) -> "QueryBuilder":
+        return self._filter(column, "gt", value)
+
+    def gte(self, column: str, value: Any) -> "QueryBuilder":
+        return self._filter(column, "gte", value)
+
+    def lt(self, column: str, value: Any) -> "QueryBuilder":
+        return self._filter(column, "lt", value)
+
+    def lte(self, column: str, value: Any) -> "QueryBuilder":
+        return self._filter(column, "lte", value)
+
+    def ilike(self, column: str, pattern: str) -> "QueryBuilder":
+        return self._filter(column, "ilike", pattern)
+
+    def in_(self, column: str, values: List[Any]) -> "QueryBuilder":
+        joined = ",".join(_format_value(v) for v in values)
+        self.params.append((column, f"in.({joined})"))
+        return self
+
+    # -- modifiers ---------------------------------------------------------
+
+    def order(self, column: str, desc: bool = False) -> "QueryBuilder":
+        self.params.append(("order", f"{column}.{'desc' if desc else 'asc'}"))
+        return self
+
+    def limit(self, count: int) -> "QueryBuilder":
+        self.params.append(("limit", str(count)))
+        return self
+
+    def offset(self, count: int) -> "QueryBuilder":
+        self.params.append(("offset", str(count)))
+        return self
+
+    def range(self, start: int, end: int) -> "QueryBuilder":
+        return self.offset(start).limit(end - start + 1)
+
+    def shape(self) -> str:
+        """The query without filter values, e.g. ``GET perfumes select=* price=lte.? limit=9``"""
+        parts = [self.method, self.table]
+        for key, value in self.params:
+            if key not in _MODIFIERS:
+                value = value.split(".", 1)[0] + ".?"
+            parts.append(f"{key}={value}")
+        if self.body is not None:
+            parts.append(f"rows={len(self.body) if isinstance(self.body, list) else 1}")
+        return " ".join(parts)
+
+    async def execute(self, timeout: Optional[float] = None) -> APIResponse:
+        return await self._client.request(self, timeout=timeout)
+
+
+class AsyncPostgrestClient:
+    """Non-blocking PostgREST client over one shared, pooled httpx client.
+
+    One instance is created per process in the app lifespan; every request
+    reuses its keep-alive connections instead of opening a new one.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        timeout: float = 10.0,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        slow_query_ms: Optional[float] = None,
+    ):
+        self.timeout = timeout
+        self.slow_query_ms = slow_query_ms
+        self._http = httpx.AsyncClient(
+            base_url=f"{base_url.rstrip('/')}/rest/v1",
+            headers={
+                "apikey": api_key,
+                "Authorization": f"Bearer {api_key}",
+                "Accept": "application/json",
+            },
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+        )
+
+    def from_(self, table: str) -> QueryBuilder:
+        return QueryBuilder(self, table)
+
+    table = from_
+
+    def rpc(self, function: str, params: Optional[Dict[str, Any]] = None) -> QueryBuilder:
+        """Call a Postgres function exposed by PostgREST"""
+        query = QueryBuilder(self, f"rpc/{function}")
+        query.method = "POST"
+        query.body = params or {}
+        return query
+
+    async def request(self, query: QueryBuilder, timeout: Optional[float] = None) -> APIResponse:
+        headers = dict(query.headers)
+        content = None
+        if query.body is not None:
+            content = json.dumps(query.body, default=_json_default)
+            headers["Content-Type"] = "application/json"
+        with UpstreamTimer("supabase", f"{query.method} {query.table}") as timer:
+            response = await self._http.request(
+                query.method,
+                f"/{query.table}",
+                params=query.params,
+                headers=headers,
+                content=content,
+                timeout=timeout if timeout is not None else self.timeout,
+            )
+            if response.status_code >= 400:
+                timer.outcome = "error"
+        if response.status_code >= 400:
+            try:
+                payload = response.json()
+            except ValueError:
+                payload = response.text
+            raise APIError(response.status_code, payload)
+        data = response.json() if response.content else []
+        count = _parse_count(response.headers.get("content-range"))
+        if self.slow_query_ms is not None and timer.elapsed * 1000 >= self.slow_query_ms:
+            rows = len(data) if isinstance(data, list) else 1
+            logger.warning(
+                f"Slow query {timer.elapsed * 1000:.0f} ms: {query.shape()} -> {rows} rows"
+                + (f" (count={count})" if count is not None else "")
+            )
+        return APIResponse(data=data, count=count)
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+    @property
+    def is_closed(self) -> bool:
+        return self._http.is_closed
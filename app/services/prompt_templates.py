@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import os
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# How often active prompts are reloaded from the prompts table
+PROMPTS_TTL_SECONDS = float(os.getenv("PROMPTS_TTL_SECONDS", "300"))
+# Largest request body (before the prefix) accepted on the LLM proxy path
+GEMINI_MAX_BODY_BYTES = int(os.getenv("GEMINI_MAX_BODY_BYTES", str(10 * 1024 * 1024)))
+
+# prompts.feature of the persona prepended to every LLM request, and the
+# prefix of per-endpoint system prompts (e.g. "gemini-chat" for /api/gemini/chat)
+PERSONA_FEATURE = "gemini-persona"
+SYSTEM_FEATURE_PREFIX = "gemini-"
+
+# Used until (or unless) the prompts table has an active persona row
+DEFAULT_PERSONA = """
+You are a sophisticated AI assistant for an online perfume store. Your persona is that of an expert in perfumery, deep learning, and customer experience. You are integrated into a platform that uses the top 10 deep learning algorithms to provide a personalized and intelligent shopping experience.
+
+Your responses should be:
+- In Arabic.
+- Clear, concise, and helpful.
+- Reflecting the persona of a world-class expert in AI and perfumery.
+- Tailored to the user's needs, considering their mood, occasion, skin type, and style.
+
+Your capabilities include:
+- **AI Nose™️:** A contextual recommendation engine that suggests perfumes based on various factors.
+- **AI Mood Selector:** Analyzes text or voice to determine the user's mood and recommends suitable fragrances.
+- **Skin Chemistry Scanner:** Analyzes skin type from an image to suggest compatible perfumes.
+- **Occasion Detector & Style Matcher:** Recommends perfumes for specific occasions and personal styles.
+- **Longevity Score:** Predicts the longevity of a fragrance based on various factors.
+- **Perfume Memory, Driver & Personality Map:** Learns user preferences and creates a personalized scent profile.
+- **Smell Journey & Trial Simulator:** Creates immersive virtual experiences of the perfumes.
+- **Gift Selector, Description & Ad Builder, Bottle Renderer:** Provides creative and personalized content.
+- **Recommendation Engine & Price Optimizer:** Manages recommendations and pricing dynamically.
+"""
+
+_SEPARATOR = b"\n\n"
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """One prompt, UTF-8 encoded once when it is loaded"""
+    feature: str
+    version: int
+    text: bytes
+
+
+_DEFAULT_TEMPLATE = PromptTemplate(PERSONA_FEATURE, 0, DEFAULT_PERSONA.encode("utf-8"))
+
+
+class PromptTemplateStore:
+    """Active prompts from the ``prompts`` table, held as encoded bytes.
+
+    ``prefix`` assembles the bytes placed in front of an LLM request body
+    (persona, then the endpoint's system prompt if there is one) and caches
+    them per endpoint, so the request path does no string building or
+    encoding. Reloaded every ``ttl`` seconds; a failed reload keeps the
+    templates already loaded.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[], Awaitable[List[Tuple[str, str, int]]]],
+        ttl: float = PROMPTS_TTL_SECONDS,
+    ):
+        self._loader = loader
+        self.ttl = ttl
+        self._templates: Dict[str, PromptTemplate] = {}
+        self._prefixes: Dict[str, bytes] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def get(self, feature: str) -> Optional[PromptTemplate]:
+        template = self._templates.get(feature)
+        if template is None and feature == PERSONA_FEATURE:
+            return _DEFAULT_TEMPLATE
+        return template
+
+    def prefix(self, endpoint: str = "") -> bytes:
+        """Bytes to send before the request body of ``/api/gemini/<endpoint>``.
+
+        Only endpoints with a system prompt get their own cache entry; every
+        other path (the endpoint comes from the URL) shares the persona-only
+        prefix, so arbitrary paths cannot grow the cache.
+        """
+        feature = SYSTEM_FEATURE_PREFIX + endpoint
+        system = self._templates.get(feature) if endpoint and feature != PERSONA_FEATURE else None
+        key = endpoint if system is not None else ""
+        cached = self._prefixes.get(key)
+        if cached is not None:
+            return cached
+        parts = [self.get(PERSONA_FEATURE).text]
+        if system is not None:
+            parts.append(system.text)
+        prefix = _SEPARATOR.join(parts) + _SEPARATOR
+        self._prefixes[key] = prefix
+        return prefix
+
+    async def refresh(self) -> None:
+        try:
+            rows = await self._loader()
+        except Exception as e:
+            logger.error(f"Prompt template reload failed: {e}")
+            return
+        templates = {
+            feature: PromptTemplate(feature, version or 1, text.encode("utf-8"))
+            for feature, text, version in rows
+            if feature and text
+        }
+        if templates != self._templates:
+            # Swap both maps at once; prefixes are rebuilt on next use
+            self._templates, self._prefixes = templates, {}
+            versions = ", ".join(f"{t.feature} v{t.version}" for t in templates.values())
+            logger.info(f"Prompt templates loaded: {versions or 'none (using built-in persona)'}")
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.ttl)
+            await self.refresh()
+
+    async def start(self) -> None:
+        await self.refresh()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._task = None
+
+    def stats(self) -> dict:
+        persona = self.get(PERSONA_FEATURE)
+        return {
+            "persona_version": persona.version,
+            "templates": {t.feature: t.version for t in self._templates.values()},
+            "ttl_seconds": self.ttl,
+        }
@@ -0,0 +1,55 @@
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+# Services counted as database time in Server-Timing; the rest are "ext"
+DB_SERVICES = frozenset({"supabase"})
+
+
+class RequestTiming:
+    """Upstream calls made while handling one request.
+
+    Shared by reference with tasks the handler spawns (``asyncio.gather``
+    copies the context, not the object), so their calls are counted too.
+    Overlapping calls are merged when computing ``waiting`` so the time
+    left for the handler itself is never negative.
+    """
+
+    __slots__ = ("started", "calls", "durations", "waiting", "_in_flight", "_wait_started")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.calls: Dict[str, int] = {"db": 0, "ext": 0}
+        self.durations: Dict[str, float] = {"db": 0.0, "ext": 0.0}
+        self.waiting = 0.0
+        self._in_flight = 0
+        self._wait_started = 0.0
+
+    def call_started(self, now: float) -> None:
+        if self._in_flight == 0:
+            self._wait_started = now
+        self._in_flight += 1
+
+    def call_finished(self, service: str, started: float, now: float) -> None:
+        kind = "db" if service in DB_SERVICES else "ext"
+        self.calls[kind] += 1
+        self.durations[kind] += now - started
+        self._in_flight -= 1
+        if self._in_flight == 0:
+            self.waiting += now - self._wait_started
+
+    def header(self) -> str:
+        """``Server-Timing`` value: db and ext call counts/durations, app and total time"""
+        now = time.perf_counter()
+        total = now - self.started
+        waiting = self.waiting + (now - self._wait_started if self._in_flight else 0.0)
+        entries: List[str] = []
+        for kind in ("db", "ext"):
+            calls = self.calls[kind]
+            entries.append(f'{kind};dur={self.durations[kind] * 1000:.1f};desc="{calls} call{"" if calls == 1 else "s"}"')
+        entries.append(f"app;dur={(total - waiting) * 1000:.1f}")
+        entries.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(entries)
+
+
+current_timing: ContextVar[Optional[RequestTiming]] = ContextVar("current_timing", default=None)
@@ -0,0 +1,73 @@
+import functools
+import hashlib
+import os
+from typing import Any, Awaitable, Callable
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+
+from app.models.schemas import MultiModalRequest
+from app.services.cache import TTLCache
+from app.services.database import catalog
+
+# Budget for serialized responses kept in memory, and how long each one is served
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "10000"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "600"))
+
+response_cache: TTLCache[bytes] = TTLCache(
+    maxsize=RESPONSE_CACHE_MAX_ENTRIES,
+    ttl=RESPONSE_CACHE_TTL_SECONDS,
+    max_bytes=RESPONSE_CACHE_MAX_BYTES,
+)
+
+
+def response_key(route: str, request: MultiModalRequest) -> bytes:
+    """Digest of the route, catalog version and the fields the response depends on.
+
+    ``options`` is serialized with sorted keys so key order and JSON
+    formatting in the client's body do not split entries. ``text`` is used
+    as sent because the analyzers echo it back in the result.
+    """
+    payload = orjson.dumps(
+        [route, catalog.version, request.text, request.options],
+        option=orjson.OPT_SORT_KEYS,
+    )
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
+
+def _cacheable(request: MultiModalRequest) -> bool:
+    # Personalized calls and uploaded media always run the analysis
+    return not (request.user_id or request.image_data or request.audio_data)
+
+
+def _json_response(body: bytes, status: str) -> Response:
+    return Response(content=body, media_type="application/json", headers={"X-Cache": status})
+
+
+def cached_response(route: str) -> Callable:
+    """Serve repeated requests of a deterministic analyzer from ``response_cache``.
+
+    The handler must take the MultiModalRequest as ``request`` and return a
+    pydantic model. On a miss its result is serialized once and the same
+    bytes are both stored and sent.
+    """
+    def decorator(handler: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        @functools.wraps(handler)
+        async def wrapper(*args, **kwargs):
+            request: MultiModalRequest = kwargs["request"]
+            if not _cacheable(request):
+                return await handler(*args, **kwargs)
+            key = response_key(route, request)
+            body = response_cache.get(key)
+            if body is not None:
+                return _json_response(body, "HIT")
+            result = await handler(*args, **kwargs)
+            if not isinstance(result, BaseModel):
+                return result
+            body = orjson.dumps(result.model_dump(mode="json"))
+            response_cache.set(key, body)
+            return _json_response(body, "MISS")
+        return wrapper
+    return decorator
@@ -0,0 +1,276 @@
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.models.schemas import PerfumeData
+from app.services.catalog import CatalogSnapshot
+
+# Relative weight of each signal; they add up to 1 so a perfect match scores 1.0
+WEIGHTS = {
+    'mood': 0.30,
+    'occasion': 0.25,
+    'style': 0.15,
+    'skin': 0.15,
+    'gender': 0.05,
+    'longevity': 0.05,
+    'sillage': 0.05,
+}
+# Subtracted for a gender mismatch so those perfumes only fill leftover slots
+GENDER_MISMATCH_PENALTY = 1.0
+# Maximum penalty for going over the caller's budget
+BUDGET_PENALTY = 0.5
+# Distinct skin/gender baselines kept per catalog
+_MAX_CACHED_BASELINES = 256
+# Total tie-break offset; below float32 resolution so real score gaps always win
+_TIE_BREAK = 2.0 ** -26
+
+_GENDER_ALIASES = {
+    'male': 'male', 'men': 'male', 'رجالي': 'male',
+    'female': 'female', 'women': 'female', 'نسائي': 'female',
+    'unisex': 'unisex', 'للجنسين': 'unisex',
+}
+_SKIN_SEPARATORS = re.compile(r'[,،;/]+')
+
+
+def _canonical_gender(gender: Optional[str]) -> str:
+    key = (gender or '').strip().lower()
+    return _GENDER_ALIASES.get(key, key)
+
+
+def _skin_tokens(skin_compatibility: Optional[str]) -> List[str]:
+    tokens = (t.strip().lower() for t in _SKIN_SEPARATORS.split(skin_compatibility or ''))
+    return [t for t in tokens if t]
+
+
+def _one_hot(values: Sequence[str]) -> Tuple[Dict[str, int], np.ndarray]:
+    """Tag -> row index, and a (tags x perfumes) float32 one-hot matrix"""
+    index: Dict[str, int] = {}
+    codes = np.fromiter((index.setdefault(v, len(index)) for v in values), dtype=np.int64, count=len(values))
+    matrix = np.zeros((max(len(index), 1), len(values)), dtype=np.float32)
+    matrix[codes, np.arange(len(values))] = 1.0
+    return index, matrix
+
+
+def _normalized(values: Sequence[Optional[float]]) -> np.ndarray:
+    array = np.asarray([v or 0 for v in values], dtype=np.float32)
+    peak = float(array.max()) if array.size else 0.0
+    return array / peak if peak > 0 else array
+
+
+@dataclass(frozen=True)
+class ColumnarCatalog:
+    """Column-oriented copy of a catalog snapshot for vectorized scoring.
+
+    One-hot tag matrices are stored as (tags x perfumes) so a single tag is a
+    contiguous row. The mood, occasion and style matrices are views into one
+    stacked ``tags`` matrix so any number of contexts is one matrix product.
+    Skin compatibility is a packed bitset of (perfumes x 64-bit words).
+    """
+    fingerprint: str
+    perfumes: Tuple[PerfumeData, ...]
+    tags: np.ndarray
+    occasion_offset: int
+    style_offset: int
+    mood_index: Dict[str, int]
+    mood_onehot: np.ndarray
+    occasion_index: Dict[str, int]
+    occasion_onehot: np.ndarray
+    style_index: Dict[str, int]
+    style_onehot: np.ndarray
+    skin_index: Dict[str, int]
+    skin_bits: np.ndarray
+    gender_index: Dict[str, int]
+    gender_codes: np.ndarray
+    longevity: np.ndarray
+    sillage: np.ndarray
+    price: np.ndarray
+    base: np.ndarray
+    baselines: Dict[Tuple[Optional[str], Optional[str]], np.ndarray] = field(default_factory=dict)
+
+    @property
+    def size(self) -> int:
+        return len(self.perfumes)
+
+    def skin_mask(self, skin_type: str) -> np.ndarray:
+        """Query bitset with every skin token containing ``skin_type``"""
+        mask = np.zeros(self.skin_bits.shape[1], dtype=np.uint64)
+        needle = skin_type.strip().lower()
+        for token, bit in self.skin_index.items():
+            if needle and needle in token:
+                mask[bit // 64] |= np.uint64(1 << (bit % 64))
+        return mask
+
+
+def build_columns(perfumes: Sequence[PerfumeData], fingerprint: str = '') -> ColumnarCatalog:
+    mood_index, mood_onehot = _one_hot([p.mood_tag for p in perfumes])
+    occasion_index, occasion_onehot = _one_hot([p.occasion_tag for p in perfumes])
+    style_index, style_onehot = _one_hot([p.style_tag for p in perfumes])
+    tags = np.vstack([mood_onehot, occasion_onehot, style_onehot])
+    occasion_offset = mood_onehot.shape[0]
+    style_offset = occasion_offset + occasion_onehot.shape[0]
+
+    skin_index: Dict[str, int] = {}
+    per_perfume = [[skin_index.setdefault(t, len(skin_index)) for t in _skin_tokens(p.skin_compatibility)] for p in perfumes]
+    words = max((len(skin_index) + 63) // 64, 1)
+    skin_bits = np.zeros((len(perfumes), words), dtype=np.uint64)
+    for row, bits in enumerate(per_perfume):
+        for bit in bits:
+            skin_bits[row, bit // 64] |= np.uint64(1 << (bit % 64))
+
+    gender_index: Dict[str, int] = {}
+    gender_codes = np.fromiter(
+        (gender_index.setdefault(_canonical_gender(p.gender), len(gender_index)) for p in perfumes),
+        dtype=np.int16,
+        count=len(perfumes),
+    )
+
+    longevity = _normalized([p.longevity_score for p in perfumes])
+    sillage = _normalized([p.sillage_score for p in perfumes])
+
+    return ColumnarCatalog(
+        fingerprint=fingerprint,
+        perfumes=tuple(perfumes),
+        tags=tags,
+        occasion_offset=occasion_offset,
+        style_offset=style_offset,
+        mood_index=mood_index,
+        mood_onehot=tags[:occasion_offset],
+        occasion_index=occasion_index,
+        occasion_onehot=tags[occasion_offset:style_offset],
+        style_index=style_index,
+        style_onehot=tags[style_offset:],
+        skin_index=skin_index,
+        skin_bits=skin_bits,
+        gender_index=gender_index,
+        gender_codes=gender_codes,
+        longevity=longevity,
+        sillage=sillage,
+        price=np.asarray([p.price for p in perfumes], dtype=np.float32),
+        base=(WEIGHTS['longevity'] * longevity + WEIGHTS['sillage'] * sillage).astype(np.float32),
+    )
+
+
+_columns: Optional[ColumnarCatalog] = None
+
+
+def columns_for(snapshot: CatalogSnapshot) -> ColumnarCatalog:
+    """Columnar view of ``snapshot``, rebuilt only when the catalog changes"""
+    global _columns
+    if _columns is None or _columns.fingerprint != snapshot.fingerprint or _columns.size != len(snapshot.perfumes):
+        _columns = build_columns(snapshot.perfumes, snapshot.fingerprint)
+    return _columns
+
+
+class ScoringContext(NamedTuple):
+    """One set of recommendation criteria"""
+    mood: Optional[str] = None
+    occasion: Optional[str] = None
+    style: Optional[str] = None
+    skin_type: Optional[str] = None
+    gender: Optional[str] = None
+    max_price: Optional[float] = None
+
+
+def _context_baseline(columns: ColumnarCatalog, skin_type: Optional[str], gender: Optional[str]) -> np.ndarray:
+    """Per-perfume score from everything except tags and budget, for one context.
+    Memoized per catalog since callers use a handful of skin/gender values.
+    """
+    key = (skin_type, gender)
+    cached = columns.baselines.get(key)
+    if cached is not None:
+        return cached
+
+    baseline = columns.base.copy()
+    if skin_type:
+        mask = columns.skin_mask(skin_type)
+        if mask.any():
+            baseline += np.float32(WEIGHTS['skin']) * (columns.skin_bits & mask).any(axis=1)
+    if gender:
+        exact = columns.gender_codes == columns.gender_index.get(_canonical_gender(gender), -1)
+        shared = columns.gender_codes == columns.gender_index.get('unisex', -1)
+        baseline += np.where(
+            exact,
+            np.float32(WEIGHTS['gender']),
+            np.where(shared, np.float32(WEIGHTS['gender'] / 2), np.float32(-GENDER_MISMATCH_PENALTY)),
+        )
+
+    if len(columns.baselines) < _MAX_CACHED_BASELINES:
+        columns.baselines[key] = baseline
+    return baseline
+
+
+def score_batch(columns: ColumnarCatalog, contexts: Sequence[ScoringContext]) -> np.ndarray:
+    """Weighted compatibility of every perfume with every context.
+
+    Returns a (contexts x perfumes) float32 matrix. Skin and gender terms
+    are computed once per distinct (skin, gender) pair and gathered into
+    rows; all tag matches are a single (contexts x tags) @ (tags x
+    perfumes) product with the weights folded into the query matrix.
+    """
+    baselines: Dict[Tuple[Optional[str], Optional[str]], int] = {}
+    rows = [baselines.setdefault((c.skin_type or None, c.gender or None), len(baselines)) for c in contexts]
+    table = np.stack([_context_baseline(columns, skin, gender) for skin, gender in baselines])
+    scores = table[rows]
+
+    query = np.zeros((len(contexts), columns.tags.shape[0]), dtype=np.float32)
+    for row, context in enumerate(contexts):
+        for weight, index, offset, tag in (
+            (WEIGHTS['mood'], columns.mood_index, 0, context.mood),
+            (WEIGHTS['occasion'], columns.occasion_index, columns.occasion_offset, context.occasion),
+            (WEIGHTS['style'], columns.style_index, columns.style_offset, context.style),
+        ):
+            column = index.get(tag) if tag else None
+            if column is not None:
+                query[row, offset + column] = weight
+    if query.any():
+        scores += query @ columns.tags
+
+    for row, context in enumerate(contexts):
+        if context.max_price:
+            over = np.clip((columns.price - context.max_price) / context.max_price, 0.0, 1.0)
+            scores[row] -= np.float32(BUDGET_PENALTY) * over.astype(np.float32)
+
+    return scores
+
+
+def score(
+    columns: ColumnarCatalog,
+    mood: Optional[str] = None,
+    occasion: Optional[str] = None,
+    style: Optional[str] = None,
+    skin_type: Optional[str] = None,
+    gender: Optional[str] = None,
+    max_price: Optional[float] = None,
+) -> np.ndarray:
+    """Weighted compatibility of every perfume with one context, in one pass"""
+    context = ScoringContext(mood, occasion, style, skin_type, gender, max_price)
+    return score_batch(columns, [context])[0]
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the ``k`` best scores, best first; ties keep catalog order.
+
+    Works on a single score vector or row-wise on a (contexts x perfumes) matrix.
+    Ties are broken by adding a position offset smaller than float32
+    resolution, so the selection does not depend on ``k``.
+    """
+    n = scores.shape[-1]
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(scores.shape[:-1] + (0,), dtype=np.int64)
+    # Ascending keys: best score first, earlier catalog position first on ties
+    keys = np.negative(scores, dtype=np.float64)
+    keys += np.arange(n) * (_TIE_BREAK / n)
+    if k < n:
+        candidates = np.argpartition(keys, k - 1, axis=-1)[..., :k]
+    else:
+        candidates = np.broadcast_to(np.arange(n), scores.shape)
+    order = np.argsort(np.take_along_axis(keys, candidates, axis=-1), axis=-1)
+    return np.take_along_axis(candidates, order, axis=-1)
+
+
+def to_compatibility(value: float) -> float:
+    """Map an engine score onto the 60-99 range shown to users"""
+    return round(60 + 39 * min(max(value, 0.0), 1.0), 1)
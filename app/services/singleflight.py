@@ -0,0 +1,62 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+from app.services.metrics import registry
+
+T = TypeVar("T")
+
+singleflight_calls = registry.counter(
+    "singleflight_calls_total",
+    "Calls through a single-flight group; role is leader (ran the call) or coalesced (shared its result)",
+    ("group", "role"),
+)
+
+# name -> group, for the admin endpoint
+groups: Dict[str, "SingleFlight"] = {}
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one in-flight call.
+
+    The first caller for a key starts the call as a task; callers arriving
+    while it runs await the same task and get its result or exception.
+    The key is released as soon as the call finishes, so nothing is cached
+    here. The task is shielded, so a caller that is cancelled does not
+    cancel the call for the others.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        groups[name] = self
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(call())
+            self._calls[key] = task
+            task.add_done_callback(lambda done, key=key: self._release(key, done))
+            self.leaders += 1
+            singleflight_calls.inc(self.name, "leader")
+        else:
+            self.coalesced += 1
+            singleflight_calls.inc(self.name, "coalesced")
+        return await asyncio.shield(task)
+
+    def _release(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Every caller may have been cancelled; don't log the error as unretrieved
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        calls = self.leaders + self.coalesced
+        return {
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "coalesced_ratio": round(self.coalesced / calls, 4) if calls else None,
+        }
@@ -0,0 +1,424 @@
+import re
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from itertools import accumulate
+from operator import itemgetter
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+# Keyword vocabularies used by the analyzers: vocabulary -> label -> keywords.
+# Label order is priority order: when several labels match, the first one
+# listed wins, the same as the if/elif chains these replace.
+VOCABULARIES: Dict[str, Dict[str, List[str]]] = {
+    # Shared by the Arabic middleware and AI Nose
+    'mood': {
+        'نشيط': ['منعش', 'نشيط', 'حيوي', 'طاقة', 'متحمس', 'fresh', 'energetic'],
+        'هادئ': ['هادئ', 'مسترخي', 'مريح', 'هدوء', 'بارد'],
+        'واثق': ['واثق', 'قوي', 'مؤثر', 'قائد', 'confident'],
+        'رومانسي': ['رومانسي', 'حب', 'موعد', 'عاطفي', 'أمسية خاصة'],
+        'سعيد': ['سعيد', 'فرح', 'مبسوط', 'مرح', 'adventurous'],
+    },
+    'occasion': {
+        'يومي': ['صيف', 'يومي', 'عادي', 'بيت', 'منزل', 'منعش'],
+        'عمل': ['عمل', 'مكتب', 'اجتماع', 'مقابلة'],
+        'موعد': ['موعد', 'لقاء', 'خروج', 'أمسية خاصة', 'رومانسي'],
+        'حفلة': ['حفلة', 'احتفال', 'مناسبة', 'عيد'],
+        'زفاف': ['زفاف', 'عرس', 'زواج'],
+    },
+    # Mood Advisor
+    'feeling': {
+        'سعيد': ['سعيد', 'فرح', 'مبسوط'],
+        'حزين': ['حزين', 'زعلان', 'مكتئب'],
+        'غاضب': ['غضبان', 'زعلان', 'متضايق'],
+        'هادئ': ['هادئ', 'مسترخي', 'مريح'],
+        'متوتر': ['متوتر', 'قلقان', 'خايف'],
+        'نشيط': ['نشيط', 'حيوي', 'متحمس'],
+    },
+    # Occasion Detector
+    'event': {
+        'عمل': ['عمل', 'مكتب', 'اجتماع'],
+        'حفلة': ['حفلة', 'احتفال', 'عيد'],
+        'زفاف': ['زفاف', 'عرس'],
+        'موعد': ['موعد', 'لقاء'],
+    },
+    'skin_type': {
+        'دهنية': ['دهنية', 'زيتية', 'لامعة'],
+        'جافة': ['جافة', 'خشنة', 'متشققة'],
+        'حساسة': ['حساسة', 'تتهيج', 'حكة'],
+        'مختلطة': ['مختلطة', 'منطقة دهنية'],
+    },
+    'style': {
+        'كلاسيكي': ['كلاسيكي', 'رسمي', 'أنيق'],
+        'عصري': ['عصري', 'حديث', 'موضة'],
+        'رياضي': ['رياضي', 'كاجوال', 'مريح'],
+    },
+    'personality': {
+        'القائد الواثق': ['قائد', 'قوي', 'مؤثر', 'واثق'],
+        'الرومانسي الحالم': ['رومانسي', 'حب', 'عاطفي'],
+        'العصري المبدع': ['عصري', 'حديث', 'موضة'],
+        'الهادئ المتوازن': ['هادئ', 'مسالم', 'بسيط'],
+    },
+    # Gift Selector
+    'gift_recipient': {
+        'والدتك': ['أم', 'والدة', 'ماما'],
+        'زوجتك': ['زوجة', 'زوجتي'],
+        'أختك': ['أخت', 'أختي'],
+    },
+    'gift_occasion': {
+        'عيد الأم': ['عيد الأم', 'يوم الأم'],
+        'عيد ميلاد': ['عيد ميلاد', 'ميلاد'],
+        'زفاف': ['زفاف', 'عرس'],
+    },
+    'female_recipient': {
+        'Female': ['أم', 'زوجة', 'أخت', 'بنت'],
+    },
+    # Notes a customer mentions (Perfume Memory, Description Generator, Price Optimizer)
+    'note': {
+        'عود': ['عود'],
+        'ورد': ['ورد'],
+        'ياسمين': ['ياسمين'],
+        'عنبر': ['عنبر'],
+        'مسك': ['مسك'],
+    },
+    'note_family': {
+        'حمضيات': ['حمضيات'],
+        'زهور': ['زهور'],
+        'خشب': ['خشب'],
+    },
+    # Bottle Renderer
+    'bottle_shape': {
+        'دائري': ['دائري'],
+        'مستطيل': ['مستطيل'],
+    },
+    'bottle_color': {
+        'أزرق': ['أزرق'],
+        'أحمر': ['أحمر'],
+        'أخضر': ['أخضر'],
+    },
+    'bottle_size': {
+        '50': ['50'],
+        '75': ['75'],
+        '150': ['150'],
+    },
+}
+
+# Harakat, tanween, shadda, sukun, superscript alef and tatweel
+_REMOVED = 'ًٌٍَُِّْٰٕٖٜٟٓٔٗ٘ٙٚٛٝٞـ'
+_REMOVED_CHARS = re.compile('[' + _REMOVED + ']')
+# Letter variants folded to one spelling (str.replace is much faster than
+# str.translate on non-ASCII text)
+_FOLDED = (
+    ('أ', 'ا'), ('إ', 'ا'), ('آ', 'ا'), ('ٱ', 'ا'),
+    ('ة', 'ه'),
+    ('ى', 'ي'),
+    ('ؤ', 'و'),
+    ('ئ', 'ي'),
+)
+
+# Keywords this short (and numbers) only match a whole word, optionally with a
+# clitic; otherwise e.g. "ام" would match inside "امس" once hamza is folded
+_SHORT_KEYWORD = 2
+_PREFIXES = ('', 'ال', 'و', 'ب', 'ل', 'لل', 'وال', 'بال', 'فال', 'يا')
+# Short keywords that are also verb stems take the imperfect prefixes too
+# ("أحب", "يحب" and "وتحب" match "حب"); nouns do not, or "ام" would match
+# "تام" and "نام"
+_VERB_KEYWORDS = ('حب',)
+_VERB_PREFIXES = _PREFIXES + (
+    # أ/ي/ت/ن (hamza already folded) and their و/ف forms
+    'ا', 'ي', 'ت', 'ن', 'وا', 'وي', 'وت', 'ون', 'فا', 'في', 'فت', 'فن',
+)
+_SUFFIXES = ('', 'ي', 'ك', 'ه', 'ها', 'نا')
+
+
+def normalize(text: str) -> str:
+    """Lower-case and fold Arabic spelling variants so keywords match any of them"""
+    text = _REMOVED_CHARS.sub('', text.lower())
+    for variant, letter in _FOLDED:
+        if variant in text:
+            text = text.replace(variant, letter)
+    return text
+
+
+def _span_mapper(text: str) -> Callable[[int, int], Tuple[int, int]]:
+    """Maps a (start, end) span of ``normalize(text)`` back onto ``text``"""
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        # lower() changed the length (rare non-Arabic characters); map char by char
+        offsets = [i for i, char in enumerate(text) for _ in normalize(char)]
+        return lambda start, end: (offsets[start], offsets[end - 1] + 1)
+    # Index in the normalized text where each dropped character was
+    removals = [m.start() - count for count, m in enumerate(_REMOVED_CHARS.finditer(lowered))]
+    return lambda start, end: (start + bisect_right(removals, start), end + bisect_left(removals, end))
+
+
+class Keyword(NamedTuple):
+    vocabulary: str
+    label: str
+    keyword: str
+    priority: int
+
+
+class Match(NamedTuple):
+    """One keyword occurrence; ``start``/``end`` index the original text"""
+    vocabulary: str
+    label: str
+    keyword: str
+    start: int
+    end: int
+
+
+def _trie_pattern(node: dict) -> str:
+    """Regex for a trie of keywords; alternatives are greedy, so the longest
+    keyword starting at a position is the one that matches"""
+    branches = [re.escape(char) + _trie_pattern(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ''
+    body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    if '' in node:
+        # A keyword ends here; longer ones are tried first
+        body = ('(?:' + body + ')' if len(branches) == 1 and len(body) > 1 else body) + '?'
+    return body
+
+
+class KeywordAutomaton:
+    """Aho–Corasick-style matcher over every keyword of every vocabulary.
+
+    The keyword trie is compiled into one regular expression, so the scan
+    runs in the regex engine instead of a Python loop per character. At each
+    position the trie yields the longest keyword starting there; every
+    shorter keyword starting there is one of its prefixes, so the prefix
+    closure of each keyword gives all (overlapping) occurrences, exactly
+    like the goto/fail automaton would.
+
+    A keyword without spaces can only occur inside one word, so those are
+    matched per distinct word and the result is cached: long texts repeat
+    most of their words, and the regex engine is slow on Arabic text, so
+    the trie is not tried at every position again. The few multi-word
+    keywords are looked up with ``str.find``.
+    """
+
+    def __init__(self, vocabularies: Dict[str, Dict[str, Sequence[str]]], word_cache_size: int = 4096):
+        self.keywords: List[Keyword] = []
+        by_pattern: Dict[str, List[int]] = {}
+        for vocabulary, labels in vocabularies.items():
+            for priority, (label, words) in enumerate(labels.items()):
+                for word in words:
+                    pattern = normalize(word)
+                    if pattern:
+                        by_pattern.setdefault(pattern, []).append(len(self.keywords))
+                        self.keywords.append(Keyword(vocabulary, label, word, priority))
+
+        self._words = _Trie({p: ids for p, ids in by_pattern.items() if len(p.split()) == 1})
+        # word -> (keyword id, start, end) of the keywords inside it
+        self._word_hits: Dict[str, Sequence[Tuple[int, int, int]]] = {}
+        self.word_cache_size = word_cache_size
+        verbs = {normalize(word) for word in _VERB_KEYWORDS}
+        self._phrases = [
+            (pattern, ids, _word_prefixes(pattern, verbs))
+            for pattern, ids in by_pattern.items() if len(pattern.split()) != 1
+        ]
+
+    def _scan_words(self, words: Set[str]) -> Dict[str, Sequence[Tuple[int, int, int]]]:
+        """Word hits with every word of ``words`` in it. Words not seen before
+        are scanned together, in one run of the trie over them joined by
+        newlines, which cannot be part of a keyword."""
+        cache = self._word_hits
+        missing = [word for word in words if word not in cache]
+        if missing:
+            if len(cache) + len(missing) > self.word_cache_size:
+                cache.clear()
+                missing = list(words)
+            # Where each word ends in the joined text, newline included
+            ends = list(accumulate(map((1).__add__, map(len, missing))))
+            hits: Dict[str, List[Tuple[int, int, int]]] = {}
+            for keyword_id, start, end in self._words.search("\n".join(missing)):
+                index = bisect_right(ends, start)
+                word = missing[index]
+                offset = ends[index] - len(word) - 1
+                hits.setdefault(word, []).append((keyword_id, start - offset, end - offset))
+            cache.update(dict.fromkeys(missing, ()))
+            cache.update(hits)
+        return cache
+
+    def keyword_ids(self, text: str) -> Set[int]:
+        """Ids of the keywords found in already-normalized ``text``; cheaper
+        than ``search`` since each distinct word is only looked at once"""
+        words = set(text.split())
+        word_hits = self._scan_words(words)
+        found = {keyword_id for word in words for keyword_id, _, _ in word_hits[word]}
+        for pattern, keyword_ids, prefixes in self._phrases:
+            start = text.find(pattern)
+            while start != -1:
+                if prefixes is None or _is_word_match(text, start, start + len(pattern), prefixes):
+                    found.update(keyword_ids)
+                    break
+                start = text.find(pattern, start + 1)
+        return found
+
+    def search(self, text: str) -> List[Tuple[int, int, int]]:
+        """(keyword id, start, end) of every occurrence in already-normalized ``text``"""
+        found = []
+        find = text.find
+        size = len(text)
+        words = set(text.split())
+        word_hits = self._scan_words(words)
+        for word in words:
+            hits = word_hits[word]
+            if not hits:
+                continue
+            # Every place the word stands on its own, not inside a longer one
+            offset = find(word)
+            while offset != -1:
+                end = offset + len(word)
+                if (offset == 0 or text[offset - 1].isspace()) and (end == size or text[end].isspace()):
+                    found.extend((keyword_id, offset + start, offset + stop) for keyword_id, start, stop in hits)
+                    offset = find(word, end)
+                else:
+                    offset = find(word, offset + 1)
+
+        for pattern, keyword_ids, prefixes in self._phrases:
+            start = find(pattern)
+            while start != -1:
+                stop = start + len(pattern)
+                if prefixes is None or _is_word_match(text, start, stop, prefixes):
+                    found.extend((keyword_id, start, stop) for keyword_id in keyword_ids)
+                start = find(pattern, start + 1)
+        found.sort(key=itemgetter(1, 2))
+        return found
+
+
+class _Trie:
+    """One compiled keyword trie and the prefix closure of its keywords"""
+
+    def __init__(self, by_pattern: Dict[str, List[int]]):
+        trie: dict = {}
+        for pattern in by_pattern:
+            node = trie
+            for char in pattern:
+                node = node.setdefault(char, {})
+            node[''] = {}
+        self.regex = re.compile('(?=(' + _trie_pattern(trie) + '))') if by_pattern else None
+
+        # Longest match -> (keyword ids, length, word prefixes allowed or None
+        # if it may match inside a word) of it and of every keyword that is a
+        # prefix of it
+        verbs = {normalize(word) for word in _VERB_KEYWORDS}
+        self.closure: Dict[str, List[Tuple[List[int], int, Optional[Tuple[str, ...]]]]] = {}
+        for pattern in by_pattern:
+            self.closure[pattern] = [
+                (by_pattern[prefix], len(prefix), _word_prefixes(prefix, verbs))
+                for prefix in (pattern[:length] for length in range(1, len(pattern) + 1))
+                if prefix in by_pattern
+            ]
+
+    def search(self, text: str) -> List[Tuple[int, int, int]]:
+        if self.regex is None:
+            return []
+        closure = self.closure
+        found = []
+        for match in self.regex.finditer(text):
+            start = match.start()
+            for keyword_ids, length, prefixes in closure[match.group(1)]:
+                end = start + length
+                if prefixes is not None and not _is_word_match(text, start, end, prefixes):
+                    continue
+                for keyword_id in keyword_ids:
+                    found.append((keyword_id, start, end))
+        return found
+
+
+def _word_prefixes(pattern: str, verbs: Set[str]) -> Optional[Tuple[str, ...]]:
+    """Prefixes a short keyword may have; None if it may match anywhere"""
+    if len(pattern) > _SHORT_KEYWORD and not pattern.isdigit():
+        return None
+    return _VERB_PREFIXES if pattern in verbs else _PREFIXES
+
+
+def _is_word_match(text: str, start: int, end: int, prefixes: Tuple[str, ...] = _PREFIXES) -> bool:
+    """Whether ``text[start:end]`` is a whole word, allowing ``prefixes`` and
+    common suffixes; numbers only need to not be part of a longer number"""
+    if text[start:end].isdigit():
+        return not (start > 0 and text[start - 1].isdigit()) and not (end < len(text) and text[end].isdigit())
+    word_start, word_end = start, end
+    while word_start > 0 and text[word_start - 1].isalnum():
+        word_start -= 1
+    while word_end < len(text) and text[word_end].isalnum():
+        word_end += 1
+    return text[word_start:start] in prefixes and text[end:word_end] in _SUFFIXES
+
+
+class TextAnalysis:
+    """Every keyword match found in one text.
+
+    ``first``/``labels`` answer from a per-vocabulary summary built during
+    the scan; ``matches`` (with positions) is only searched for when used.
+    """
+
+    __slots__ = ("_text", "_normalized", "_matches", "labels_by_vocabulary")
+
+    def __init__(self, text: str, normalized: str, labels_by_vocabulary: Dict[str, Tuple[str, ...]]):
+        self._text = text
+        self._normalized = normalized
+        self._matches: Optional[Tuple[Match, ...]] = None
+        # vocabulary -> matched labels, highest priority first
+        self.labels_by_vocabulary = labels_by_vocabulary
+
+    @property
+    def matches(self) -> Tuple[Match, ...]:
+        if self._matches is None:
+            text, normalized = self._text, self._normalized
+            to_original = _span_mapper(text) if len(normalized) != len(text) else None
+            keywords = _automaton.keywords
+            matches = []
+            for keyword_id, start, end in _automaton.search(normalized):
+                if to_original is not None:
+                    start, end = to_original(start, end)
+                keyword = keywords[keyword_id]
+                matches.append(Match(keyword.vocabulary, keyword.label, keyword.keyword, start, end))
+            self._matches = tuple(matches)
+        return self._matches
+
+    def labels(self, vocabulary: str) -> List[str]:
+        """Matched labels of ``vocabulary`` in priority order"""
+        return list(self.labels_by_vocabulary.get(vocabulary, ()))
+
+    def first(self, vocabulary: str, default: Optional[str] = None) -> Optional[str]:
+        """Highest-priority matched label of ``vocabulary``, or ``default``"""
+        labels = self.labels_by_vocabulary.get(vocabulary)
+        return labels[0] if labels else default
+
+    def has(self, vocabulary: str, label: Optional[str] = None) -> bool:
+        labels = self.labels_by_vocabulary.get(vocabulary, ())
+        return bool(labels) if label is None else label in labels
+
+
+_automaton = KeywordAutomaton(VOCABULARIES)
+
+
+@lru_cache(maxsize=1024)
+def analyze(text: str) -> TextAnalysis:
+    """Normalize ``text`` once and match it against all vocabularies in one pass.
+
+    Cached per text, so the middleware and the handler of the same request
+    (and every extractor a handler calls) share one scan.
+
+    >>> analyze('أحب العطور الشرقية').first('mood')
+    'رومانسي'
+    >>> analyze('كان ذلك امس').has('gift_recipient')
+    False
+    >>> [analyze(text).has(vocabulary) for text in ('العمل تام', 'نام الطفل')
+    ...  for vocabulary in ('gift_recipient', 'female_recipient')]
+    [False, False, False, False]
+    """
+    if not text:
+        return TextAnalysis('', '', {})
+    normalized = normalize(text)
+
+    keywords = _automaton.keywords
+    ranked: Dict[str, Dict[str, int]] = {}
+    for keyword_id in _automaton.keyword_ids(normalized):
+        vocabulary, label, _, priority = keywords[keyword_id]
+        ranked.setdefault(vocabulary, {})[label] = priority
+    labels_by_vocabulary = {
+        vocabulary: tuple(sorted(labels, key=labels.__getitem__)) for vocabulary, labels in ranked.items()
+    }
+    return TextAnalysis(text, normalized, labels_by_vocabulary)
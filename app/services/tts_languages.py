@@ -0,0 +1,153 @@
+import re
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+# Letters by script. Latin text is read as English, the only Latin-script
+# language we have voices for; anything else is "other".
+_RUNS = re.compile(
+    "(?P<ar>[\u0600-\u06ff\u0750-\u077f\u08a0-\u08ff\ufb50-\ufdff\ufe70-\ufefe]+)"
+    "|(?P<en>[A-Za-z\u00c0-\u024f]+)"
+    r"|(?P<other>[^\W\d_]+)"
+)
+
+# Most of our text comes from the Arabic analyzers; digits and punctuation
+# alone are read by an Arabic voice
+DEFAULT_LANGUAGE = "ar"
+
+# A run of another script shorter than this (a brand name, "Oud Wood") is
+# read by the surrounding segment's voice rather than switching voices
+MIN_SEGMENT_LETTERS = 16
+
+
+class Segment(NamedTuple):
+    language: str
+    text: str
+
+
+def _letters(text: str) -> int:
+    return sum(len(m.group()) for m in _RUNS.finditer(text))
+
+
+def split_languages(text: str) -> List[Segment]:
+    """``text`` cut into consecutive single-language segments.
+
+    Spaces, digits and punctuation stay with the segment before them, and
+    short runs of another script are folded into their neighbour, so most
+    texts come back as one segment. Joining the segments' text gives back
+    ``text``.
+    """
+    # (language, start offset) of each run of letters in one script
+    runs = [(match.lastgroup, match.start()) for match in _RUNS.finditer(text)]
+    if not runs:
+        return [Segment(DEFAULT_LANGUAGE, text)]
+
+    spans = []
+    for language, start in runs:
+        if spans and spans[-1][0] == language:
+            continue
+        spans.append([language, 0 if not spans else start])
+    bounds = [start for _, start in spans[1:]] + [len(text)]
+    segments = [[language, text[start:end]] for (language, start), end in zip(spans, bounds)]
+
+    # Fold short segments into the previous one (the next one at the start),
+    # then join neighbours that now share a language
+    merged: List[List[str]] = []
+    for language, part in segments:
+        if merged and (_letters(part) < MIN_SEGMENT_LETTERS or merged[-1][0] == language):
+            merged[-1][1] += part
+        elif merged and _letters(merged[-1][1]) < MIN_SEGMENT_LETTERS:
+            merged[-1] = [language, merged[-1][1] + part]
+        else:
+            merged.append([language, part])
+    return [Segment(language, part) for language, part in merged]
+
+
+def voice_language(voice: str) -> str:
+    """"ar" for "ar-SA-HamedNeural"; Edge voice names start with the language code"""
+    return voice.split("-", 1)[0].lower()
+
+
+def routing_table(voices: Sequence[str]) -> Dict[str, List[str]]:
+    """Language -> voices that speak it, in the order given"""
+    table: Dict[str, List[str]] = {}
+    for voice in voices:
+        table.setdefault(voice_language(voice), []).append(voice)
+    return table
+
+
+def candidate_voices(table: Dict[str, List[str]], language: str, requested: Optional[str] = None) -> List[str]:
+    """Voices to try for text in ``language``, the requested one first if it
+    speaks it. A language we have no voice for gets every voice."""
+    voices = table.get(language)
+    if voices is None:
+        voices = [voice for group in table.values() for voice in group]
+    if requested in voices:
+        voices = [requested] + [voice for voice in voices if voice != requested]
+    return list(voices)
+
+
+# Where long text may be cut, best first: paragraphs, sentences (Arabic
+# question mark and full stop included), clauses, words. The whitespace
+# after a break stays with the text before it.
+_BREAKS = (
+    re.compile(r"\n\s*\n\s*"),
+    re.compile(r"(?<=[.!?؟۔…])\s+|\n\s*"),
+    re.compile(r"(?<=[،,؛;:])\s+"),
+    re.compile(r"\s+"),
+)
+_WORD = re.compile(r"[^\W_]")
+
+
+def _cut(text: str, pattern: "re.Pattern") -> List[str]:
+    ends = [match.end() for match in pattern.finditer(text) if 0 < match.end() < len(text)]
+    return [text[start:end] for start, end in zip([0] + ends, ends + [len(text)])]
+
+
+def split_text(text: str, max_chars: int, first_max_chars: Optional[int] = None) -> List[str]:
+    """``text`` in consecutive pieces of at most ``max_chars``, cut at the
+    best break available (see ``_BREAKS``) and packed greedily.
+
+    The first piece may be held to ``first_max_chars`` so its audio starts
+    sooner. Pieces without letters are joined to their neighbour, since
+    there is nothing in them to read. Joining the pieces gives back ``text``.
+    """
+    pieces: List[str] = []
+    current = ""
+    limit = first_max_chars or max_chars
+
+    def add(part: str, level: int) -> None:
+        nonlocal current, limit
+        if len(current) + len(part) <= limit:
+            current += part
+            return
+        if current:
+            pieces.append(current)
+            current = ""
+            limit = max_chars
+        if len(part) <= limit:
+            current = part
+        elif level < len(_BREAKS) and len(_cut(part, _BREAKS[level])) > 1:
+            for sub in _cut(part, _BREAKS[level]):
+                add(sub, level + 1)
+        elif level < len(_BREAKS):
+            add(part, level + 1)
+        else:
+            # One word longer than the limit
+            while len(part) > limit:
+                pieces.append(part[:limit])
+                part = part[limit:]
+                limit = max_chars
+            current = part
+
+    add(text, 0)
+    if current:
+        pieces.append(current)
+
+    readable: List[str] = []
+    for piece in pieces:
+        if readable and not _WORD.search(piece):
+            readable[-1] += piece
+        elif readable and not _WORD.search(readable[-1]):
+            readable[-1] += piece
+        else:
+            readable.append(piece)
+    return readable
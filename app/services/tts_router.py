@@ -0,0 +1,351 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, NamedTuple, Optional, Set
+
+from app.services.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Time allowed from the start of a request until some provider produces
+# audio, across every attempt, hedge and fallback
+TTS_DEADLINE_MS = float(os.getenv("TTS_DEADLINE_MS", "10000"))
+# How long a single voice may take to produce its first chunk
+TTS_ATTEMPT_TIMEOUT_MS = float(os.getenv("TTS_ATTEMPT_TIMEOUT_MS", "4000"))
+# How long to wait on an attempt before starting the next candidate beside it
+TTS_HEDGE_DELAY_MS = float(os.getenv("TTS_HEDGE_DELAY_MS", "1000"))
+# Consecutive failures that open a voice's (or provider's) circuit, and how
+# long it stays open before one trial request is let through
+TTS_BREAKER_FAILURES = int(os.getenv("TTS_BREAKER_FAILURES", "3"))
+TTS_BREAKER_COOLDOWN_SECONDS = float(os.getenv("TTS_BREAKER_COOLDOWN_SECONDS", "30"))
+
+# Outcomes kept per target for the success rate, and the EWMA weight of a new latency sample
+HEALTH_WINDOW = 20
+LATENCY_ALPHA = 0.3
+# A target with at least this many recent outcomes and a success rate
+# under DEGRADED_SUCCESS_RATE is tried after its provider's healthy ones
+DEGRADED_MIN_SAMPLES = 3
+DEGRADED_SUCCESS_RATE = 0.5
+# Voices whose expected time to audio is within the same step keep the
+# order they were given in, so noise does not reshuffle them
+RANK_STEP_SECONDS = 0.25
+
+tts_attempts = registry.counter(
+    "tts_attempts_total",
+    "TTS synthesis attempts by target (provider/voice), text language and outcome: ok, error, timeout, cancelled (lost a hedge) or skipped (circuit open)",
+    ("target", "language", "outcome"),
+)
+tts_first_audio = registry.histogram(
+    "tts_first_audio_seconds",
+    "Time from starting a TTS attempt to its first audio, for attempts that produced audio, by language and provider",
+    ("language", "provider"),
+    buckets=(0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0),
+)
+tts_hedges = registry.counter("tts_hedged_attempts_total", "TTS attempts started beside a slow one")
+tts_circuit_open = registry.gauge(
+    "tts_circuit_open", "1 while a TTS voice or provider circuit is open or half-open", ("target",)
+)
+
+
+class Candidate(NamedTuple):
+    """One way to synthesize a request; ``open`` returns once audio starts.
+
+    With ``language`` set, the voice's health is also tracked for that
+    language and orders the candidates; a ``pinned`` candidate (the voice
+    the caller asked for) keeps its place ahead of its provider's others.
+    """
+    provider: str
+    voice: str
+    open: Callable[[], Awaitable[AsyncIterator[bytes]]]
+    language: Optional[str] = None
+    pinned: bool = False
+
+
+class TTSUnavailable(Exception):
+    pass
+
+
+class Health:
+    """Recent success rate, first-chunk latency EWMA and circuit breaker of
+    one provider, voice, or voice for one language ("ar:edge_tts/...").
+    Voices record every attempt; a provider records one outcome per
+    request, failing only when all its attempts failed.
+
+    The circuit opens after ``failures_to_open`` consecutive failures. Once
+    ``cooldown`` has passed it goes half-open and lets one trial through:
+    success closes it, failure opens it again.
+    """
+
+    def __init__(self, name: str, failures_to_open: int = TTS_BREAKER_FAILURES,
+                 cooldown: float = TTS_BREAKER_COOLDOWN_SECONDS):
+        self.name = name
+        self.failures_to_open = failures_to_open
+        self.cooldown = cooldown
+        self.outcomes: deque = deque(maxlen=HEALTH_WINDOW)
+        self.latency_ewma: Optional[float] = None
+        self.consecutive_failures = 0
+        self.state = "closed"
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+
+    def available(self, now: float) -> bool:
+        if self.state == "open" and now - self.opened_at >= self.cooldown:
+            self.state = "half_open"
+        return self.state == "closed" or (self.state == "half_open" and not self.trial_in_flight)
+
+    def begin(self) -> None:
+        if self.state == "half_open":
+            self.trial_in_flight = True
+
+    def release(self) -> None:
+        self.trial_in_flight = False
+
+    def success(self, latency: float) -> None:
+        self.outcomes.append(True)
+        self.latency_ewma = latency if self.latency_ewma is None else (
+            LATENCY_ALPHA * latency + (1 - LATENCY_ALPHA) * self.latency_ewma
+        )
+        self.consecutive_failures = 0
+        self.trial_in_flight = False
+        if self.state != "closed":
+            logger.info(f"TTS circuit for {self.name} closed")
+            self.state = "closed"
+            tts_circuit_open.set(self.name, value=0)
+
+    def outlasted(self, elapsed: float) -> None:
+        """Lost a hedge race after ``elapsed``: its latency is at least that"""
+        self.trial_in_flight = False
+        if self.latency_ewma is not None and elapsed > self.latency_ewma:
+            self.latency_ewma = LATENCY_ALPHA * elapsed + (1 - LATENCY_ALPHA) * self.latency_ewma
+
+    def failure(self, now: float) -> None:
+        self.outcomes.append(False)
+        self.consecutive_failures += 1
+        self.trial_in_flight = False
+        if self.state == "half_open" or (
+            self.state == "closed" and self.consecutive_failures >= self.failures_to_open
+        ):
+            logger.warning(f"TTS circuit for {self.name} opened after {self.consecutive_failures} failures")
+            self.state = "open"
+            self.opened_at = now
+            tts_circuit_open.set(self.name, value=1)
+
+    @property
+    def success_rate(self) -> Optional[float]:
+        return sum(self.outcomes) / len(self.outcomes) if self.outcomes else None
+
+    @property
+    def expected_seconds(self) -> float:
+        """Latency EWMA over success rate: roughly the time this target takes
+        to produce audio, counting retries. Infinite until it has produced audio once."""
+        if self.latency_ewma is None:
+            return float("inf")
+        return self.latency_ewma / max(self.success_rate, 0.05)
+
+    @property
+    def degraded(self) -> bool:
+        rate = self.success_rate
+        return len(self.outcomes) >= DEGRADED_MIN_SAMPLES and rate is not None and rate < DEGRADED_SUCCESS_RATE
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "success_rate": round(self.success_rate, 4) if self.outcomes else None,
+            "samples": len(self.outcomes),
+            "latency_ewma_ms": round(self.latency_ewma * 1000, 1) if self.latency_ewma is not None else None,
+            "consecutive_failures": self.consecutive_failures,
+        }
+
+
+async def _discard(stream: AsyncIterator[bytes]) -> None:
+    # Start the stream before closing it, so cleanup in its finally block runs
+    try:
+        await stream.__anext__()
+    except Exception:
+        pass
+    await stream.aclose()
+
+
+class TTSRouter:
+    """Picks and races TTS candidates for a request.
+
+    Candidates whose voice or provider circuit is open are skipped. Within
+    a provider, degraded voices go last and the rest are ordered by how
+    fast they have produced audio for the candidate's language, with
+    voices not measured yet after measured ones in the order given. The first
+    candidate starts at once; if it has not produced audio after
+    ``hedge_delay`` the next one starts beside it (at most two run at a
+    time), and a failure starts the next one immediately. The first to
+    produce audio wins and the others are cancelled, their latency raised
+    to at least the time they had run. Past ``deadline``
+    the request fails with TTSUnavailable, so the worst case no longer
+    grows with the number of voices.
+    """
+
+    def __init__(self, deadline: float = TTS_DEADLINE_MS / 1000,
+                 attempt_timeout: float = TTS_ATTEMPT_TIMEOUT_MS / 1000,
+                 hedge_delay: float = TTS_HEDGE_DELAY_MS / 1000):
+        self.deadline = deadline
+        self.attempt_timeout = attempt_timeout
+        self.hedge_delay = hedge_delay
+        self.health: Dict[str, Health] = {}
+        self._cleanup: Set[asyncio.Task] = set()
+
+    def _health(self, name: str) -> Health:
+        health = self.health.get(name)
+        if health is None:
+            health = self.health[name] = Health(name)
+        return health
+
+    def _voice_targets(self, candidate: Candidate) -> List[Health]:
+        """The voice's health, then its health for the candidate's language if set"""
+        voice = f"{candidate.provider}/{candidate.voice}"
+        targets = [self._health(voice)]
+        if candidate.language:
+            targets.append(self._health(f"{candidate.language}:{voice}"))
+        return targets
+
+    def _targets(self, candidate: Candidate) -> List[Health]:
+        return [self._health(candidate.provider)] + self._voice_targets(candidate)
+
+    def plan(self, candidates: List[Candidate]) -> List[Candidate]:
+        """Candidates to try, in order: open circuits dropped, the rest ranked by health.
+
+        Measured voices rank by expected time to audio, ahead of voices
+        that have not produced audio yet:
+
+        >>> from itertools import permutations
+        >>> router = TTSRouter()
+        >>> router._health("edge/a").success(2.0)
+        >>> router._health("edge/c").success(0.3)
+        >>> {tuple(c.voice for c in router.plan([Candidate("edge", v, None) for v in order]))
+        ...  for order in permutations("abc")}
+        {('c', 'a', 'b')}
+        """
+        now = time.monotonic()
+        providers = {c.provider: i for i, c in reversed(list(enumerate(candidates)))}
+        planned = []
+        for index, candidate in enumerate(candidates):
+            targets = self._voice_targets(candidate)
+            if all(health.available(now) for health in self._targets(candidate)):
+                # Unmeasured voices go after measured ones; inf // step is
+                # NaN, which would make the sort order arbitrary
+                expected = targets[-1].expected_seconds
+                unmeasured = expected == float("inf")
+                planned.append((
+                    providers[candidate.provider], not candidate.pinned,
+                    any(health.degraded for health in targets),
+                    unmeasured, 0 if unmeasured else int(expected // RANK_STEP_SECONDS), index, candidate,
+                ))
+            else:
+                tts_attempts.inc(targets[0].name, candidate.language or "", "skipped")
+        return [candidate for *_, candidate in sorted(planned, key=lambda p: p[:6])]
+
+    async def open(self, candidates: List[Candidate]) -> AsyncIterator[bytes]:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.deadline
+        queue = self.plan(candidates)
+        if not queue:
+            raise TTSUnavailable("Every TTS voice is failing; try again shortly")
+
+        running: Dict[asyncio.Task, Candidate] = {}
+        started: Dict[asyncio.Task, float] = {}
+        # Attempts launched and failed per provider; a provider counts as
+        # failing for this request only when every attempt on it failed
+        launched: Dict[str, int] = {}
+        failed: Dict[str, int] = {}
+        winner_provider = None
+        hedge_at = deadline
+
+        def launch(candidate: Candidate) -> None:
+            nonlocal hedge_at
+            for health in self._targets(candidate):
+                health.begin()
+            timeout = min(self.attempt_timeout, deadline - loop.time())
+            task = asyncio.ensure_future(asyncio.wait_for(candidate.open(), timeout))
+            running[task] = candidate
+            started[task] = loop.time()
+            launched[candidate.provider] = launched.get(candidate.provider, 0) + 1
+            hedge_at = loop.time() + self.hedge_delay
+
+        try:
+            while True:
+                now = loop.time()
+                if now >= deadline:
+                    raise TTSUnavailable(f"No TTS audio within {self.deadline:.1f}s")
+                if queue and (not running or (len(running) < 2 and now >= hedge_at)):
+                    if running:
+                        tts_hedges.inc()
+                        logger.info(f"Hedging slow TTS attempt with {queue[0].provider}/{queue[0].voice}")
+                    launch(queue.pop(0))
+                    continue
+                if not running:
+                    raise TTSUnavailable("All TTS providers failed")
+
+                wake = min(deadline, hedge_at) if queue and len(running) < 2 else deadline
+                done, _ = await asyncio.wait(running, timeout=max(0.0, wake - now),
+                                             return_when=asyncio.FIRST_COMPLETED)
+                winner = None
+                for task in done:
+                    candidate = running.pop(task)
+                    provider, *voice_targets = self._targets(candidate)
+                    name = voice_targets[0].name
+                    language = candidate.language or ""
+                    error = task.exception()
+                    if error is None and winner is None:
+                        winner = task.result()
+                        winner_provider = candidate.provider
+                        latency = loop.time() - started[task]
+                        for health in [provider] + voice_targets:
+                            health.success(latency)
+                        tts_attempts.inc(name, language, "ok")
+                        tts_first_audio.observe(latency, language, candidate.provider)
+                    elif error is None:
+                        # Two finished together; the other one is not needed
+                        self._close_later(task)
+                    else:
+                        timed_out = isinstance(error, asyncio.TimeoutError)
+                        logger.warning(f"TTS attempt {name} failed: {'timeout' if timed_out else error!r}")
+                        for health in voice_targets:
+                            health.failure(time.monotonic())
+                        failed[candidate.provider] = failed.get(candidate.provider, 0) + 1
+                        tts_attempts.inc(name, language, "timeout" if timed_out else "error")
+                if winner is not None:
+                    return winner
+        finally:
+            for task, candidate in running.items():
+                task.cancel()
+                self._close_later(task)
+                provider, *voice_targets = self._targets(candidate)
+                provider.release()
+                for health in voice_targets:
+                    if winner_provider is not None:
+                        health.outlasted(loop.time() - started[task])
+                    else:
+                        health.release()
+                tts_attempts.inc(f"{candidate.provider}/{candidate.voice}", candidate.language or "", "cancelled")
+            for name, count in launched.items():
+                if name != winner_provider and failed.get(name) == count:
+                    self._health(name).failure(time.monotonic())
+
+    def _close_later(self, task: asyncio.Task) -> None:
+        def close(done: asyncio.Task) -> None:
+            if done.cancelled() or done.exception() is not None:
+                return
+            cleanup = asyncio.ensure_future(_discard(done.result()))
+            self._cleanup.add(cleanup)
+            cleanup.add_done_callback(self._cleanup.discard)
+        task.add_done_callback(close)
+
+    def stats(self) -> dict:
+        return {
+            "deadline_ms": self.deadline * 1000,
+            "attempt_timeout_ms": self.attempt_timeout * 1000,
+            "hedge_delay_ms": self.hedge_delay * 1000,
+            "targets": {name: health.stats() for name, health in sorted(self.health.items())},
+        }
+
+
+tts_router = TTSRouter()
@@ -0,0 +1,160 @@
+import asyncio
+import math
+import os
+import time
+from typing import Optional
+
+from app.services.metrics import registry
+
+# Syntheses running at once (each opens up to TTS_SEGMENT_CONCURRENCY
+# provider connections), syntheses allowed to wait for a slot, and how
+# long one may wait before giving up
+TTS_MAX_CONCURRENCY = int(os.getenv("TTS_MAX_CONCURRENCY", "8"))
+TTS_MAX_QUEUE = int(os.getenv("TTS_MAX_QUEUE", "32"))
+TTS_QUEUE_TIMEOUT_SECONDS = float(os.getenv("TTS_QUEUE_TIMEOUT_SECONDS", "15"))
+
+# Weight of a new synthesis duration in the average used for Retry-After
+DURATION_ALPHA = 0.2
+
+tts_running = registry.gauge("tts_synthesis_running", "TTS syntheses holding a scheduler slot")
+tts_queued = registry.gauge("tts_synthesis_queued", "TTS syntheses waiting for a scheduler slot")
+tts_rejected = registry.counter(
+    "tts_synthesis_rejected_total", "TTS syntheses turned away: queue full, or waited too long", ("reason",)
+)
+tts_queue_wait = registry.histogram(
+    "tts_queue_wait_seconds", "Time TTS syntheses waited for a scheduler slot",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+
+class SchedulerFull(Exception):
+    """No room for another synthesis; ``retry_after`` is a hint in seconds"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Ticket:
+    """A synthesis admitted by the scheduler. ``async with ticket`` waits
+    for a slot and holds it for the block; ``release`` gives up a ticket
+    that was never used and is safe to call more than once."""
+
+    def __init__(self, scheduler: "TTSScheduler"):
+        self._scheduler = scheduler
+        self._holding = False
+        self._released = False
+        self._started = 0.0
+
+    async def __aenter__(self) -> "Ticket":
+        await self._scheduler._acquire(self)
+        self._holding = True
+        self._started = time.monotonic()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.release()
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._scheduler._release(self, time.monotonic() - self._started if self._holding else None)
+
+
+class TTSScheduler:
+    """Bounds TTS synthesis: ``max_concurrency`` run at once and at most
+    ``max_queue`` more wait, first come first served.
+
+    ``reserve`` is synchronous and raises SchedulerFull right away when
+    both are taken, so overload costs the caller nothing but a fast 503
+    with a Retry-After estimated from recent synthesis durations. A
+    ticket that waits longer than ``queue_timeout`` for its slot fails
+    the same way.
+    """
+
+    def __init__(self, max_concurrency: int = TTS_MAX_CONCURRENCY, max_queue: int = TTS_MAX_QUEUE,
+                 queue_timeout: float = TTS_QUEUE_TIMEOUT_SECONDS):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.admitted = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.duration_ewma: Optional[float] = None
+
+    @property
+    def slots(self) -> asyncio.Semaphore:
+        # Created on first use, inside the running event loop
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        return self._slots
+
+    @property
+    def queued(self) -> int:
+        return self.admitted - self.running
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free, from the average synthesis time"""
+        duration = self.duration_ewma or 1.0
+        rounds = (self.queued + 1) / self.max_concurrency
+        return max(1, min(60, math.ceil(duration * rounds)))
+
+    def reserve(self) -> Ticket:
+        if self.admitted >= self.max_concurrency + self.max_queue:
+            self.rejected += 1
+            tts_rejected.inc("full")
+            raise SchedulerFull("Text-to-speech is at capacity", self.retry_after())
+        self.admitted += 1
+        self._update_gauges()
+        return Ticket(self)
+
+    async def _acquire(self, ticket: Ticket) -> None:
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(self.slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            tts_rejected.inc("timeout")
+            ticket.release()
+            raise SchedulerFull("Timed out waiting for text-to-speech capacity", self.retry_after())
+        except BaseException:
+            ticket.release()
+            raise
+        tts_queue_wait.observe(time.monotonic() - started)
+        self.running += 1
+        self._update_gauges()
+
+    def _release(self, ticket: Ticket, duration: Optional[float]) -> None:
+        self.admitted -= 1
+        if duration is not None:
+            self.running -= 1
+            self.completed += 1
+            self.slots.release()
+            self.duration_ewma = duration if self.duration_ewma is None else (
+                DURATION_ALPHA * duration + (1 - DURATION_ALPHA) * self.duration_ewma
+            )
+        self._update_gauges()
+
+    def _update_gauges(self) -> None:
+        tts_running.set(value=self.running)
+        tts_queued.set(value=self.queued)
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "queue_timeout_seconds": self.queue_timeout,
+            "running": self.running,
+            "queued": self.queued,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "avg_duration_seconds": round(self.duration_ewma, 3) if self.duration_ewma is not None else None,
+            "retry_after_seconds": self.retry_after(),
+        }
+
+
+tts_scheduler = TTSScheduler()
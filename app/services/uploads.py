@@ -0,0 +1,90 @@
+import binascii
+import os
+import re
+from dataclasses import dataclass
+from tempfile import SpooledTemporaryFile
+from typing import Any, AsyncIterator, BinaryIO, Dict, Optional
+
+# Hard cap on one uploaded image/audio file, after base64 decoding
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+# Uploads up to this size stay in memory; larger ones spill to a temp file
+UPLOAD_SPOOL_BYTES = int(os.getenv("UPLOAD_SPOOL_BYTES", str(1024 * 1024)))
+
+# base64 text decoded per step; a multiple of 4 so steps align with quads
+_BASE64_STEP = 64 * 1024
+_BASE64_IGNORED = re.compile(r"[^A-Za-z0-9+/=]")
+
+
+class UploadTooLarge(Exception):
+    """The upload exceeded the configured size cap"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        super().__init__(f"Upload exceeds {limit} bytes")
+
+
+def _spool() -> SpooledTemporaryFile:
+    return SpooledTemporaryFile(max_size=UPLOAD_SPOOL_BYTES, mode="w+b")
+
+
+async def spool_stream(chunks: AsyncIterator[bytes], max_bytes: int = UPLOAD_MAX_BYTES) -> BinaryIO:
+    """Write a streamed body to a spooled buffer, stopping at ``max_bytes``"""
+    buffer = _spool()
+    size = 0
+    try:
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLarge(max_bytes)
+            buffer.write(chunk)
+    except BaseException:
+        buffer.close()
+        raise
+    buffer.seek(0)
+    return buffer
+
+
+def spool_base64(data: str, max_bytes: int = UPLOAD_MAX_BYTES) -> BinaryIO:
+    """Decode base64 text into a spooled buffer a step at a time.
+
+    Never holds a second full copy of the payload in memory. Characters
+    outside the base64 alphabet (line breaks, whitespace) are skipped, as
+    ``base64.b64decode`` does by default.
+    """
+    if len(data) * 3 // 4 > max_bytes + 3:
+        raise UploadTooLarge(max_bytes)
+    buffer = _spool()
+    carry = ""
+    size = 0
+    try:
+        for offset in range(0, len(data), _BASE64_STEP):
+            piece = carry + data[offset:offset + _BASE64_STEP]
+            if _BASE64_IGNORED.search(piece):
+                piece = _BASE64_IGNORED.sub("", piece)
+            usable = len(piece) - len(piece) % 4
+            carry = piece[usable:]
+            if usable:
+                decoded = binascii.a2b_base64(piece[:usable])
+                size += len(decoded)
+                if size > max_bytes:
+                    raise UploadTooLarge(max_bytes)
+                buffer.write(decoded)
+        if carry:
+            # Same error b64decode raises for a truncated final quad
+            raise binascii.Error("Incorrect padding")
+    except BaseException:
+        buffer.close()
+        raise
+    buffer.seek(0)
+    return buffer
+
+
+@dataclass
+class Upload:
+    """A binary upload plus the text fields sent with it"""
+    file: BinaryIO
+    content_type: Optional[str] = None
+    filename: Optional[str] = None
+    text: Optional[str] = None
+    options: Optional[Dict[str, Any]] = None
+    user_id: Optional[str] = None
@@ -0,0 +1,335 @@
+"""Local stand-ins for the services the server calls, for load testing.
+
+One ASGI app serves all of them:
+
+* ``/rest/v1/...`` an in-memory PostgREST: select lists (including the
+  ``ai_attributes(...)`` embed), the filter operators the client sends,
+  order/limit/offset, ``Prefer: count=exact``, insert/update/delete and
+  ``rpc/recommend_perfumes``.
+* ``/openweather`` the current-weather endpoint.
+* ``/elevenlabs`` the text-to-speech endpoint.
+
+Every call waits a fixed latency first so the server sees realistic
+network time. Edge-TTS speaks a websocket protocol and cannot be pointed
+elsewhere; ``FakeCommunicate`` replaces ``edge_tts.Communicate`` inside the
+benchmarked server process instead.
+"""
+import asyncio
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+MOODS = ["هادئ", "نشيط", "واثق", "رومانسي", "سعيد", "حزين", "متحمس"]
+OCCASIONS = ["يومي", "عمل", "موعد", "حفلة", "زفاف", "رسمي", "سهرة"]
+STYLES = ["كلاسيكي", "عصري", "رياضي", "أنيق"]
+SKINS = ["دهنية, عادية", "جافة", "عادية, جافة", "حساسة"]
+GENDERS = ["Male", "Female", "Unisex"]
+CONCENTRATIONS = ["Parfum", "EDP", "EDT", "EDC", "Extrait"]
+
+# Primary key column the fake assigns on insert
+PRIMARY_KEYS = {
+    "perfumes": "perfume_id",
+    "customers": "customer_id",
+    "ai_attributes": "attribute_id",
+    "ingredients": "ingredient_id",
+    "orders": "id",
+    "order_items": "order_item_id",
+    "customer_interactions": "interaction_id",
+    "prompts": "prompt_id",
+}
+
+
+def _timestamp(minutes_ago: int) -> str:
+    return (datetime.now(timezone.utc) - timedelta(minutes=minutes_ago)).isoformat()
+
+
+def seed(perfumes: int = 500, customers: int = 2000, orders: int = 5000, rng_seed: int = 7) -> Dict[str, List[dict]]:
+    """Tables with the shape of supabase/migrations/001 plus the columns the routers use"""
+    rng = random.Random(rng_seed)
+    tables: Dict[str, List[dict]] = {name: [] for name in PRIMARY_KEYS}
+    tables["users"] = []
+    tables["perfume_ingredients"] = []
+    for i in range(perfumes):
+        perfume_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        tables["perfumes"].append({
+            "perfume_id": perfume_id,
+            "name": f"عطر {i}",
+            "brand": f"دار {i % 40}",
+            "gender": GENDERS[i % 3],
+            "concentration": CONCENTRATIONS[i % 5],
+            "year_released": 2000 + i % 25,
+            "price": float(50 + (i * 37) % 450),
+            "ml_size": [50, 75, 100][i % 3],
+            "description_llm": "عطر شرقي دافئ بلمسات من العود والعنبر والفانيليا",
+            "created_at": _timestamp(i),
+        })
+        tables["ai_attributes"].append({
+            "attribute_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "perfume_id": perfume_id,
+            "mood_tag": rng.choice(MOODS),
+            "occasion_tag": rng.choice(OCCASIONS),
+            "style_tag": rng.choice(STYLES),
+            "longevity_score": rng.randint(1, 10),
+            "sillage_score": rng.randint(1, 10),
+            "skin_compatibility": rng.choice(SKINS),
+            "created_at": _timestamp(i),
+        })
+    for i in range(customers):
+        tables["customers"].append({
+            "customer_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "email": f"customer{i}@example.com",
+            "skin_type": rng.choice(SKINS),
+            "personality_map": {"type": rng.choice(STYLES)},
+            "preferences": [rng.choice(MOODS)],
+            "created_at": _timestamp(i),
+        })
+    for i in range(orders):
+        tables["orders"].append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "user_id": None,
+            "customer_name": f"عميل {i}",
+            "customer_email": f"customer{i % customers}@example.com",
+            "shipping_address": "شارع التحلية",
+            "total_amount": float(100 + i % 900),
+            "status": "pending",
+            "created_at": _timestamp(i),
+            "city": "الرياض",
+            "customer_phone": "0500000000",
+            "postal_code": "12345",
+            "payment_method": "card",
+        })
+    return tables
+
+
+def _parse_value(raw: str) -> Any:
+    if raw == "null":
+        return None
+    if raw in ("true", "false"):
+        return raw == "true"
+    return raw
+
+
+def _compare(value: Any, raw: str) -> Tuple[Any, Any]:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        try:
+            return value, float(raw)
+        except ValueError:
+            pass
+    if isinstance(value, bool):
+        return value, _parse_value(raw)
+    return ("" if value is None else str(value)), raw
+
+
+def _matches(row: dict, column: str, condition: str) -> bool:
+    operator, _, raw = condition.partition(".")
+    value = row.get(column)
+    if operator == "is":
+        return value is _parse_value(raw) if raw in ("null", "true", "false") else False
+    if operator == "in":
+        return str(value) in raw.strip("()").split(",")
+    if operator == "ilike":
+        return raw.replace("*", "").replace("%", "").lower() in str(value or "").lower()
+    left, right = _compare(value, raw)
+    try:
+        return {
+            "eq": left == right, "neq": left != right,
+            "gt": left > right, "gte": left >= right,
+            "lt": left < right, "lte": left <= right,
+        }[operator]
+    except (KeyError, TypeError):
+        return False
+
+
+def _split_select(select: str) -> List[str]:
+    columns, depth, current = [], 0, ""
+    for char in select:
+        if char == "," and depth == 0:
+            columns.append(current)
+            current = ""
+            continue
+        depth += char == "("
+        depth -= char == ")"
+        current += char
+    if current:
+        columns.append(current)
+    return [c.strip() for c in columns if c.strip()]
+
+
+class FakePostgrest:
+    def __init__(self, tables: Dict[str, List[dict]], latency: float):
+        self.tables = tables
+        self.latency = latency
+        self._attributes_by_perfume: Optional[Dict[str, List[dict]]] = None
+
+    def _project(self, table: str, row: dict, select: str) -> dict:
+        if select in ("", "*"):
+            return row
+        result = {}
+        for column in _split_select(select):
+            if column == "*":
+                result.update(row)
+            elif column.startswith("ai_attributes(") and table == "perfumes":
+                inner = column[len("ai_attributes("):-1]
+                if self._attributes_by_perfume is None:
+                    self._attributes_by_perfume = {}
+                    for attrs in self.tables["ai_attributes"]:
+                        self._attributes_by_perfume.setdefault(attrs["perfume_id"], []).append(attrs)
+                result["ai_attributes"] = [
+                    self._project("ai_attributes", attrs, inner)
+                    for attrs in self._attributes_by_perfume.get(row["perfume_id"], [])
+                ]
+            else:
+                result[column] = row.get(column)
+        return result
+
+    def _select_rows(self, table: str, params: List[Tuple[str, str]]) -> List[dict]:
+        rows = self.tables.setdefault(table, [])
+        for key, condition in params:
+            if key not in ("select", "order", "limit", "offset"):
+                rows = [row for row in rows if _matches(row, key, condition)]
+        return rows
+
+    def _recommend(self, params: dict) -> List[dict]:
+        perfumes = {p["perfume_id"]: p for p in self.tables["perfumes"]}
+        ranked = []
+        for attrs in self.tables["ai_attributes"]:
+            perfume = perfumes.get(attrs["perfume_id"])
+            if perfume is None:
+                continue
+            if params.get("p_max_price") is not None and perfume["price"] > params["p_max_price"]:
+                continue
+            score = 0.5
+            score += 0.2 * (attrs["mood_tag"] == params.get("p_mood"))
+            score += 0.2 * (attrs["occasion_tag"] == params.get("p_occasion"))
+            score += 0.1 * (attrs["style_tag"] == params.get("p_style"))
+            ranked.append({**perfume, **attrs, "score": score})
+        ranked.sort(key=lambda r: r["score"], reverse=True)
+        return ranked[: params.get("p_limit") or 3]
+
+    async def handle(self, request: Request) -> Response:
+        await asyncio.sleep(self.latency)
+        table = request.path_params["table"]
+        params = list(request.query_params.multi_items())
+        prefer = request.headers.get("prefer", "")
+        headers = {}
+        status = 200
+
+        if table.startswith("rpc/"):
+            body = orjson.loads(await request.body() or b"{}")
+            data = self._recommend(body) if table == "rpc/recommend_perfumes" else []
+        elif request.method == "GET":
+            rows = self._select_rows(table, params)
+            query = dict(params)
+            if "order" in query:
+                column, _, direction = query["order"].partition(".")
+                rows = sorted(rows, key=lambda r: str(r.get(column) or ""), reverse=direction == "desc")
+            offset = int(query.get("offset", 0))
+            limit = int(query["limit"]) if "limit" in query else None
+            page = rows[offset: offset + limit if limit is not None else None]
+            data = [self._project(table, row, query.get("select", "*")) for row in page]
+            if "count=exact" in prefer:
+                headers["content-range"] = f"{offset}-{offset + len(data) - 1}/{len(rows)}"
+        elif request.method == "POST":
+            body = orjson.loads(await request.body())
+            new_rows = body if isinstance(body, list) else [body]
+            key = PRIMARY_KEYS.get(table)
+            stored = []
+            for row in new_rows:
+                row = dict(row)
+                if key and not row.get(key):
+                    row[key] = str(uuid.uuid4())
+                row.setdefault("created_at", _timestamp(0))
+                stored.append(row)
+            self.tables.setdefault(table, []).extend(stored)
+            status = 201
+            data = stored
+        elif request.method == "PATCH":
+            values = orjson.loads(await request.body())
+            data = []
+            for row in self._select_rows(table, params):
+                row.update(values)
+                data.append(row)
+        elif request.method == "DELETE":
+            doomed = self._select_rows(table, params)
+            ids = {id(row) for row in doomed}
+            self.tables[table] = [row for row in self.tables[table] if id(row) not in ids]
+            data = doomed
+        else:
+            return Response(status_code=405)
+
+        if table in ("perfumes", "ai_attributes") and request.method != "GET":
+            self._attributes_by_perfume = None
+        if "return=minimal" in prefer:
+            return Response(status_code=201 if status == 201 else 204, headers=headers)
+        return Response(orjson.dumps(data), status_code=status, media_type="application/json", headers=headers)
+
+
+def create_app(
+    tables: Optional[Dict[str, List[dict]]] = None,
+    db_latency: float = 0.005,
+    weather_latency: float = 0.05,
+    tts_latency: float = 0.2,
+) -> Starlette:
+    postgrest = FakePostgrest(tables if tables is not None else seed(), db_latency)
+
+    async def openweather(request: Request) -> Response:
+        await asyncio.sleep(weather_latency)
+        return Response(orjson.dumps({
+            "name": "Riyadh",
+            "weather": [{"main": "Clear", "description": "سماء صافية"}],
+            "main": {"temp": 31.2, "feels_like": 30.4, "humidity": 18},
+            "wind": {"speed": 3.6},
+            "sys": {"country": "SA"},
+        }), media_type="application/json")
+
+    async def elevenlabs(request: Request) -> Response:
+        body = orjson.loads(await request.body())
+        await asyncio.sleep(tts_latency)
+        return Response(_fake_audio(body.get("text", "")), media_type="audio/mpeg")
+
+    return Starlette(routes=[
+        Route("/rest/v1/{table:path}", postgrest.handle, methods=["GET", "POST", "PATCH", "DELETE"]),
+        Route("/openweather", openweather),
+        Route("/elevenlabs", elevenlabs, methods=["POST"]),
+    ])
+
+
+def _fake_audio(text: str) -> bytes:
+    # Roughly the size of 32 kbps speech at 15 characters per second
+    return b"\xff\xf3" * max(512, len(text) * 130)
+
+
+class FakeCommunicate:
+    """Drop-in for ``edge_tts.Communicate`` that streams silence.
+
+    Audio arrives in 4 KB chunks spread over ``latency`` seconds, the way
+    the real service streams them. Set ``fail_rate`` to make a share of
+    calls raise ``NoAudioReceived`` so the voice fallback chain runs.
+    """
+
+    latency = 0.3
+    fail_rate = 0.0
+
+    def __init__(self, text: str, voice: str, **kwargs):
+        self.text = text
+        self.voice = voice
+
+    async def stream(self):
+        from edge_tts.exceptions import NoAudioReceived
+
+        if self.fail_rate and random.random() < self.fail_rate:
+            await asyncio.sleep(self.latency / 4)
+            raise NoAudioReceived("No audio was received (fake)")
+        audio = _fake_audio(self.text)
+        chunks = [audio[i:i + 4096] for i in range(0, len(audio), 4096)]
+        pause = self.latency / len(chunks)
+        for chunk in chunks:
+            await asyncio.sleep(pause)
+            yield {"type": "audio", "data": chunk}
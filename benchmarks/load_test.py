@@ -0,0 +1,283 @@
+"""End-to-end load test of the server against local fake upstreams.
+
+Starts two processes: the fake PostgREST/OpenWeather/ElevenLabs app from
+``fake_upstreams.py``, and ``app.main:app`` under uvicorn with its upstream
+URLs pointed at the fakes (and Edge-TTS replaced by ``FakeCommunicate``).
+It then drives a weighted mix of real endpoint traffic at fixed
+concurrency for a fixed time and prints requests/sec and latency
+percentiles per scenario as JSON, tagged with the current git commit so
+runs from different commits can be compared.
+
+Usage:
+    PYTHONPATH=. python benchmarks/load_test.py --concurrency 32 --duration 30
+    PYTHONPATH=. python benchmarks/load_test.py --mix perfumes=1,occasion=1 --json run.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROMPTS = [
+    "أنا سعيد ولدي حفلة زفاف الليلة",
+    "أشعر بالهدوء وأبحث عن عطر للعمل",
+    "أنا متحمس لموعد رومانسي في المساء",
+    "أريد عطر منعش للعمل في الصيف وأنا نشيط",
+    "أنا واثق وعندي اجتماع رسمي مهم",
+    "أبحث عن عطر لسهرة مع الأصدقاء وأنا سعيد",
+]
+
+# name -> (weight, request factory); factories get a random.Random and the run state
+Scenario = Tuple[int, Callable[[random.Random, dict], dict]]
+
+
+def _analyze(path: str, with_user: bool = False):
+    def build(rng, state):
+        body = {"text": rng.choice(PROMPTS)}
+        if with_user and state["customers"]:
+            body["user_id"] = rng.choice(state["customers"])
+        return {"method": "POST", "url": path, "json": body}
+    return build
+
+
+def _order(rng, state):
+    return {"method": "POST", "url": "/api/orders", "json": {
+        "customer_name": "عميل تجريبي",
+        "customer_email": f"load{rng.randint(1, 10**6)}@example.com",
+        "shipping_address": "شارع التحلية",
+        "total_amount": round(rng.uniform(100, 900), 2),
+        "city": "الرياض",
+        "customer_phone": "0500000000",
+        "postal_code": "12345",
+        "payment_method": "card",
+    }}
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "ai_nose": (3, _analyze("/api/ai-nose/analyze", with_user=True)),
+    "mood": (2, _analyze("/api/mood-advisor/analyze")),
+    "occasion": (3, _analyze("/api/occasion-detector/analyze")),
+    "personality": (1, _analyze("/api/personality-map/analyze")),
+    "perfumes": (4, lambda rng, state: {"method": "GET", "url": f"/api/perfumes?page={rng.randint(1, 20)}&limit=9"}),
+    "perfume": (2, lambda rng, state: {"method": "GET", "url": f"/api/perfumes/{rng.choice(state['perfumes'])}"}),
+    "recommendations": (1, lambda rng, state: {"method": "POST", "url": "/api/recommendations/batch", "json": {
+        "contexts": [{"mood": "سعيد", "occasion": "حفلة", "limit": 5}, {"mood": "هادئ", "occasion": "عمل", "limit": 5}],
+    }}),
+    "orders_create": (1, _order),
+    "weather": (1, lambda rng, state: {"method": "POST", "url": "/api/weather/get-weather", "json": {
+        "latitude": 24.71 + rng.choice([0, 0.01]), "longitude": 46.67,
+    }}),
+    "tts": (1, lambda rng, state: {"method": "POST", "url": "/api/tts/synthesize", "json": {
+        "text": rng.choice(PROMPTS), "voice": "ar-SA-HamedNeural",
+    }}),
+}
+
+
+def parse_mix(spec: str) -> Dict[str, int]:
+    if not spec:
+        return {name: weight for name, (weight, _) in SCENARIOS.items()}
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples: List[Tuple[float, int]], elapsed: float) -> dict:
+    latencies = sorted(latency for latency, _ in samples)
+    statuses: Dict[str, int] = {}
+    for _, status in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    # 0 is a connection error or timeout
+    errors = sum(1 for _, status in samples if status == 0 or status >= 500)
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        "status_codes": statuses,
+    }
+
+
+async def drive(base_url: str, mix: Dict[str, int], concurrency: int, duration: float, warmup: float,
+                seed: int, state: dict) -> dict:
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    samples: Dict[str, List[Tuple[float, int]]] = {name: [] for name in names}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def worker(worker_id: int, until: float, record: bool):
+            rng = random.Random(seed * 1000 + worker_id)
+            while time.perf_counter() < until:
+                name = rng.choices(names, weights)[0]
+                request = SCENARIOS[name][1](rng, state)
+                started = time.perf_counter()
+                try:
+                    response = await client.request(**request)
+                    await response.aread()
+                    status = response.status_code
+                except httpx.HTTPError:
+                    status = 0
+                if record:
+                    samples[name].append((time.perf_counter() - started, status))
+
+        if warmup:
+            until = time.perf_counter() + warmup
+            await asyncio.gather(*(worker(i, until, False) for i in range(concurrency)))
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i, started + duration, True) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "elapsed_seconds": round(elapsed, 2),
+        "total": summarize(list(itertools.chain.from_iterable(samples.values())), elapsed),
+        "scenarios": {name: summarize(values, elapsed) for name, values in samples.items()},
+    }
+
+
+def _wait_ready(url: str, process: subprocess.Popen, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"{url} exited with code {process.returncode}")
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise SystemExit(f"{url} did not come up within {timeout}s")
+
+
+def serve_fakes(args) -> None:
+    import uvicorn
+    from benchmarks.fake_upstreams import create_app, seed
+
+    tables = seed(perfumes=args.perfumes, customers=args.customers)
+    app = create_app(tables, args.db_latency_ms / 1000, args.weather_latency_ms / 1000, args.tts_latency_ms / 1000)
+    uvicorn.run(app, host="127.0.0.1", port=args.fake_port, log_level="warning")
+
+
+def serve_app(args) -> None:
+    import edge_tts
+    import uvicorn
+    from benchmarks.fake_upstreams import FakeCommunicate
+
+    FakeCommunicate.latency = args.tts_latency_ms / 1000
+    FakeCommunicate.fail_rate = args.edge_fail_rate
+    edge_tts.Communicate = FakeCommunicate
+    uvicorn.run("app.main:app", host="127.0.0.1", port=args.app_port, log_level="warning",
+                workers=1, access_log=False)
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30, help="seconds of measured traffic")
+    parser.add_argument("--warmup", type=float, default=3, help="seconds of unmeasured traffic first")
+    parser.add_argument("--mix", default="", help=f"name=weight,... from: {', '.join(SCENARIOS)}")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--perfumes", type=int, default=500)
+    parser.add_argument("--customers", type=int, default=2000)
+    parser.add_argument("--db-latency-ms", type=float, default=5)
+    parser.add_argument("--weather-latency-ms", type=float, default=50)
+    parser.add_argument("--tts-latency-ms", type=float, default=300)
+    parser.add_argument("--edge-fail-rate", type=float, default=0.0, help="share of fake Edge-TTS calls that fail")
+    parser.add_argument("--app-port", type=int, default=8765)
+    parser.add_argument("--fake-port", type=int, default=8766)
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument("--role", choices=["driver", "fakes", "app"], default="driver", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.role == "fakes":
+        return serve_fakes(args)
+    if args.role == "app":
+        return serve_app(args)
+
+    mix = parse_mix(args.mix)
+    fake_url = f"http://127.0.0.1:{args.fake_port}"
+    env = dict(
+        os.environ,
+        PYTHONPATH=ROOT,
+        SUPABASE_URL=fake_url,
+        SUPABASE_KEY="load-test",
+        OPENWEATHER_URL=f"{fake_url}/openweather",
+        OPENWEATHER_API_KEY="load-test",
+        ELEVENLABS_URL=f"{fake_url}/elevenlabs",
+    )
+    command = [sys.executable, os.path.abspath(__file__)] + sys.argv[1:]
+    processes = []
+    try:
+        fakes = subprocess.Popen(command + ["--role", "fakes"], env=env, cwd=ROOT)
+        processes.append(fakes)
+        _wait_ready(f"{fake_url}/openweather", fakes)
+        server = subprocess.Popen(command + ["--role", "app"], env=env, cwd=ROOT)
+        processes.append(server)
+        base_url = f"http://127.0.0.1:{args.app_port}"
+        _wait_ready(f"{base_url}/health", server)
+
+        state = {
+            "perfumes": [p["perfume_id"] for p in httpx.get(f"{base_url}/api/perfumes?limit=200").json()["data"]],
+            "customers": [c["customer_id"] for c in httpx.get(f"{base_url}/api/customers").json()[:200]],
+        }
+        results = asyncio.run(drive(base_url, mix, args.concurrency, args.duration, args.warmup, args.seed, state))
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    report = {
+        "commit": _git_commit(),
+        "config": {
+            "concurrency": args.concurrency,
+            "duration_seconds": args.duration,
+            "mix": mix,
+            "db_latency_ms": args.db_latency_ms,
+            "weather_latency_ms": args.weather_latency_ms,
+            "tts_latency_ms": args.tts_latency_ms,
+            "edge_fail_rate": args.edge_fail_rate,
+            "perfumes": args.perfumes,
+            "customers": args.customers,
+        },
+        **results,
+    }
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    print(output)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
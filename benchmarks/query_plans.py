@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Query-plan benchmark for the hot tables.
+
+Loads a synthetic dataset into a scratch schema of a local Postgres, runs
+EXPLAIN ANALYZE on every query shape the routers issue through PostgREST,
+applies supabase/migrations/003_hot_path_indexes.sql and runs them again.
+Prints a before/after table and optionally writes the results as JSON.
+
+Usage:
+    pip install -r benchmarks/requirements.txt
+    python benchmarks/query_plans.py --dsn postgresql://postgres@localhost:5432/postgres
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+
+import psycopg2
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCHEMA_SQL = os.path.join(ROOT, "supabase", "migrations", "001_create_schema.sql")
+INDEX_SQL = os.path.join(ROOT, "supabase", "migrations", "003_hot_path_indexes.sql")
+BENCH_SCHEMA = "aura_bench"
+
+# Synthetic rows are generated in Postgres with generate_series so that large
+# datasets load in seconds. Sizes are scaled by --scale.
+SEED_SQL = """
+INSERT INTO customers (first_name, last_name, email, phone_number, created_at)
+SELECT 'first' || g, 'last' || g, 'customer' || g || '@example.com', '+9665' || g,
+       NOW() - (g || ' minutes')::interval
+FROM generate_series(1, %(customers)s) g;
+
+INSERT INTO perfumes (name, brand, gender, concentration, price, ml_size, description_llm)
+SELECT 'perfume ' || g,
+       'brand ' || (g %% 40),
+       (ARRAY['Male', 'Female', 'Unisex'])[1 + g %% 3],
+       (ARRAY['Parfum', 'EDP', 'EDT', 'EDC', 'Extrait'])[1 + g %% 5],
+       50 + (g * 37) %% 450,
+       (ARRAY[50, 75, 100])[1 + g %% 3],
+       'description ' || g
+FROM generate_series(1, %(perfumes)s) g;
+
+INSERT INTO ai_attributes (perfume_id, mood_tag, style_tag, occasion_tag, sillage_score, longevity_score, skin_compatibility)
+SELECT perfume_id,
+       (ARRAY['هادئ', 'نشيط', 'واثق', 'رومانسي', 'سعيد'])[1 + n %% 5],
+       (ARRAY['كلاسيكي', 'عصري', 'رياضي'])[1 + n %% 3],
+       (ARRAY['يومي', 'عمل', 'موعد', 'حفلة', 'زفاف'])[1 + n %% 5],
+       1 + n %% 10,
+       1 + (n * 7) %% 10,
+       (ARRAY['دهنية, عادية', 'جافة', 'عادية, جافة', 'حساسة'])[1 + n %% 4]
+FROM (SELECT perfume_id, row_number() OVER () AS n FROM perfumes) p;
+
+INSERT INTO ingredients (name, description)
+SELECT 'ingredient ' || g, 'description ' || g
+FROM generate_series(1, %(ingredients)s) g;
+
+INSERT INTO perfume_ingredients (perfume_id, ingredient_id, note_type)
+SELECT DISTINCT ON (p.perfume_id, i.ingredient_id) p.perfume_id, i.ingredient_id,
+       (ARRAY['Top', 'Heart', 'Base'])[1 + k %% 3]
+FROM (SELECT perfume_id, row_number() OVER () AS n FROM perfumes) p
+CROSS JOIN generate_series(0, 4) k
+JOIN (SELECT ingredient_id, row_number() OVER () AS n FROM ingredients) i
+  ON i.n = 1 + (p.n * 7 + k * 101) %% %(ingredients)s;
+
+INSERT INTO orders (customer_id, total_amount, status, created_at)
+SELECT c.customer_id, 100 + g %% 900, (ARRAY['Pending', 'Shipped', 'Delivered'])[1 + g %% 3],
+       NOW() - (g || ' minutes')::interval
+FROM generate_series(1, %(orders)s) g
+JOIN (SELECT customer_id, row_number() OVER () AS n FROM customers) c
+  ON c.n = 1 + g %% %(customers)s;
+
+INSERT INTO order_items (order_id, perfume_id, quantity, price_at_purchase)
+SELECT o.order_id, p.perfume_id, 1 + o.n %% 3, 99
+FROM (SELECT order_id, row_number() OVER () AS n FROM orders) o
+JOIN (SELECT perfume_id, row_number() OVER () AS n FROM perfumes) p
+  ON p.n = 1 + (o.n * 13) %% %(perfumes)s;
+
+INSERT INTO customer_interactions (customer_id, feature_used, input_data, output_data, interaction_time)
+SELECT c.customer_id, (ARRAY['ai_nose', 'mood_advisor', 'skin_analyzer'])[1 + g %% 3],
+       '{"text": "..."}'::jsonb, '{"recommendations": []}'::jsonb,
+       NOW() - (g || ' seconds')::interval
+FROM generate_series(1, %(interactions)s) g
+JOIN (SELECT customer_id, row_number() OVER () AS n FROM customers) c
+  ON c.n = 1 + g %% %(customers)s;
+
+INSERT INTO customer_profiles (customer_id, perfume_drivers, personality_map)
+SELECT customer_id, '{"likes": ["oud"]}'::jsonb, '{"type": "Romantic"}'::jsonb
+FROM customers;
+"""
+
+# Parameters for the lookups are sampled from the loaded data
+SAMPLES_SQL = {
+    "customer_id": "SELECT customer_id FROM customers ORDER BY created_at LIMIT 1 OFFSET %(customers)s / 2",
+    "perfume_id": "SELECT perfume_id FROM perfumes ORDER BY name LIMIT 1 OFFSET %(perfumes)s / 2",
+    "order_id": "SELECT order_id FROM orders ORDER BY created_at LIMIT 1 OFFSET %(orders)s / 2",
+    "ingredient_id": "SELECT ingredient_id FROM ingredients ORDER BY name LIMIT 1",
+}
+
+# (name, router that issues it, SQL equivalent of the PostgREST request)
+QUERY_SHAPES = [
+    (
+        "catalog_join",
+        "services/database.fetch_perfumes_with_ai_attributes",
+        """SELECT p.perfume_id, p.name, p.brand, p.gender, p.concentration, p.price, a.*
+           FROM perfumes p
+           LEFT JOIN LATERAL (
+               SELECT mood_tag, occasion_tag, style_tag, longevity_score, sillage_score, skin_compatibility
+               FROM ai_attributes WHERE ai_attributes.perfume_id = p.perfume_id
+           ) a ON TRUE""",
+    ),
+    (
+        "perfumes_page_max_price",
+        "routers/perfumes.get_perfumes",
+        "SELECT * FROM perfumes WHERE price <= 80 OFFSET 9 LIMIT 9",
+    ),
+    (
+        "perfume_by_id",
+        "routers/perfumes.get_perfume",
+        "SELECT * FROM perfumes WHERE perfume_id = %(perfume_id)s",
+    ),
+    (
+        "ai_attributes_by_perfume",
+        "routers/ai_attributes.get_ai_attribute",
+        "SELECT * FROM ai_attributes WHERE perfume_id = %(perfume_id)s",
+    ),
+    (
+        "customer_profile",
+        "services/database.get_customer_profile",
+        "SELECT * FROM customers WHERE customer_id = %(customer_id)s",
+    ),
+    (
+        "admin_customers_page",
+        "routers/admin.get_customers",
+        "SELECT * FROM customers ORDER BY created_at DESC OFFSET 20 LIMIT 10",
+    ),
+    (
+        "orders_by_customer",
+        "orders of a customer",
+        "SELECT * FROM orders WHERE customer_id = %(customer_id)s",
+    ),
+    (
+        "order_items_by_order",
+        "order items of an order",
+        "SELECT * FROM order_items WHERE order_id = %(order_id)s",
+    ),
+    (
+        "order_items_by_perfume",
+        "sales of a perfume",
+        "SELECT * FROM order_items WHERE perfume_id = %(perfume_id)s",
+    ),
+    (
+        "perfume_ingredients_by_ingredient",
+        "perfumes using an ingredient",
+        "SELECT * FROM perfume_ingredients WHERE ingredient_id = %(ingredient_id)s",
+    ),
+    (
+        "recent_interactions",
+        "services/database.save_ai_interaction readers",
+        """SELECT * FROM customer_interactions WHERE customer_id = %(customer_id)s
+           ORDER BY interaction_time DESC LIMIT 20""",
+    ),
+    (
+        "customer_ai_profile",
+        "customer_profiles lookup",
+        "SELECT * FROM customer_profiles WHERE customer_id = %(customer_id)s",
+    ),
+    (
+        "delete_customer",
+        "routers/customers.delete_customer (cascades)",
+        "DELETE FROM customers WHERE customer_id = %(customer_id)s",
+    ),
+    (
+        "delete_order",
+        "routers/orders.delete_order (cascades)",
+        "DELETE FROM orders WHERE order_id = %(order_id)s",
+    ),
+]
+
+
+def read_sql(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def plan_scans(node, found=None):
+    """Collect scan node types (and index names) from an EXPLAIN JSON plan"""
+    found = found if found is not None else set()
+    node_type = node.get("Node Type", "")
+    if "Scan" in node_type:
+        index = node.get("Index Name")
+        found.add(f"{node_type} ({index})" if index else f"{node_type} on {node.get('Relation Name', '?')}")
+    for child in node.get("Plans", []):
+        plan_scans(child, found)
+    return found
+
+
+def explain(cur, sql, params, repeat):
+    """Median execution time (ms) over ``repeat`` runs, plus the scans used.
+    Each run is rolled back so DELETE shapes can be measured repeatedly.
+    """
+    timings = []
+    triggers = []
+    scans = set()
+    for _ in range(repeat):
+        cur.execute("SAVEPOINT bench")
+        cur.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", params)
+        result = cur.fetchone()[0][0]
+        cur.execute("ROLLBACK TO SAVEPOINT bench")
+        timings.append(result["Execution Time"])
+        # Foreign-key enforcement on deletes shows up as trigger time
+        triggers.append(sum(t.get("Time", 0) for t in result.get("Triggers", [])))
+        scans |= plan_scans(result["Plan"])
+    return {
+        "median_ms": round(statistics.median(timings), 3),
+        "trigger_ms": round(statistics.median(triggers), 3),
+        "scans": sorted(scans),
+    }
+
+
+def run_shapes(cur, params, repeat):
+    results = {}
+    for name, _, sql in QUERY_SHAPES:
+        results[name] = explain(cur, sql, params, repeat)
+    return results
+
+
+def setup_dataset(cur, sizes):
+    cur.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+    cur.execute(f"CREATE SCHEMA {BENCH_SCHEMA}")
+    cur.execute(f"SET search_path TO {BENCH_SCHEMA}, public")
+    cur.execute(read_sql(SCHEMA_SQL))
+    print(f"Loading synthetic data: {sizes}", file=sys.stderr)
+    cur.execute(SEED_SQL, sizes)
+    cur.execute("ANALYZE")
+    params = {}
+    for key, sql in SAMPLES_SQL.items():
+        cur.execute(sql, sizes)
+        params[key] = cur.fetchone()[0]
+    return params
+
+
+def print_report(before, after):
+    header = f"{'query':36} {'before ms':>10} {'after ms':>10} {'speedup':>8}  plan after"
+    print(header)
+    print("-" * len(header))
+    for name, _, _ in QUERY_SHAPES:
+        b = before[name]["median_ms"] + before[name]["trigger_ms"]
+        a = after[name]["median_ms"] + after[name]["trigger_ms"]
+        speedup = f"{b / a:.1f}x" if a > 0 else "-"
+        print(f"{name:36} {b:10.3f} {a:10.3f} {speedup:>8}  {', '.join(after[name]['scans'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", default=os.getenv("BENCH_DATABASE_URL", "postgresql://postgres@localhost:5432/postgres"))
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply the default dataset size")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per query; the median is reported")
+    parser.add_argument("--json", dest="json_path", help="Write before/after results to this file")
+    parser.add_argument("--keep", action="store_true", help=f"Keep the {BENCH_SCHEMA} schema afterwards")
+    args = parser.parse_args()
+
+    sizes = {
+        "customers": int(50_000 * args.scale),
+        "perfumes": int(5_000 * args.scale),
+        "ingredients": int(500 * args.scale),
+        "orders": int(200_000 * args.scale),
+        "interactions": int(500_000 * args.scale),
+    }
+
+    conn = psycopg2.connect(args.dsn)
+    conn.autocommit = False
+    try:
+        with conn.cursor() as cur:
+            params = setup_dataset(cur, sizes)
+            conn.commit()
+
+            before = run_shapes(cur, params, args.repeat)
+            cur.execute(read_sql(INDEX_SQL))
+            cur.execute("ANALYZE")
+            conn.commit()
+            after = run_shapes(cur, params, args.repeat)
+
+            if not args.keep:
+                cur.execute(f"DROP SCHEMA {BENCH_SCHEMA} CASCADE")
+            conn.commit()
+    finally:
+        conn.close()
+
+    print_report(before, after)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"sizes": sizes, "before": before, "after": after}, f, indent=2, ensure_ascii=False)
+        print(f"\nWrote {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
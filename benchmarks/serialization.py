@@ -0,0 +1,120 @@
+"""Benchmark: response serialization of the list endpoints.
+
+"models" is the path the list endpoints used before: build a pydantic model
+per row, let FastAPI validate the list against ``response_model``, run
+``jsonable_encoder`` and render with the stdlib ``json`` module.
+"trusted" is the current path: ``project_rows`` plus ``ORJSONResponse``.
+Rows are synthetic but shaped like the PostgREST output of each table.
+
+Usage:
+    PYTHONPATH=. python benchmarks/serialization.py [--rows 1000 10000 100000] [--repeat 3]
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from typing import List
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.responses import project_rows
+from app.routers.ai_attributes import AIAttributes
+from app.routers.customers import Customer
+from app.routers.orders import Order
+from app.routers.perfumes import Perfume, PerfumeListResponse
+
+CREATED_AT = "2024-05-01T12:00:00+00:00"
+
+
+def perfume_row(i):
+    return {
+        "perfume_id": str(uuid.uuid4()), "name": f"عطر {i}", "brand": "Aura", "gender": "Unisex",
+        "concentration": "EDP", "year_released": 2020, "price": 100.0 + i % 400, "ml_size": 100,
+        "description_llm": "عطر شرقي دافئ بلمسات من العود والعنبر", "created_at": CREATED_AT,
+    }
+
+
+def order_row(i):
+    return {
+        "id": str(uuid.uuid4()), "user_id": str(uuid.uuid4()), "customer_name": f"عميل {i}",
+        "customer_email": f"c{i}@example.com", "shipping_address": "شارع التحلية", "total_amount": 250.5,
+        "status": "pending", "created_at": CREATED_AT, "city": "الرياض", "customer_phone": "0500000000",
+        "postal_code": "12345", "payment_method": "card",
+    }
+
+
+def customer_row(i):
+    return {
+        "customer_id": str(uuid.uuid4()), "email": f"c{i}@example.com", "skin_type": "دهنية",
+        "personality_map": {"traits": ["جريء", "رومانسي"], "score": 0.8}, "created_at": CREATED_AT,
+    }
+
+
+def attributes_row(i):
+    return {
+        "perfume_id": str(uuid.uuid4()), "mood_tag": "سعيد", "occasion_tag": "مسائي", "style_tag": "كلاسيكي",
+        "longevity_score": 7, "sillage_score": 6, "skin_compatibility": "دهنية, عادية", "created_at": CREATED_AT,
+    }
+
+
+def _models_path(model, response_type, wrap=None):
+    field = create_response_field(name=f"Response_{model.__name__}", type_=response_type)
+
+    def run(rows):
+        content = [model(**row) for row in rows]
+        if wrap:
+            content = wrap(content)
+        encoded = asyncio.run(serialize_response(field=field, response_content=content))
+        return JSONResponse(encoded).body
+    return run
+
+
+def _trusted_path(model, wrap=None):
+    def run(rows):
+        content = project_rows(model, rows)
+        if wrap:
+            content = wrap(content)
+        return ORJSONResponse(content).body
+    return run
+
+
+ENDPOINTS = {
+    "/api/perfumes": (
+        perfume_row,
+        _models_path(Perfume, PerfumeListResponse, lambda data: PerfumeListResponse(data=data, total=len(data))),
+        _trusted_path(Perfume, lambda data: {"data": data, "total": len(data)}),
+    ),
+    "/api/orders": (order_row, _models_path(Order, List[Order]), _trusted_path(Order)),
+    "/api/customers": (customer_row, _models_path(Customer, List[Customer]), _trusted_path(Customer)),
+    "/api/ai-attributes": (attributes_row, _models_path(AIAttributes, List[AIAttributes]), _trusted_path(AIAttributes)),
+}
+
+
+def _time(fn, rows, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = fn(rows)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'endpoint':<20} {'rows':>7} {'models ms':>10} {'trusted ms':>11} {'speedup':>8} {'body KB':>8}")
+    for endpoint, (make_row, models, trusted) in ENDPOINTS.items():
+        for count in args.rows:
+            rows = [make_row(i) for i in range(count)]
+            slow, _ = _time(models, rows, args.repeat)
+            fast, size = _time(trusted, rows, args.repeat)
+            print(f"{endpoint:<20} {count:>7} {slow:>10.1f} {fast:>11.1f} {slow / fast:>7.1f}x {size / 1024:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
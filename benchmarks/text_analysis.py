@@ -0,0 +1,113 @@
+"""Microbenchmark: shared keyword automaton vs the per-analyzer keyword loops.
+
+The "loops" side is a copy of the ``any(keyword in text_lower ...)`` chains
+the analyzers used before app/services/text_analysis.py, run the way a
+request ran them (every extractor scans the text again). The "automaton"
+side normalizes once and matches every vocabulary in one pass; it is timed
+cold (per-word cache cleared too), uncached (``analyze.__wrapped__``, words
+already seen) and with the per-text cache the app uses.
+
+Usage:
+    PYTHONPATH=. python benchmarks/text_analysis.py [--repeat 2000]
+"""
+import argparse
+import time
+
+from app.services.text_analysis import VOCABULARIES, _automaton, analyze
+
+SAMPLES = {
+    "short": "أريد عطر منعش للعمل في الصيف",
+    "medium": "أبحث عن هدية لأمي في عيد الأم، تحب الورد والعود وتفضل الروائح الهادئة والكلاسيكية للمناسبات الرسمية",
+    "long": " ".join(
+        ["مساء الخير، أنا متحمس جداً لأن لدي اجتماع مهم في المكتب ثم حفلة عيد ميلاد صديقي في المساء"] * 20
+    ),
+    # Long text that does not repeat itself, so the per-word cache helps less
+    "varied": " ".join([
+        "أبحث عن عطر مميز لزوجتي في ذكرى زواجنا، تحب الفانيليا والمسك والعنبر وتفضل الروائح الدافئة",
+        "بشرتي جافة والعطور لا تدوم عليها طويلاً، أريد شيئاً ثابتاً يناسب الشتاء والأمسيات الباردة",
+        "أعمل في مكتب مغلق لذلك أحتاج عطراً هادئاً لا يزعج زملائي خلال الاجتماعات الطويلة",
+        "في عطلة نهاية الأسبوع أخرج مع أصدقائي إلى البحر ونمارس الرياضة ونحب الروائح المنعشة والحمضيات",
+        "أختي تتخرج من الجامعة الشهر القادم وأريد هدية أنيقة بزجاجة جميلة وحجم صغير يسهل حمله",
+        "والدي يحب العود والبخور منذ زمن بعيد، هل يوجد عطر شرقي فاخر بثبات عالٍ وفوحان قوي",
+        "أشعر بالتعب والقلق هذه الأيام وأريد رائحة تمنحني الطاقة والتفاؤل في الصباح قبل العمل",
+        "نخطط لحفل زفاف في الربيع وأبحث عن عطر رومانسي ناعم بالورد والياسمين لليلة العرس",
+        "ما الفرق بين أو دو بارفان وأو دو تواليت، وأيهما أنسب للاستخدام اليومي في الجو الحار",
+        "أحب تجربة أشياء جديدة وغير مألوفة، اقترح علي عطراً جريئاً بالتوابل والجلد والتبغ",
+        "ابنتي مراهقة وتريد أول عطر لها، شيء خفيف وحلو بالفواكه لا يكون ثقيلاً على المدرسة",
+        "سأسافر إلى مؤتمر مهم وأريد عطراً يعطي انطباعاً بالثقة والاحتراف دون أن يكون صاخباً",
+        "جدتي تحب رائحة الياسمين القديمة التي كانت في بيتها، هل يوجد عطر يذكرها بتلك الأيام",
+        "أفضل العطور الخشبية مع لمسة من الفلفل الوردي والهيل، وأكره الروائح البودرية الحلوة جداً",
+        "أبحث عن عطر للجنسين نستخدمه أنا وزوجي معاً، منعش ونظيف مثل رائحة الصابون والقطن",
+        "صديقي يحتفل بعيد ميلاده الثلاثين في مطعم فاخر، ماذا أهديه إذا كان يحب الروائح المائية",
+        "بشرتي دهنية وأتعرق كثيراً في الصيف، أي العطور تبقى متوازنة ولا تتحول إلى رائحة حادة",
+        "أريد عطراً يذكرني برحلتي إلى المغرب، الأسواق القديمة والتوابل والورد الدمشقي والنعناع",
+        "أعمل ممرضة وأحتاج شيئاً خفيفاً جداً لا يزعج المرضى، ربما رائحة نظيفة تشبه الملابس المغسولة",
+        "نحن في رمضان وأبحث عن عطر للمساء بعد الإفطار، دافئ وهادئ ويليق بالزيارات العائلية",
+    ]),
+}
+
+
+def _first(text_lower, vocabulary, default=None):
+    for label, keywords in VOCABULARIES[vocabulary].items():
+        if any(keyword in text_lower for keyword in keywords):
+            return label
+    return default
+
+
+def legacy_request(text):
+    """Every analyzer lower-cases and rescans the text for its own keywords"""
+    results = []
+    # Middleware, then the handler's own extractors
+    for vocabulary in ("mood", "occasion", "mood", "occasion", "feeling", "event",
+                       "skin_type", "style", "personality", "gift_recipient", "gift_occasion"):
+        results.append(_first(text.lower(), vocabulary))
+    text_lower = text.lower()
+    for vocabulary in ("note", "note_family", "bottle_shape", "bottle_color", "bottle_size"):
+        results.extend(label for label, words in VOCABULARIES[vocabulary].items() if any(w in text_lower for w in words))
+    return results
+
+
+def automaton_request(text, scan):
+    analysis = scan(text)
+    results = []
+    for vocabulary in ("mood", "occasion", "mood", "occasion", "feeling", "event",
+                       "skin_type", "style", "personality", "gift_recipient", "gift_occasion"):
+        results.append(analysis.first(vocabulary))
+    for vocabulary in ("note", "note_family", "bottle_shape", "bottle_color", "bottle_size"):
+        results.extend(analysis.labels(vocabulary))
+    return results
+
+
+def _time(fn, repeat):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    uncached = analyze.__wrapped__
+
+    def cold(text):
+        # Neither the per-text nor the per-word cache has seen the text
+        _automaton._word_hits.clear()
+        return uncached(text)
+
+    print(f"{'sample':<8} {'chars':>6} {'loops us':>10} {'cold us':>9} {'automaton us':>13} "
+          f"{'cached us':>10} {'cold speedup':>13} {'speedup':>8}")
+    for name, text in SAMPLES.items():
+        loops = _time(lambda: legacy_request(text), args.repeat)
+        first = _time(lambda: automaton_request(text, cold), args.repeat)
+        single = _time(lambda: automaton_request(text, uncached), args.repeat)
+        cached = _time(lambda: automaton_request(text, analyze), args.repeat)
+        print(f"{name:<8} {len(text):>6} {loops:>10.1f} {first:>9.1f} {single:>13.1f} "
+              f"{cached:>10.1f} {loops / first:>12.1f}x {loops / single:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+--
+-- Database-side recommendation ranking
+--
+-- recommend_perfumes() filters, scores and limits the catalog inside Postgres
+-- so only the top rows cross the wire. The weights mirror app/services/scoring.py.
+--
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Supporting indexes for the perfumes <-> ai_attributes join and tag lookups
+CREATE INDEX IF NOT EXISTS idx_ai_attributes_perfume_id ON ai_attributes (perfume_id);
+CREATE INDEX IF NOT EXISTS idx_ai_attributes_mood_tag ON ai_attributes (mood_tag);
+CREATE INDEX IF NOT EXISTS idx_ai_attributes_occasion_tag ON ai_attributes (occasion_tag);
+CREATE INDEX IF NOT EXISTS idx_ai_attributes_style_tag ON ai_attributes (style_tag);
+-- Trigram index so ILIKE '%...%' on skin_compatibility can use an index
+CREATE INDEX IF NOT EXISTS idx_ai_attributes_skin_compatibility_trgm
+    ON ai_attributes USING gin (skin_compatibility gin_trgm_ops);
+
+-- One row per perfume that has AI attributes
+CREATE OR REPLACE VIEW perfume_catalog AS
+SELECT DISTINCT ON (p.perfume_id)
+    p.perfume_id,
+    p.name,
+    p.brand,
+    p.gender,
+    p.concentration,
+    p.price,
+    p.ml_size,
+    a.mood_tag,
+    a.occasion_tag,
+    a.style_tag,
+    a.longevity_score,
+    a.sillage_score,
+    a.skin_compatibility
+FROM perfumes p
+JOIN ai_attributes a ON a.perfume_id = p.perfume_id
+ORDER BY p.perfume_id;
+
+-- Maps English and Arabic gender labels onto male / female / unisex
+CREATE OR REPLACE FUNCTION canonical_gender(value TEXT)
+RETURNS TEXT
+LANGUAGE sql IMMUTABLE
+AS $$
+    SELECT CASE lower(trim(value))
+        WHEN 'male' THEN 'male'
+        WHEN 'men' THEN 'male'
+        WHEN 'رجالي' THEN 'male'
+        WHEN 'female' THEN 'female'
+        WHEN 'women' THEN 'female'
+        WHEN 'نسائي' THEN 'female'
+        WHEN 'unisex' THEN 'unisex'
+        WHEN 'للجنسين' THEN 'unisex'
+        ELSE lower(trim(value))
+    END
+$$;
+
+CREATE OR REPLACE FUNCTION recommend_perfumes(
+    p_mood TEXT DEFAULT NULL,
+    p_occasion TEXT DEFAULT NULL,
+    p_style TEXT DEFAULT NULL,
+    p_skin_type TEXT DEFAULT NULL,
+    p_gender TEXT DEFAULT NULL,
+    p_max_price NUMERIC DEFAULT NULL,
+    p_limit INT DEFAULT 3
+)
+RETURNS TABLE (
+    perfume_id UUID,
+    name VARCHAR,
+    brand VARCHAR,
+    gender VARCHAR,
+    concentration VARCHAR,
+    price NUMERIC,
+    mood_tag VARCHAR,
+    occasion_tag VARCHAR,
+    style_tag VARCHAR,
+    longevity_score INT,
+    sillage_score INT,
+    skin_compatibility VARCHAR,
+    score DOUBLE PRECISION
+)
+LANGUAGE sql STABLE
+AS $$
+    -- Rows that match a tag or the skin type, and are not pushed down by
+    -- the gender or price terms, score at least 0.15; a row matching
+    -- nothing scores at most 0.15 and never ranks above them. So when there
+    -- are at least p_limit such rows only they are scored, found through the
+    -- tag and trigram indexes on ai_attributes (the view's DISTINCT ON keeps
+    -- those filters from being pushed into it). With fewer, or no criteria
+    -- at all, the whole catalog is scored. % and _ in p_skin_type match
+    -- literally.
+    WITH matched AS (
+        SELECT DISTINCT ON (p.perfume_id)
+            p.perfume_id,
+            p.name,
+            p.brand,
+            p.gender,
+            p.concentration,
+            p.price,
+            p.ml_size,
+            a.mood_tag,
+            a.occasion_tag,
+            a.style_tag,
+            a.longevity_score,
+            a.sillage_score,
+            a.skin_compatibility
+        FROM ai_attributes a
+        JOIN perfumes p ON p.perfume_id = a.perfume_id
+        WHERE (
+                a.mood_tag = p_mood
+                OR a.occasion_tag = p_occasion
+                OR a.style_tag = p_style
+                OR (COALESCE(p_skin_type, '') <> ''
+                    AND a.skin_compatibility ILIKE '%' || replace(replace(replace(p_skin_type, '\', '\\'), '%', '\%'), '_', '\_') || '%' ESCAPE '\')
+            )
+            AND (COALESCE(p_gender, '') = ''
+                 OR canonical_gender(p.gender) IN (canonical_gender(p_gender), 'unisex'))
+            AND (COALESCE(p_max_price, 0) <= 0 OR p.price <= p_max_price)
+        ORDER BY p.perfume_id
+    ),
+    candidates AS (
+        SELECT * FROM matched
+        UNION ALL
+        SELECT c.*
+        FROM perfume_catalog c
+        WHERE (SELECT count(*) FROM matched) < p_limit
+            AND c.perfume_id NOT IN (SELECT m.perfume_id FROM matched m)
+    ),
+    maxima AS (
+        SELECT
+            NULLIF(MAX(a.longevity_score), 0)::float8 AS longevity,
+            NULLIF(MAX(a.sillage_score), 0)::float8 AS sillage
+        FROM ai_attributes a
+        JOIN perfumes p ON p.perfume_id = a.perfume_id
+    ),
+    normalized AS (
+        SELECT
+            c.*,
+            COALESCE(c.longevity_score / m.longevity, 0) AS longevity_norm,
+            COALESCE(c.sillage_score / m.sillage, 0) AS sillage_norm
+        FROM candidates c
+        CROSS JOIN maxima m
+    ),
+    scored AS (
+        SELECT
+            n.*,
+            0.05 * n.longevity_norm
+            + 0.05 * n.sillage_norm
+            + CASE WHEN n.mood_tag = p_mood THEN 0.30 ELSE 0 END
+            + CASE WHEN n.occasion_tag = p_occasion THEN 0.25 ELSE 0 END
+            + CASE WHEN n.style_tag = p_style THEN 0.15 ELSE 0 END
+            + CASE
+                WHEN COALESCE(p_skin_type, '') = '' THEN 0
+                WHEN n.skin_compatibility ILIKE
+                    '%' || replace(replace(replace(p_skin_type, '\', '\\'), '%', '\%'), '_', '\_') || '%' ESCAPE '\' THEN 0.15
+                ELSE 0
+              END
+            + CASE
+                WHEN COALESCE(p_gender, '') = '' THEN 0
+                WHEN canonical_gender(n.gender) = canonical_gender(p_gender) THEN 0.05
+                WHEN canonical_gender(n.gender) = 'unisex' THEN 0.025
+                ELSE -1.0
+              END
+            - CASE
+                WHEN COALESCE(p_max_price, 0) > 0
+                    THEN 0.5 * LEAST(GREATEST((n.price - p_max_price) / p_max_price, 0), 1)
+                ELSE 0
+              END AS score
+        FROM normalized n
+    )
+    SELECT
+        s.perfume_id,
+        s.name,
+        s.brand,
+        s.gender,
+        s.concentration,
+        s.price,
+        s.mood_tag,
+        s.occasion_tag,
+        s.style_tag,
+        s.longevity_score,
+        s.sillage_score,
+        s.skin_compatibility,
+        s.score
+    FROM scored s
+    ORDER BY s.score DESC, s.perfume_id
+    LIMIT GREATEST(p_limit, 0)
+$$;
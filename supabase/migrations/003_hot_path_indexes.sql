@@ -0,0 +1,33 @@
+--
+-- Indexes for the foreign keys and lookup columns the API filters and sorts by
+--
+-- 001_create_schema.sql only defines primary keys, so every lookup below was a
+-- sequential scan, and every perfume/customer delete scanned the child tables
+-- to enforce ON DELETE rules. Measure with benchmarks/query_plans.py.
+--
+
+-- Catalog join (perfumes -> ai_attributes); also created by 002
+CREATE INDEX IF NOT EXISTS idx_ai_attributes_perfume_id ON ai_attributes (perfume_id);
+
+-- Orders of a customer, and ON DELETE SET NULL when a customer is removed
+CREATE INDEX IF NOT EXISTS idx_orders_customer_id ON orders (customer_id);
+
+-- Items of an order, and ON DELETE CASCADE / RESTRICT checks
+CREATE INDEX IF NOT EXISTS idx_order_items_order_id ON order_items (order_id);
+CREATE INDEX IF NOT EXISTS idx_order_items_perfume_id ON order_items (perfume_id);
+
+-- Perfumes that use an ingredient; (perfume_id, ingredient_id) is already the primary key
+CREATE INDEX IF NOT EXISTS idx_perfume_ingredients_ingredient_id ON perfume_ingredients (ingredient_id);
+
+-- A customer's latest interactions
+CREATE INDEX IF NOT EXISTS idx_customer_interactions_customer_time
+    ON customer_interactions (customer_id, interaction_time DESC);
+
+-- AI profile of a customer
+CREATE INDEX IF NOT EXISTS idx_customer_profiles_customer_id ON customer_profiles (customer_id);
+
+-- Admin customer listing: ORDER BY created_at DESC with OFFSET/LIMIT
+CREATE INDEX IF NOT EXISTS idx_customers_created_at ON customers (created_at DESC);
+
+-- Catalog listing with maxPrice
+CREATE INDEX IF NOT EXISTS idx_perfumes_price ON perfumes (price);